@@ -0,0 +1,20 @@
+"""Shared fixtures: the analysis modules live at the repository root."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vendor_pipeline import VendorRow  # noqa: E402
+
+
+@pytest.fixture
+def make_row():
+    """VendorRow factory with defaults for the fields a test does not care about."""
+    def make(row_idx, vendor, cents, dept="G&A", rec="Optimize", desc=None,
+             source="db", region="UK"):
+        return VendorRow(row_idx, vendor, cents / 100, cents, None, dept, desc, rec,
+                         source, None, region)
+    return make
@@ -0,0 +1,88 @@
+"""Checkpointed classification resumes to exactly the uninterrupted result."""
+
+import os
+
+import pytest
+
+from vendor_checkpoint import ClassificationCheckpoint
+from vendor_pipeline import classify_rows
+from vendor_spill import MemoryBudget
+
+INPUT_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                          "A - TEMPLATE - RWA - Vendor Spend Strategy (NAME) (1).xlsx")
+EVERY = 20
+
+
+def classify(vendor_name):
+    """Deterministic stand-in for the vendor lookup."""
+    return ("G&A" if len(vendor_name) % 2 else "Sales", f"Services of {vendor_name}",
+            ("Terminate", "Consolidate", "Optimize")[len(vendor_name) % 3], "fallback")
+
+
+class Crash(Exception):
+    pass
+
+
+def crashing_after(calls):
+    count = [0]
+
+    def flaky(vendor_name):
+        count[0] += 1
+        if count[0] > calls:
+            raise Crash(vendor_name)
+        return classify(vendor_name)
+    return flaky
+
+
+@pytest.fixture(scope="module")
+def uninterrupted():
+    return list(classify_rows(INPUT_FILE, classify, batch_size=16))
+
+
+@pytest.mark.parametrize("budget", [None, MemoryBudget(4096, share=1.0)])
+def test_resume_matches_uninterrupted_run(tmp_path, uninterrupted, budget):
+    path = str(tmp_path / "checkpoint.pkl")
+
+    with pytest.raises(Crash):
+        classify_rows(INPUT_FILE, crashing_after(150), batch_size=16,
+                      checkpoint=ClassificationCheckpoint(path, "key", every=EVERY),
+                      budget=budget)
+    assert os.path.exists(path)
+
+    checkpoint = ClassificationCheckpoint(path, "key", resume=True, every=EVERY)
+    rows = list(classify_rows(INPUT_FILE, classify, batch_size=16, checkpoint=checkpoint,
+                              budget=budget))
+
+    assert 0 < checkpoint.resumed_rows < len(uninterrupted)
+    assert rows == uninterrupted
+    # A completed run removes its checkpoint
+    assert not os.path.exists(path)
+
+
+def test_checkpoint_for_another_key_is_ignored(tmp_path, uninterrupted):
+    path = str(tmp_path / "checkpoint.pkl")
+    with pytest.raises(Crash):
+        classify_rows(INPUT_FILE, crashing_after(150), batch_size=16,
+                      checkpoint=ClassificationCheckpoint(path, "old key", every=EVERY))
+
+    checkpoint = ClassificationCheckpoint(path, "new key", resume=True, every=EVERY)
+    rows = list(classify_rows(INPUT_FILE, classify, batch_size=16, checkpoint=checkpoint))
+
+    assert checkpoint.resumed_rows == 0
+    assert rows == uninterrupted
+
+
+def test_torn_trailing_record_is_dropped(tmp_path, uninterrupted):
+    path = str(tmp_path / "checkpoint.pkl")
+    with pytest.raises(Crash):
+        classify_rows(INPUT_FILE, crashing_after(150), batch_size=16,
+                      checkpoint=ClassificationCheckpoint(path, "key", every=EVERY))
+    # A crash in the middle of an append leaves part of a record behind
+    with open(path, "ab") as f:
+        f.write(b"\x80\x05\x95partial")
+
+    checkpoint = ClassificationCheckpoint(path, "key", resume=True, every=EVERY)
+    rows = list(classify_rows(INPUT_FILE, classify, batch_size=16, checkpoint=checkpoint))
+
+    assert checkpoint.resumed_rows > 0
+    assert rows == uninterrupted
@@ -0,0 +1,80 @@
+"""Consolidation survivors: who each Consolidate vendor moves to."""
+
+from vendor_consolidation import (ROLE_ABSORBED, ROLE_SURVIVOR, assign_targets,
+                                  volume_discount_cents)
+
+
+def test_survivor_prefers_kept_then_curated_then_spend(make_row):
+    rows = [
+        make_row(2, "Big Terminated", 900_000_00, rec="Terminate", desc="Law firm"),
+        make_row(3, "Big Consolidated", 500_000_00, rec="Consolidate", desc="Law firm",
+                 source="rules"),
+        make_row(4, "Small Kept", 10_000_00, rec="Optimize", desc="Law firm", source="rules"),
+        make_row(5, "Curated Kept", 5_000_00, rec="Optimize", desc="Solicitor"),
+        make_row(6, "Tiny", 1_000_00, rec="Consolidate", desc="Legal services"),
+    ]
+
+    consolidation = assign_targets(rows)
+
+    assert consolidation.targets == {3: "Curated Kept", 6: "Curated Kept"}
+    assert consolidation.roles == {5: ROLE_SURVIVOR, 3: ROLE_ABSORBED, 6: ROLE_ABSORBED}
+    [cluster] = consolidation.clusters
+    assert (cluster["cluster"], cluster["function"], cluster["absorbed"],
+            cluster["absorbed_cents"]) == ("Legal", "Legal", 2, 501_000_00)
+
+
+def test_largest_consolidate_vendor_survives_without_a_kept_one(make_row):
+    rows = [make_row(2, "A", 20_000_00, rec="Consolidate", desc="Payroll services"),
+            make_row(3, "B", 80_000_00, rec="Consolidate", desc="Tax filings"),
+            make_row(4, "C", 80_000_00, rec="Consolidate", desc="Audit")]
+
+    consolidation = assign_targets(rows)
+
+    # Equal spend: the earlier row wins
+    assert consolidation.targets == {2: "B", 4: "B"}
+    combined = volume_discount_cents([180_000_00])[0]
+    own = volume_discount_cents([80_000_00, 20_000_00, 80_000_00]).sum()
+    assert consolidation.savings_cents == combined - own
+
+
+def test_department_fallbacks_are_not_consolidated(make_row):
+    rows = [make_row(2, "Cleaner", 30_000_00, dept="Facilities", rec="Optimize", desc=None),
+            make_row(3, "Locksmith", 2_000_00, dept="Facilities", rec="Consolidate",
+                     desc="Door repairs")]
+
+    consolidation = assign_targets(rows)
+
+    assert consolidation.targets == {} and len(consolidation) == 0
+
+
+def test_location_bound_functions_cluster_per_region(make_row):
+    rows = [
+        make_row(2, "London Office", 200_000_00, rec="Optimize", desc="Coworking space",
+                 region="United Kingdom"),
+        make_row(3, "Zagreb Office", 50_000_00, rec="Consolidate", desc="Coworking space",
+                 region="Croatia"),
+        make_row(4, "Zagreb Hub", 80_000_00, rec="Optimize", desc="Serviced office",
+                 region="Croatia"),
+        make_row(5, "Somewhere Office", 9_000_00, rec="Consolidate", desc="Coworking space",
+                 region="Unknown"),
+        make_row(6, "London Cafe", 1_000_00, rec="Consolidate", desc="Catering",
+                 region="United Kingdom"),
+    ]
+
+    consolidation = assign_targets(rows)
+
+    assert consolidation.targets == {3: "Zagreb Hub"}
+    assert [(c["cluster"], c["function"]) for c in consolidation.clusters] == [
+        ("Workspace (Croatia)", "Workspace")]
+
+
+def test_custom_clusters_and_skipped_rows(make_row):
+    rows = [make_row(2, "A", 5_000_00, rec="Consolidate"),
+            make_row(3, "B", 7_000_00, rec="Optimize"),
+            make_row(4, "C", 9_000_00, rec="Consolidate", dept="Sales")]
+
+    consolidation = assign_targets(rows, cluster_of=lambda row: row.dept if row.dept != "Sales"
+                                   else None)
+
+    assert consolidation.targets == {2: "B"}
+    assert [m["vendor"] for m in consolidation.members] == ["B", "A"]
@@ -0,0 +1,87 @@
+"""Run-to-run diff buckets: New, Vanished, Reclassified and Spend Change."""
+
+import json
+
+from vendor_diff import (build_snapshot, change_record, diff_snapshots, summarize_changes,
+                         write_changes_report)
+from vendor_history import vendor_key
+
+
+def snapshot(*entries):
+    """Snapshot from (vendor, department, recommendation, cents) entries."""
+    return build_snapshot((vendor_key(vendor), vendor, dept, rec, cents)
+                          for vendor, dept, rec, cents in entries)
+
+
+PREVIOUS = snapshot(
+    ("Salesforce", "Sales", "Optimize", 300_000_00),
+    ("Lusha", "Sales", "Consolidate", 3_000_00),
+    ("Wework", "Facilities", "Consolidate", 64_000_00),
+    ("Old Caterer", "G&A", "Terminate", 2_500_00),
+    ("Steady Vendor", "Legal", "Optimize", 10_000_00),
+    ("Drifting Vendor", "Legal", "Optimize", 10_000_00),
+)
+CURRENT = snapshot(
+    ("SALESFORCE", "Sales", "Optimize", 350_000_00),       # spend up $50,000
+    ("Lusha", "Sales", "Terminate", 3_200_00),             # reclassified
+    ("Wework", "Facilities", "Consolidate", 64_000_00),    # unchanged
+    ("New Cloud", "Engineering", "Optimize", 20_000_00),   # new
+    ("Steady Vendor", "Legal", "Optimize", 10_999_99),     # below the $1,000 threshold
+    ("Drifting Vendor", "Legal", "Optimize", 9_000_00),    # exactly at the threshold
+)
+
+
+def test_changes_fall_in_their_buckets():
+    changes = {c["vendor"]: c for c in diff_snapshots(PREVIOUS, CURRENT)}
+
+    assert {vendor: c["change_type"] for vendor, c in changes.items()} == {
+        "SALESFORCE": "Spend Change",
+        "Lusha": "Reclassified",
+        "New Cloud": "New",
+        "Old Caterer": "Vanished",
+        "Drifting Vendor": "Spend Change",
+    }
+    lusha = changes["Lusha"]
+    assert (lusha["previous_recommendation"], lusha["recommendation"]) == ("Consolidate",
+                                                                          "Terminate")
+    assert lusha["delta_cents"] == 200_00
+    assert changes["Old Caterer"]["delta_cents"] == -2_500_00
+    assert changes["Old Caterer"]["department"] is None
+    assert changes["New Cloud"]["previous_cents"] == 0
+
+
+def test_changes_are_sorted_by_impact():
+    changes = diff_snapshots(PREVIOUS, CURRENT)
+
+    assert [c["vendor"] for c in changes] == [
+        "SALESFORCE", "New Cloud", "Lusha", "Old Caterer", "Drifting Vendor"]
+    assert [c["impact"] for c in changes] == [50_000_00, 20_000_00, 3_200_00, 2_500_00,
+                                              1_000_00]
+
+
+def test_threshold_and_duplicates():
+    previous = snapshot(("Acme", "G&A", "Optimize", 1_000_00), ("acme ", "G&A", "Optimize", 500_00))
+    current = snapshot(("Acme", "G&A", "Optimize", 1_500_00))
+
+    # Duplicate keys merge, so the vendor's spend did not move
+    assert diff_snapshots(previous, current) == []
+    assert [c["change_type"] for c in diff_snapshots(previous, current, spend_threshold=0)] == [
+        "Spend Change"]
+
+
+def test_summary_and_report(tmp_path):
+    changes = diff_snapshots(PREVIOUS, CURRENT)
+    summary = summarize_changes(changes)
+
+    assert summary["Spend Change"] == {"vendors": 2, "delta": 49_000.0}
+    assert summary["New"] == {"vendors": 1, "delta": 20_000.0}
+    assert summary["Vanished"] == {"vendors": 1, "delta": -2_500.0}
+    assert summary["Reclassified"] == {"vendors": 1, "delta": 200.0}
+    assert change_record(changes[0])["delta"] == 50_000.0
+
+    path = tmp_path / "changes.json"
+    write_changes_report(changes, "run 1", str(path))
+    report = json.loads(path.read_text(encoding="utf-8"))
+    assert report["compared_against"] == "run 1"
+    assert report["summary"]["New"]["vendors"] == 1
+    assert [c["vendor"] for c in report["changes"]] == [c["vendor"] for c in changes]
@@ -0,0 +1,47 @@
+"""Export sinks: a sink that fails to open does not leak the ones before it."""
+
+import pytest
+
+import vendor_export
+from vendor_export import FanOutWriter, open_sinks
+
+COLUMNS = ("vendor", "spend")
+
+
+def test_records_fan_out_to_every_format(tmp_path):
+    paths = {"csv": tmp_path / "v.csv", "jsonl": tmp_path / "v.jsonl"}
+
+    with FanOutWriter(open_sinks(paths, COLUMNS)) as out:
+        out.write(("Lusha", 3000.0))
+
+    assert paths["csv"].read_text().splitlines() == ["vendor,spend", "Lusha,3000.0"]
+    assert paths["jsonl"].read_text() == '{"vendor": "Lusha", "spend": 3000.0}\n'
+
+
+def test_failed_open_closes_the_sinks_already_opened(tmp_path, monkeypatch):
+    opened = []
+
+    class RecordingCsvSink(vendor_export.CsvSink):
+        def __init__(self, path, columns):
+            super().__init__(path, columns)
+            opened.append(self)
+
+    monkeypatch.setattr(vendor_export, "CsvSink", RecordingCsvSink)
+    paths = {"csv": tmp_path / "v.csv", "jsonl": tmp_path / "missing" / "v.jsonl"}
+
+    with pytest.raises(FileNotFoundError):
+        open_sinks(paths, COLUMNS)
+    assert [sink._f.closed for sink in opened] == [True]
+
+
+def test_close_reaches_every_sink(tmp_path):
+    sinks = open_sinks({"csv": tmp_path / "v.csv", "jsonl": tmp_path / "v.jsonl"}, COLUMNS)
+    sinks[0]._f.close()
+
+    def fail():
+        raise OSError("disk full")
+    sinks[0].close = fail
+
+    with pytest.raises(OSError):
+        FanOutWriter(sinks).close()
+    assert sinks[1]._f.closed
@@ -0,0 +1,41 @@
+"""FX as-of lookups: latest rate on or before each row's date."""
+
+import pytest
+
+from vendor_fx import FxTable, MissingRateError, currency_for_region
+
+TABLE = FxTable([
+    ("2025-01", "GBP", 1.25),
+    ("2025-03", "GBP", 1.30),
+    ("2025-02-15", "EUR", 1.05),
+], source="rates.csv")
+
+
+def test_rate_on_or_before_the_as_of_date():
+    assert TABLE.rates_for(["GBP"] * 4, ["2025-01-01", "2025-02-28", "2025-03-01", "2026-01-01"]
+                           ).tolist() == [1.25, 1.25, 1.30, 1.30]
+    assert TABLE.rates_for(["EUR", "GBP"], "2025-02-15").tolist() == [1.05, 1.25]
+    assert TABLE.rates_for(["GBP", "EUR"]).tolist() == [1.30, 1.05]
+
+
+def test_reporting_currency_needs_no_rate():
+    assert TABLE.rates_for(["USD", "GBP"]).tolist() == [1.0, 1.30]
+    assert TABLE.convert(["USD", "GBP"], [10.0, 100.005], "2025-01-31").tolist() == [1000, 12501]
+
+
+def test_missing_rate_names_the_first_row():
+    with pytest.raises(MissingRateError) as before_first:
+        TABLE.rates_for(["GBP", "EUR", "EUR"], "2025-02-01")
+    assert before_first.value.index == 1
+    assert "No EUR rate on or before 2025-02-01 in rates.csv" in str(before_first.value)
+
+    with pytest.raises(MissingRateError) as unknown:
+        TABLE.rates_for(["GBP", "JPY"])
+    assert unknown.value.index == 1
+    assert "No JPY rates" in str(unknown.value)
+
+
+def test_region_currencies():
+    assert currency_for_region("Croatia") == "EUR"
+    assert currency_for_region("United Kingdom") == "GBP"
+    assert currency_for_region("Atlantis") == "USD"
@@ -0,0 +1,72 @@
+"""Parent roll-ups through the closure against naive walks up the tree."""
+
+import numpy as np
+import pytest
+
+from vendor_hierarchy import VendorHierarchy, query_children, query_parent, roll_up
+from vendor_history import vendor_key
+from vendor_money import from_cents
+
+
+def random_forest(rng, nodes):
+    """(vendor, parent) edges: each node's parent is an earlier node, or none."""
+    return [(f"Entity {i}", f"Entity {int(rng.integers(i))}")
+            for i in range(1, nodes) if rng.random() < 0.8]
+
+
+def naive_totals(edges, rows):
+    """{ancestor: (entities, cents)} by walking every row up its parents."""
+    parents = {child: parent for child, parent in edges}
+    totals = {}
+    for row in rows:
+        node = row.vendor
+        if node not in parents and node not in parents.values():
+            continue
+        while node is not None:
+            count, cents = totals.get(node, (0, 0))
+            totals[node] = (count + 1, cents + row.cents)
+            node = parents.get(node)
+    return totals
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_closure_totals_match_naive_sums(make_row, seed):
+    rng = np.random.default_rng(seed)
+    edges = random_forest(rng, 40)
+    hierarchy = VendorHierarchy(edges)
+    # Spend on some hierarchy entities (in any case) and on vendors outside it
+    rows = [make_row(i + 2, f"entity {int(rng.integers(50))}".upper() if i % 3 == 0
+                     else f"Entity {int(rng.integers(50))}", int(rng.integers(1, 10**8)))
+            for i in range(60)]
+
+    rollup = roll_up(rows, hierarchy)
+
+    expected = naive_totals(edges, [row._replace(vendor=row.vendor.title()) for row in rows])
+    for name, (count, cents) in expected.items():
+        assert rollup.spend_cents(name) == cents
+        assert int(rollup.vendors[hierarchy._index[vendor_key(name)]]) == count
+    for key in hierarchy.keys:
+        if hierarchy.names[key] not in expected:
+            assert rollup.spend_cents(hierarchy.names[key]) == 0
+
+
+def test_saved_rollup_answers_parent_queries(make_row, tmp_path):
+    edges = [("Bdo Llp", "BDO UK"), ("BDO UK", "BDO International"),
+             ("Bdo Croatia", "BDO International")]
+    rows = [make_row(2, "Bdo Llp", 100_00), make_row(3, "Bdo Croatia", 50_00),
+            make_row(4, "BDO UK", 25_00), make_row(5, "Unrelated", 999_00)]
+    rollup = roll_up(rows, VendorHierarchy(edges))
+    cube = str(tmp_path / "cube.sqlite")
+    rollup.save(cube)
+
+    assert query_parent(cube, "bdo international") == (0, 3, from_cents(175_00))
+    assert query_parent(cube, "BDO UK") == (1, 2, from_cents(125_00))
+    assert query_parent(cube, "Bdo Llp") is None
+    assert query_children(cube, "BDO International") == [
+        (1, "Bdo Croatia"), (1, "BDO UK"), (2, "Bdo Llp")]
+    assert rollup.grouped_cents == 175_00
+
+
+def test_cycles_are_rejected():
+    with pytest.raises(ValueError, match="Cycle"):
+        VendorHierarchy([("A", "B"), ("B", "C"), ("C", "A")])
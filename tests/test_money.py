@@ -0,0 +1,35 @@
+"""Integer-cent rounding and exact grouped sums."""
+
+import numpy as np
+
+from vendor_money import cents_array, encode, format_cents, from_cents, group_sum, to_cents
+
+AMOUNTS = [0.125, -0.125, 0.005, -0.005, 2.675, 1234.565, 99.994, -99.996, 0, 1e9 + 0.01]
+CENTS = [13, -13, 1, -1, 268, 123457, 9999, -10000, 0, 100_000_000_001]
+
+
+def test_half_cents_round_away_from_zero():
+    assert [to_cents(amount) for amount in AMOUNTS] == CENTS
+    assert to_cents(None) == 0
+
+
+def test_array_rounding_matches_scalar_rounding():
+    cents = cents_array(AMOUNTS)
+
+    assert cents.dtype == np.int64
+    assert cents.tolist() == CENTS
+
+
+def test_sums_reconcile_to_the_cent():
+    cents = cents_array([0.1] * 10 + [0.2] * 10)
+    codes, groups = encode(["a"] * 10 + ["b"] * 10)
+
+    assert groups == ["a", "b"]
+    assert group_sum(codes, cents, len(groups)).tolist() == [100, 200]
+    assert from_cents(int(cents.sum())) == 3.0
+
+
+def test_format_cents_is_exact():
+    assert format_cents(123457) == "$1,234.57"
+    assert format_cents(-13) == "-$0.13"
+    assert format_cents(100_000_000_001) == "$1,000,000,000.01"
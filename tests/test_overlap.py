@@ -0,0 +1,103 @@
+"""MinHash/LSH overlap detection on known near-duplicate descriptions."""
+
+import numpy as np
+
+from vendor_overlap import (find_overlaps, minhash_signatures, normalize_description,
+                            shingles, similar_components)
+from vendor_reports import find_opportunities, select_opportunities
+
+SERVICES = [
+    "Management consulting and strategic advisory services",
+    "Commercial office cleaning and janitorial services",
+    "Cloud hosting and managed infrastructure platform",
+    "Corporate travel booking and expense management",
+    "Payroll processing and employee benefits administration",
+    "Legal counsel for mergers and acquisitions",
+    "Recruitment and executive search for technology roles",
+    "Coworking office space and meeting room rental",
+]
+VARIANTS = [
+    "{} in Croatia",
+    "{} (Acme Ltd)",
+    "Provider of {}",
+    "{} for the UK",
+]
+
+
+def jaccard(a, b):
+    a, b = shingles(normalize_description(a)), shingles(normalize_description(b))
+    return len(a & b) / len(a | b)
+
+
+def test_near_duplicates_share_a_component():
+    texts, service_of = [], []
+    for s, service in enumerate(SERVICES):
+        for variant in ["{}"] + VARIANTS:
+            texts.append(normalize_description(variant.format(service)))
+            service_of.append(s)
+    service_of = np.array(service_of)
+
+    labels = similar_components(minhash_signatures(texts))
+
+    pairs = found = 0
+    for i in range(len(texts)):
+        for j in range(i + 1, len(texts)):
+            if service_of[i] == service_of[j] and jaccard(texts[i], texts[j]) >= 0.7:
+                pairs += 1
+                found += labels[i] == labels[j]
+    assert pairs > 0
+    assert found / pairs >= 0.95
+    # Distinct services never merge
+    for s in range(len(SERVICES)):
+        assert len(set(labels[service_of == s]) & set(labels[service_of != s])) == 0
+
+
+def test_signature_agreement_estimates_jaccard():
+    a = normalize_description(SERVICES[0])
+    b = normalize_description(SERVICES[0] + " in Croatia")
+    signatures = minhash_signatures([a, b])
+    estimate = (signatures[0] == signatures[1]).mean()
+    assert abs(estimate - jaccard(a, b)) < 0.2
+
+
+def test_groups_span_departments(make_row):
+    rows = [
+        make_row(2, "Advisory A", 500_00, dept="G&A", desc=SERVICES[0]),
+        make_row(3, "Advisory B", 300_00, dept="M&A", desc=SERVICES[0] + " in Croatia"),
+        make_row(4, "Advisory C", 200_00, dept="M&A", desc="Provider of " + SERVICES[0]),
+        make_row(5, "Cleaner A", 100_00, dept="Facilities", desc=SERVICES[1]),
+        make_row(6, "Cleaner B", 100_00, dept="Facilities", desc=SERVICES[1] + " (Acme Ltd)"),
+        make_row(7, "Host", 900_00, dept="Engineering", desc=SERVICES[2]),
+    ]
+
+    overlaps = find_overlaps(rows)
+
+    # The cleaners share one department, so only the advisory group is reported
+    assert len(overlaps) == 1
+    group = overlaps.groups[0]
+    assert group["vendors"] == 3
+    assert group["departments"] == ["G&A", "M&A"]
+    assert group["largest"] == "Advisory A"
+    assert group["cents"] == 1_000_00
+    assert [overlaps.group[overlaps.lookup(row)] for row in rows] == [1, 1, 1, -1, -1, -1]
+    assert [overlaps.rank[overlaps.lookup(row)] for row in rows[:3]] == [0, 1, 2]
+
+
+def test_overlap_groups_are_disjoint_opportunities(make_row):
+    # No function keywords, so each vendor's function cluster is its department
+    service = "Document scanning and archiving"
+    rows = [
+        make_row(2, "Scan A", 400_000_00, dept="G&A", desc=service, rec="Consolidate"),
+        make_row(3, "Scan B", 300_000_00, dept="Legal", desc=service + " in Croatia",
+                 rec="Consolidate"),
+        make_row(4, "Print", 100_000_00, dept="Marketing", desc="Brochure printing"),
+    ]
+
+    candidates = find_opportunities(rows, overlaps=find_overlaps(rows))
+    selected = select_opportunities(candidates)
+
+    assert [(c["kind"], c["name"]) for c in selected] == [("overlap", service),
+                                                          ("function", "Marketing")]
+    assert selected[0]["savings_cents"] == 210_000_00
+    assert selected[0]["survivor"] == "Scan A"
+    assert sorted(selected[0]["rows"]) == [2, 3]
@@ -0,0 +1,60 @@
+"""The exact action planner against brute force on small inputs."""
+
+from itertools import combinations
+
+import numpy as np
+import pytest
+
+from vendor_money import encode
+from vendor_planner import default_risk, estimated_savings, plan_actions
+
+RECOMMENDATIONS = ("Terminate", "Consolidate", "Optimize")
+DEPARTMENTS = ("G&A", "Sales", "Legal")
+
+
+def brute_force(rows, max_actions, max_dept_risk):
+    """Largest total savings over every feasible subset of vendors."""
+    cents = np.array([row.cents for row in rows], dtype=np.int64)
+    recs = [row.rec for row in rows]
+    dept_codes, _ = encode([row.dept for row in rows])
+    savings = estimated_savings(cents, recs).tolist()
+    risks = default_risk(recs, dept_codes, cents).tolist()
+    best = 0
+    for size in range(0, min(max_actions, len(rows)) + 1):
+        for chosen in combinations(range(len(rows)), size):
+            used = {}
+            for i in chosen:
+                used[rows[i].dept] = used.get(rows[i].dept, 0) + risks[i]
+            if all(risk <= max_dept_risk for risk in used.values()):
+                best = max(best, sum(savings[i] for i in chosen))
+    return best
+
+
+@pytest.mark.parametrize("seed", range(12))
+def test_exact_plan_matches_brute_force(make_row, seed):
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(4, 10))
+    rows = [make_row(i + 2, f"Vendor {i}", int(rng.integers(1, 5_000_000)),
+                     dept=DEPARTMENTS[int(rng.integers(len(DEPARTMENTS)))],
+                     rec=RECOMMENDATIONS[int(rng.integers(len(RECOMMENDATIONS)))])
+            for i in range(n)]
+    max_actions, max_dept_risk = int(rng.integers(1, 5)), int(rng.integers(2, 9))
+
+    plan = plan_actions(rows, max_actions=max_actions, max_dept_risk=max_dept_risk)
+
+    assert plan.method == "exact"
+    assert plan.savings_cents == brute_force(rows, max_actions, max_dept_risk)
+    assert len(plan.actions) <= max_actions
+    assert all(risk <= max_dept_risk for _, risk, _ in plan.dept_totals().values())
+
+
+def test_must_keep_vendors_are_never_chosen(make_row, tmp_path):
+    rows = [make_row(2, "Big Vendor", 9_000_000, rec="Terminate"),
+            make_row(3, "Small Vendor", 100_000, rec="Terminate")]
+    overrides = tmp_path / "overrides.csv"
+    overrides.write_text("vendor,risk,keep\nbig vendor,,yes\n", encoding="utf-8")
+
+    plan = plan_actions(rows, max_actions=5, max_dept_risk=20, overrides_file=str(overrides))
+
+    assert [a["vendor"] for a in plan.actions] == ["Small Vendor"]
+    assert plan.kept == 1
@@ -0,0 +1,44 @@
+"""Single vendors scored against precomputed references match a full rebuild."""
+
+import numpy as np
+
+from vendor_overlap import OverlapIndex, find_overlaps
+from vendor_rules import FEATURES, ReferenceFeatures, build_features, score
+
+DESCRIPTIONS = [
+    ("Management consulting and strategic advisory services", "Professional Services"),
+    ("Management consulting and advisory services in Croatia", "M&A"),
+    ("Coworking office space", "Facilities"),
+    ("Serviced office workspace", "Facilities"),
+    ("Office catering and coffee", "Facilities"),
+    ("Law firm", "Legal"),
+    (None, "G&A"),
+]
+
+
+def test_features_match_a_rebuild_with_each_row_added(make_row):
+    references = [make_row(i, f"Ref {i}", cents, dept=dept, desc=desc, region=region)
+                  for i, ((desc, dept), cents, region) in enumerate(zip(
+                      DESCRIPTIONS, [0, 5_00, 0, 9_00, 0, 0, 3_00],
+                      ["UK", "Croatia", "UK", "UK", "Croatia", "UK", "UK"]))]
+    candidates = [
+        make_row(99, "New", 0, dept="Sales", desc="Management consulting and advisory services",
+                 source="fallback"),
+        make_row(99, "New", 5_00, dept="Legal", desc="Coworking office space", source="fallback"),
+        make_row(99, "New", 1_00, dept="G&A", desc="Catering and coffee for offices",
+                 region="Croatia", source="fallback"),
+        make_row(99, "New", 0, dept="G&A", desc="", source="fallback"),
+        make_row(99, "New", 0, dept="Legal", desc="Notary", rec="Terminate", source="fallback"),
+    ]
+
+    reference = ReferenceFeatures(references, OverlapIndex(references))
+    batch = reference.features(candidates)
+
+    for i, row in enumerate(candidates):
+        rows = references + [row]
+        expected = build_features(rows, overlaps=find_overlaps(rows))
+        for name in FEATURES + ("function", "prior", "keeps_prior"):
+            assert batch[name][i] == expected[name][-1], (i, name)
+        assert score(batch)[0][i] == score(expected)[0][-1]
+    assert batch["overlap_departments"].tolist()[:2] == [3, 2]
+    assert np.array_equal(batch["cluster_size"], [3, 3, 2, 2, 2])
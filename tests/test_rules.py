@@ -0,0 +1,97 @@
+"""Rule precedence and the function keyword taxonomy."""
+
+import numpy as np
+import pytest
+
+from vendor_rules import RULES, build_features, rule_hits, score, vendor_function
+
+
+def rule_named(name):
+    return next(i for i, rule in enumerate(RULES) if rule.name == name)
+
+
+def features(**columns):
+    """Feature arrays for hand-built vendors; unspecified features are zero."""
+    n = len(columns["prior"])
+    base = {name: np.zeros(n) for name in (
+        "cluster_size", "cluster_rank", "region_duplicates", "spend_percentile", "trend",
+        "months_since_billed", "overlap_departments", "overlap_rank")}
+    base.update({name: np.asarray(values) for name, values in columns.items()})
+    base["prior"] = np.asarray(columns["prior"], dtype=object)
+    base["keeps_prior"] = np.asarray(columns["keeps_prior"], dtype=bool)
+    return base
+
+
+def test_first_matching_rule_wins():
+    crowded_small = features(prior=["Optimize"] * 3, keeps_prior=[False] * 3,
+                             cluster_size=[5, 5, 5], cluster_rank=[0, 1, 4],
+                             spend_percentile=[0.9, 0.5, 0.1], trend=[0, 0, 0])
+
+    recs, rule_index = score(crowded_small)
+
+    assert recs.tolist() == ["Optimize", "Consolidate", "Terminate"]
+    assert rule_index.tolist() == [-1, rule_named("crowded-function"),
+                                   rule_named("small-in-crowded-function")]
+
+
+def test_prior_stands_except_for_overriding_rules():
+    kept = features(prior=["Consolidate", "Consolidate"], keeps_prior=[True, True],
+                    cluster_size=[5, 5], cluster_rank=[2, 2], spend_percentile=[0.1, 0.1],
+                    months_since_billed=[0, 6])
+
+    recs, rule_index = score(kept)
+    assert recs.tolist() == ["Consolidate", "Terminate"]
+    assert rule_index.tolist() == [-1, rule_named("stopped-billing")]
+
+    recs, _ = score(kept, use_prior=False)
+    assert recs.tolist() == ["Terminate", "Terminate"]
+
+
+def test_thresholds_rescore_without_rebuilding():
+    one = features(prior=["Optimize"], keeps_prior=[False], cluster_size=[3],
+                   cluster_rank=[1], spend_percentile=[0.25])
+
+    assert score(one)[0].tolist() == ["Consolidate"]
+    assert score(one, {"tail_percentile": 0.3})[0].tolist() == ["Terminate"]
+    assert rule_hits(score(one, {"crowded_cluster": 4})[1])["prior/default"] == 1
+
+
+def test_every_rule_changes_the_default():
+    assert all(rule.recommendation != "Optimize" for rule in RULES)
+
+
+@pytest.mark.parametrize("description, function", [
+    ("Online syntax checker", "SaaS"),
+    ("Taxi and airport transfers", "Travel"),
+    ("Tax advisory and filings", "Accounting & Tax"),
+    ("Fraud prevention platform", "SaaS"),
+    ("Automobile leasing", "SaaS"),
+    ("Mobile phone plans", "Telecom"),
+    ("HR platform", "Recruitment & HR"),
+    ("Corporate events and sponsorships", "Marketing & Events"),
+    ("Recruitment agency", "Recruitment & HR"),
+    ("IT consultancy", "Consulting"),
+    (None, "SaaS"),
+])
+def test_keywords_match_whole_words(description, function):
+    assert vendor_function(description, "SaaS") == function
+
+
+def test_keyword_groups_apply_in_order():
+    # "restaurant" comes first in the text, but Hotels & Venues is listed first
+    assert vendor_function("Restaurant and hotel bookings", "G&A") == "Hotels & Venues"
+    assert vendor_function("Health insurance broker", "G&A") == "Insurance"
+    assert vendor_function("", None) == "Unknown"
+
+
+def test_features_cluster_by_function(make_row):
+    rows = [make_row(2, "A", 500_00, desc="Coworking space", rec="Consolidate", source="rules"),
+            make_row(3, "B", 900_00, desc="Serviced office", rec="Consolidate", source="rules"),
+            make_row(4, "C", 100_00, desc="Law firm", dept="Legal", source="rules")]
+
+    built = build_features(rows)
+
+    assert built["function"].tolist() == ["Workspace", "Workspace", "Legal"]
+    assert built["cluster_size"].tolist() == [2, 2, 1]
+    assert built["cluster_rank"].tolist() == [1, 0, 0]
+    assert built["region_duplicates"].tolist() == [1, 1, 0]
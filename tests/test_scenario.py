@@ -0,0 +1,94 @@
+"""What-if scenarios: delta totals match a rebuild, and undo/redo restore them exactly."""
+
+import copy
+
+import pytest
+
+from vendor_planner import action_savings
+from vendor_scenario import Scenario
+
+
+@pytest.fixture
+def rows(make_row):
+    return [
+        make_row(2, "Wework", 64_000_00, dept="Facilities", rec="Consolidate",
+                 desc="Coworking office space"),
+        make_row(3, "Regus", 12_345_67, dept="Facilities", rec="Optimize",
+                 desc="Serviced office workspace", region="Croatia"),
+        make_row(4, "Lusha", 3_000_01, dept="Sales", rec="Consolidate",
+                 desc="B2B contact data and prospecting"),
+        make_row(5, "Salesforce", 300_000_00, dept="Sales", rec="Optimize",
+                 desc="CRM platform"),
+        make_row(6, "Old Caterer", 2_500_99, rec="Terminate", desc="Office catering"),
+    ]
+
+
+def state(scenario):
+    return copy.deepcopy({
+        "cube": scenario.cube.cells,
+        "counts": scenario.recommendation_counts,
+        "rec_cents": scenario.rec_cents,
+        "savings": scenario.savings_cents,
+        "dept_savings": scenario.dept_savings,
+        "opportunity_savings": scenario.opportunity_savings,
+        "top": scenario.top_opportunities(),
+        "recs": scenario.recs,
+    })
+
+
+def test_changes_match_a_rebuild(rows):
+    scenario = Scenario(rows)
+    scenario.set(5, "Consolidate")
+    scenario.set(2, "Terminate")
+    scenario.set(6, "Optimize")
+
+    rebuilt = Scenario(scenario.current_rows())
+    after = state(scenario)
+    assert after == state(rebuilt)
+    assert after["savings"] == sum(action_savings(row.cents, scenario.recs[row.row_idx])
+                                   for row in rows)
+    assert scenario.changes() == {5: ("Optimize", "Consolidate"), 2: ("Consolidate", "Terminate"),
+                                  6: ("Terminate", "Optimize")}
+
+
+def test_undo_and_redo_restore_totals_exactly(rows):
+    scenario = Scenario(rows)
+    baseline = state(scenario)
+    assert scenario.set(4, "Consolidate") is False
+    assert scenario.undo() is None
+
+    for row_idx, rec in ((5, "Terminate"), (3, "Consolidate"), (5, "Consolidate")):
+        scenario.set(row_idx, rec)
+    changed = state(scenario)
+    assert changed != baseline
+
+    assert [scenario.undo() for _ in range(3)] == [(5, "Terminate", "Consolidate"),
+                                                    (3, "Optimize", "Consolidate"),
+                                                    (5, "Optimize", "Terminate")]
+    assert scenario.undo() is None
+    assert state(scenario) == baseline
+    assert scenario.savings_cents == scenario.baseline_savings_cents
+    assert scenario.changes() == {}
+
+    assert scenario.redo() == (5, "Optimize", "Terminate")
+    scenario.redo(), scenario.redo()
+    assert scenario.redo() is None
+    assert state(scenario) == changed
+
+
+def test_a_new_change_clears_redo(rows):
+    scenario = Scenario(rows)
+    scenario.set(2, "Optimize")
+    scenario.undo()
+    scenario.set(3, "Terminate")
+
+    assert scenario.redo() is None
+    assert scenario.changes() == {3: ("Optimize", "Terminate")}
+
+
+def test_invalid_changes_are_rejected(rows):
+    scenario = Scenario(rows)
+    with pytest.raises(KeyError):
+        scenario.set(99, "Terminate")
+    with pytest.raises(ValueError):
+        scenario.set(2, "Renegotiate")
@@ -0,0 +1,42 @@
+"""HTTP request bodies: Content-Length, chunked, and the ones refused."""
+
+import asyncio
+
+import pytest
+
+from vendor_service import BodyError, _read_body
+
+
+def read(headers, data):
+    async def run():
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        reader.feed_eof()
+        return await _read_body(reader, headers)
+    return asyncio.run(run())
+
+
+def test_content_length_body():
+    assert read({"content-length": "4"}, b"abcdEXTRA") == b"abcd"
+    assert read({}, b"") == b""
+
+
+def test_chunked_body_is_decoded():
+    data = b"4;ext=1\r\n{\"a\"\r\n9\r\n: [1, 2]}\r\n0\r\nTrailer: x\r\n\r\nNEXT"
+
+    assert read({"transfer-encoding": "chunked"}, data) == b'{"a": [1, 2]}'
+
+
+@pytest.mark.parametrize("headers, data, status", [
+    ({"transfer-encoding": "gzip"}, b"", 501),
+    ({"transfer-encoding": "chunked", "content-length": "3"}, b"0\r\n\r\n", 400),
+    ({"transfer-encoding": "chunked"}, b"zz\r\n", 400),
+    ({"transfer-encoding": "chunked"}, b"3\r\nabcX\r\n0\r\n\r\n", 400),
+    ({"transfer-encoding": "chunked"}, b"8000000\r\n", 413),
+    ({"content-length": "-1"}, b"", 400),
+    ({"content-length": str(64 * 1024 * 1024)}, b"", 413),
+])
+def test_unreadable_bodies_are_refused(headers, data, status):
+    with pytest.raises(BodyError) as error:
+        read(headers, data)
+    assert error.value.status == status
@@ -0,0 +1,76 @@
+"""External sort and spilled rows under a tiny memory budget."""
+
+import io
+import random
+
+import pytest
+
+from vendor_diff import build_snapshot, diff_snapshots, diff_sorted_snapshots, sort_snapshot_rows
+from vendor_spill import ExternalSorter, MemoryBudget, SpooledRows, parse_memory
+
+TINY = MemoryBudget(4096, share=1.0)
+
+
+def test_external_sort_is_a_stable_sort():
+    rng = random.Random(7)
+    items = [(rng.randrange(50), i) for i in range(5_000)]
+    sorter = ExternalSorter(key=lambda item: item[0], budget=TINY)
+    sorter.extend(items)
+
+    assert sorter.runs > 1
+    assert len(sorter) == len(items)
+    expected = sorted(items, key=lambda item: item[0])
+    assert list(sorter) == expected
+    # Iterating again merges the same runs
+    assert list(sorter) == expected
+    sorter.close()
+
+
+def test_external_sort_without_spilling():
+    sorter = ExternalSorter(key=lambda item: item, budget=MemoryBudget(1 << 30))
+    sorter.extend([3, 1, 2])
+    assert sorter.runs == 0
+    assert list(sorter) == [1, 2, 3]
+
+
+def test_spooled_rows_keep_order_through_artifacts():
+    rows = SpooledRows(TINY)
+    rows.extend((i, f"Vendor {i}") for i in range(3_000))
+    assert len(rows) == 3_000
+    assert rows[-1] == (2_999, "Vendor 2999")
+
+    f = io.BytesIO()
+    rows.write_artifact(f)
+    f.seek(0)
+    restored = SpooledRows.read_artifact(f, TINY)
+    assert list(restored) == [(i, f"Vendor {i}") for i in range(3_000)]
+
+
+def test_sort_merge_diff_matches_hash_join():
+    rng = random.Random(11)
+    depts, recs = ("G&A", "Sales", "Legal"), ("Terminate", "Consolidate", "Optimize")
+
+    def rows(count):
+        for _ in range(count):
+            n = rng.randrange(1_500)
+            yield (f"vendor {n}", f"Vendor {n}", rng.choice(depts), rng.choice(recs),
+                   rng.randrange(10_000_000))
+
+    previous, current = list(rows(2_000)), list(rows(2_000))
+    expected = diff_snapshots(build_snapshot(previous), build_snapshot(current))
+
+    merged = diff_sorted_snapshots(sort_snapshot_rows(previous, TINY),
+                                   sort_snapshot_rows(current, TINY), TINY)
+    assert merged.runs > 1
+    assert list(merged) == expected
+
+
+@pytest.mark.parametrize("text, size", [("512M", 512 << 20), ("2g", 2 << 30),
+                                        ("1.5K", 1536), ("1500000", 1_500_000)])
+def test_parse_memory(text, size):
+    assert parse_memory(text) == size
+
+
+def test_parse_memory_rejects_garbage():
+    with pytest.raises(ValueError):
+        parse_memory("lots")
@@ -0,0 +1,45 @@
+"""Ledger reading: header check, date and amount parsing, errors naming the line."""
+
+import numpy as np
+import pytest
+
+from vendor_timeseries import read_ledger
+
+
+def ledger(tmp_path, text):
+    path = tmp_path / "ledger.csv"
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def test_dates_and_amounts_in_common_formats(tmp_path):
+    path = ledger(tmp_path, "vendor, date ,amount\n"
+                            "Lusha,2025-01-31,100\n"
+                            "lusha,03/15/2025,\"$1,000.50\"\n"
+                            "Wework,15.02.2025,(20.00)\n"
+                            "Wework,Mar 2025,$ 50\n"
+                            ",2025-03-01,5\n")
+
+    keys, months, matrix = read_ledger(path)
+
+    assert keys == ["lusha", "wework"]
+    assert months.tolist() == np.arange("2025-01", "2025-04", dtype="datetime64[M]").tolist()
+    assert matrix.tolist() == [[100_00, 0, 1_000_50], [0, -20_00, 50_00]]
+
+
+def test_missing_columns_name_the_file(tmp_path):
+    path = ledger(tmp_path, "vendor,when,cost\nLusha,2025-01-31,100\n")
+
+    with pytest.raises(ValueError, match=r"ledger\.csv: ledger has no date, amount column"):
+        read_ledger(path)
+
+
+@pytest.mark.parametrize("row, message", [
+    ("Lusha,31st Jan,100", r"line 3: unreadable date '31st Jan'"),
+    ("Lusha,2025-01-31,n/a", r"line 3: unreadable amount 'n/a'"),
+])
+def test_bad_values_name_the_line(tmp_path, row, message):
+    path = ledger(tmp_path, f"vendor,date,amount\nWework,2025-01-31,10\n{row}\n")
+
+    with pytest.raises(ValueError, match=message):
+        read_ledger(path)
@@ -0,0 +1,59 @@
+"""Top 3 opportunity totals: the total row is found by its label."""
+
+import openpyxl
+
+from vendor_validation import OPPORTUNITIES_SHEET, TOTAL_LABEL, check_opportunity_totals
+
+
+def opportunities_sheet(amounts, total):
+    """Top 3 sheet laid out like summary_tab_cells(): rows from 2, a gap, then the total."""
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = OPPORTUNITIES_SHEET
+    ws.append([None, "Opportunity", "Explanation", None])
+    for index in range(3):
+        ws.cell(row=index + 2, column=1, value=f"Opportunity {index + 1}")
+    for row, amount in enumerate(amounts, start=2):
+        ws.cell(row=row, column=2, value=f"Opportunity {row - 1} title")
+        ws.cell(row=row, column=4, value=amount)
+    total_row = len(amounts) + 3
+    ws.cell(row=total_row, column=2, value=TOTAL_LABEL)
+    ws.cell(row=total_row, column=4, value=total)
+    return ws
+
+
+def test_three_opportunities_sum_to_the_total():
+    totals, issues = check_opportunity_totals(
+        opportunities_sheet(["$322,652", "$140,302", "$139,326"], "$602,280"))
+
+    assert issues == []
+    assert totals == {"opportunities": [322652.0, 140302.0, 139326.0],
+                      "stated_total": 602280.0, "computed_total": 602280.0}
+
+
+def test_fewer_than_three_opportunities_validate():
+    ws = opportunities_sheet(["$50,000", "$25,000"], "$75,000")
+
+    totals, issues = check_opportunity_totals(ws)
+
+    assert issues == []
+    assert totals["opportunities"] == [50000.0, 25000.0]
+    assert check_opportunity_totals(opportunities_sheet(["$10,000"], "$10,000"))[1] == []
+
+
+def test_mismatch_is_reported_on_the_total_row():
+    _, issues = check_opportunity_totals(opportunities_sheet(["$50,000", "$25,000"], "$80,000"))
+
+    assert [(i["row"], i["column"]) for i in issues] == [(5, "D")]
+    assert "$80,000" in issues[0]["message"] and "$75,000" in issues[0]["message"]
+
+
+def test_missing_amount_and_missing_total_row():
+    ws = opportunities_sheet(["$50,000", None], "$50,000")
+    _, issues = check_opportunity_totals(ws)
+    assert [(i["row"], i["vendor"]) for i in issues] == [(3, "Opportunity 2 title")]
+
+    ws.delete_rows(5)
+    totals, issues = check_opportunity_totals(ws)
+    assert totals["stated_total"] is None
+    assert [i["message"] for i in issues] == ["Total estimated annual savings row is missing"]
@@ -12,8 +12,59 @@ Author: Automated analysis via Claude Code
 
 import openpyxl
 from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
+from openpyxl.utils import get_column_letter
 from copy import copy
+from collections import OrderedDict
+from functools import lru_cache
 import os
+import sys
+import threading
+
+import vendor_concentration
+import vendor_consolidation
+import vendor_cube
+import vendor_fx
+import vendor_hierarchy
+import vendor_money
+import vendor_overlap
+import vendor_planner
+import vendor_regions
+import vendor_reports
+import vendor_rules
+import vendor_timeseries
+from vendor_checkpoint import DEFAULT_CHECKPOINT_FILE, ClassificationCheckpoint
+from vendor_concentration import concentration_tables
+from vendor_consolidation import assign_targets
+from vendor_cube import pivot_tables
+from vendor_diff import (changes_tables, diff_snapshots, diff_sorted_snapshots,
+                         snapshot_from_history, snapshot_from_workbook, sort_snapshot_rows,
+                         workbook_snapshot_rows, write_changes_report)
+from vendor_export import (
+    DEFAULT_EXPORT_FORMATS, EXPORT_FORMATS, VENDOR_COLUMNS, FanOutWriter, open_sinks,
+    parse_export_formats, vendor_record, write_aggregates,
+)
+from vendor_fx import CONVERTED_COST_HEADER, MissingRateError
+from vendor_hierarchy import DEFAULT_PARENTS_FILE, load_hierarchy, roll_up
+from vendor_history import HistoryStore
+from vendor_money import format_cents, from_cents
+from vendor_overlap import OverlapIndex, find_overlaps
+from vendor_pipeline import (
+    SpendAggregate, VendorRow, aggregate_rows, classify_rows, convert_currency_rows,
+    make_classify_stage, normalize_rows, recommend_rows, stream_vendor_rows,
+)
+from vendor_planner import DEFAULT_MAX_ACTIONS, DEFAULT_MAX_DEPT_RISK, plan_actions
+from vendor_regions import tag_region_rows
+from vendor_reports import find_opportunities, render_documents, render_opportunities
+from vendor_rules import ReferenceFeatures, keeps_prior, score
+from vendor_runcache import DEFAULT_CACHE_DIR, RunCache, run_key
+from vendor_spill import MemoryBudget
+from vendor_stages import DEFAULT_STAGE_CACHE_DIR, FileContent, Stage, StageRunner
+from vendor_timeseries import LedgerError, build_trends, trend_tables
+from vendor_validation import (
+    TOTAL_LABEL, load_valid_departments, validate_workbook, write_validation_report,
+    print_validation_summary,
+)
+from vendor_writer import ADDED_COLUMN_WIDTH, StreamingWorkbookWriter, add_table_sheet
 
 # =============================================================================
 # VENDOR CATEGORIZATION DATABASE
@@ -2174,274 +2225,728 @@ def classify_vendor_fallback(name):
     return ("G&A", f"Business services provider", "Optimize")
 
 
-# =============================================================================
-# MAIN PROCESSING
-# =============================================================================
-
-def main():
-    input_file = "A - TEMPLATE - RWA - Vendor Spend Strategy (NAME) (1).xlsx"
-    output_file = "Vendor_Analysis_Assessment_Completed.xlsx"
+@lru_cache(maxsize=65536)
+def lookup_vendor(vendor_name):
+    """Look up a single vendor name, returning (Department, Description, Recommendation, source).
+
+    Source is "db" for explicit VENDOR_DB entries and "fallback" for keyword
+    heuristics; the recommendation is the static one, the prior for the
+    vendor_rules table. Results are memoized so repeated names only pay for
+    the lookup once.
+    """
+    vendor_name_clean = vendor_name.strip()
+
+    # Look up in database
+    if vendor_name_clean in VENDOR_DB:
+        dept, desc, rec = VENDOR_DB[vendor_name_clean]
+        return dept, desc, rec, "db"
+
+    dept, desc, rec = classify_vendor_fallback(vendor_name_clean)
+    # Make description more specific using vendor name
+    if "Business services provider" in desc:
+        desc = f"Business and operational services provider ({vendor_name_clean})"
+    return dept, desc, rec, "fallback"
+
+
+@lru_cache(maxsize=1)
+def _reference_rows():
+    """VENDOR_DB vendors as classified, region-tagged rows (spend unknown): the
+    peers a single vendor name is scored against."""
+    return tuple(tag_region_rows([VendorRow(i, name, 0, 0, None, *lookup_vendor(name))
+                                  for i, name in enumerate(VENDOR_DB)]))
+
+
+@lru_cache(maxsize=1)
+def reference_features():
+    """vendor_rules.ReferenceFeatures of the VENDOR_DB vendors: their function,
+    region and spend counts and overlap signatures, built once per process."""
+    rows = _reference_rows()
+    return ReferenceFeatures(rows, OverlapIndex(rows))
+
+
+CLASSIFY_CACHE_SIZE = 65536
+_classified = OrderedDict()
+_classify_counts = {"hits": 0, "misses": 0}
+_classify_lock = threading.Lock()
+
+
+def classify_vendors(vendor_names):
+    """Classify a batch of vendor names, returning one classification tuple
+    (Department, Description, Recommendation, source) per name.
+
+    The recommendation comes from the vendor_rules table, as in the workbook.
+    Peer features need other vendors, so each name without a standing prior
+    (see vendor_rules.keeps_prior) is scored as one more vendor among the
+    VENDOR_DB vendors (reference_features()); all such names in a batch are
+    scored in one score() call. Spend is unknown here, so the spend rules can
+    disagree with a workbook run. The last CLASSIFY_CACHE_SIZE names are
+    memoized for long-running callers such as the daemon and the service.
+    """
+    names = list(vendor_names)
+    results = {}
+    with _classify_lock:
+        for name in names:
+            if name not in results and name in _classified:
+                _classified.move_to_end(name)
+                results[name] = _classified[name]
+                _classify_counts["hits"] += 1
+    misses = [name for name in dict.fromkeys(names) if name not in results]
+    if not misses:
+        return [results[name] for name in names]
+
+    rows = tag_region_rows([VendorRow(len(VENDOR_DB), name.strip(), 0, 0, None,
+                                      *lookup_vendor(name)) for name in misses])
+    # Without monthly spend no rule overrides a standing prior
+    scored = [i for i, row in enumerate(rows) if not keeps_prior(row)]
+    recs = [row.rec for row in rows]
+    if scored:
+        scores, _ = score(reference_features().features([rows[i] for i in scored]))
+        for i, rec in zip(scored, scores.tolist()):
+            recs[i] = rec
+    with _classify_lock:
+        for name, row, rec in zip(misses, rows, recs):
+            results[name] = _classified[name] = (row.dept, row.desc, rec, row.source)
+            _classify_counts["misses"] += 1
+        while len(_classified) > CLASSIFY_CACHE_SIZE:
+            _classified.popitem(last=False)
+    return [results[name] for name in names]
+
+
+def classify_vendor(vendor_name):
+    """Classify a single vendor name (see classify_vendors())."""
+    return classify_vendors([vendor_name])[0]
+
+
+def classify_cache_info():
+    """{"hits", "misses", "size"} of the classify_vendors() memo."""
+    with _classify_lock:
+        return {**_classify_counts, "size": len(_classified)}
 
-    print("Loading workbook...")
-    wb = openpyxl.load_workbook(input_file)
-
-    # =========================================================================
-    # PART 1: Populate Vendor Analysis Assessment
-    # =========================================================================
-    print("Processing Part 1: Vendor Analysis...")
-    ws = wb['Vendor Analysis Assessment']
 
-    classified = 0
-    fallback_used = 0
-    total_spend = 0
-    dept_spend = {}
-    recommendation_counts = {"Terminate": 0, "Consolidate": 0, "Optimize": 0}
-    terminate_savings = 0
-    consolidate_savings = 0
-
-    for row_idx in range(2, ws.max_row + 1):
-        vendor_name = ws.cell(row=row_idx, column=1).value
-        cost = ws.cell(row=row_idx, column=3).value
+# =============================================================================
+# SUMMARY TABS
+# =============================================================================
 
-        if not vendor_name:
-            continue
+def summary_tab_cells(rendered):
+    """Return the contents of the Top 3, Methodology and Memo tabs from rendered reports.
 
-        vendor_name_clean = vendor_name.strip()
-        cost_val = cost if cost else 0
-        total_spend += cost_val
+    rendered is a render_reports() result (or the merged opportunities and
+    report stage outputs). Returns (cells, styles, rendered):
+    {sheet: {(row, col): value}}, {sheet: {(row, col): {attribute: style}}}
+    for cells whose template style is replaced (e.g. bold totals, wrapped memo
+    text), and rendered itself.
+    """
 
-        # Look up in database
-        if vendor_name_clean in VENDOR_DB:
-            dept, desc, rec = VENDOR_DB[vendor_name_clean]
-        else:
-            dept, desc, rec = classify_vendor_fallback(vendor_name_clean)
-            fallback_used += 1
-            # Make description more specific using vendor name
-            if "Business services provider" in desc:
-                desc = f"Business and operational services provider ({vendor_name_clean})"
-
-        # Write to cells
-        ws.cell(row=row_idx, column=2).value = dept
-        ws.cell(row=row_idx, column=4).value = desc
-        ws.cell(row=row_idx, column=5).value = rec
-
-        # Track stats
-        classified += 1
-        dept_spend[dept] = dept_spend.get(dept, 0) + cost_val
-        recommendation_counts[rec] = recommendation_counts.get(rec, 0) + 1
-        if rec == "Terminate":
-            terminate_savings += cost_val
-        elif rec == "Consolidate":
-            consolidate_savings += cost_val
-
-    print(f"  Classified {classified} vendors ({fallback_used} via fallback heuristics)")
-    print(f"  Total spend: ${total_spend:,.2f}")
-    print(f"  Recommendations: {recommendation_counts}")
-    print(f"  Department breakdown:")
-    for dept, spend in sorted(dept_spend.items(), key=lambda x: -x[1]):
-        print(f"    {dept}: ${spend:,.2f}")
-
-    # =========================================================================
     # PART 2: Top 3 Opportunities
-    # =========================================================================
-    print("\nProcessing Part 2: Top 3 Opportunities...")
-    ws2 = wb['Top 3 Opportunities']
-
-    # Opportunity 1: Salesforce License Optimization & CRM Consolidation
-    ws2.cell(row=2, column=2).value = "CRM Platform Consolidation & Salesforce License Optimization"
-    ws2.cell(row=2, column=3).value = (
-        "Salesforce represents $3.12M/year (39.5% of total vendor spend), making it the single largest cost driver. "
-        "Enterprise Salesforce deployments typically carry 20-30% unused or underutilized licenses. "
-        "Additionally, $70K+ is spent on overlapping sales/marketing tools (HubSpot, Cognism, Lusha, "
-        "Outreach, 6Sense, Yoxel) that duplicate CRM functionality. "
-        "ACTION: Conduct a full Salesforce license utilization audit, eliminate inactive seats, "
-        "downgrade license tiers where premium features are unused, consolidate overlapping sales tools "
-        "onto the Salesforce platform, and renegotiate the enterprise agreement leveraging reduced volume. "
-        "RISK: License reductions must be validated against actual usage data to avoid disrupting active users; "
-        "sales tool consolidation requires change management with revenue teams."
-    )
-    ws2.cell(row=2, column=4).value = "$850,000"
-
-    # Opportunity 2: Global Office Space & Facilities Rationalization
-    ws2.cell(row=3, column=2).value = "Global Office Space & Facilities Rationalization"
-    ws2.cell(row=3, column=3).value = (
-        "The company maintains 8+ coworking/office providers across UK, Croatia, India, Singapore, and US "
-        "(TOG $264K, Zagrebtower $184K, Innovent $147K, Weking $144K, GPT Space $134K, WeWork $64K, "
-        "Work Easy $15K, Common Desk $4K) totaling $956K+. An additional $280K+ is spent on facilities "
-        "services (catering, cleaning, supplies, parking, utilities) tied to these offices. "
-        "Post-acquisition integration into a remote-first model with 2-3 strategic hub offices "
-        "can eliminate 50-60% of this spend. "
-        "ACTION: Audit headcount per location, identify offices with <15 employees, negotiate exit from "
-        "non-essential leases, consolidate remaining locations to preferred providers with volume terms, "
-        "and centralize facilities management to reduce per-location overhead. "
-        "RISK: Lease exit timelines vary by contract; some locations may have >6 month notice periods. "
-        "Employee sentiment must be managed through clear communication about remote-first policy."
-    )
-    ws2.cell(row=3, column=4).value = "$550,000"
-
-    # Opportunity 3: Professional Services & Advisory Firm Consolidation
-    ws2.cell(row=4, column=2).value = "Professional Services & Accounting Firm Consolidation"
-    ws2.cell(row=4, column=3).value = (
-        "The company engages 6+ accounting/audit firms (BDO $343K, RSM $117K, Grant Thornton $47K, "
-        "PwC $5K, Collards $13K, Crowe $4K = $529K total), 5+ recruitment agencies ($167K total), "
-        "and numerous consulting/advisory firms ($240K+). This fragmentation drives higher costs through "
-        "lack of volume leverage and duplicated onboarding/relationship management overhead. "
-        "ACTION: Select one primary global accounting partner (recommend retaining BDO given existing "
-        "relationship depth) and transition all audit, tax, and compliance work to them for volume pricing. "
-        "Consolidate recruitment to a preferred panel of 2 agencies maximum. "
-        "Terminate low-value consulting engagements and individual contractor relationships "
-        "that lack clear ROI documentation. "
-        "RISK: Transitioning audit relationships requires careful timing around fiscal year-end; "
-        "some jurisdictions may require local accounting firm relationships for statutory compliance."
-    )
-    ws2.cell(row=4, column=4).value = "$430,000"
+    opportunities = {}
+    for row, opp in enumerate(rendered["opportunities"], start=2):
+        opportunities[(row, 2)] = opp["title"]
+        opportunities[(row, 3)] = opp["explanation"]
+        opportunities[(row, 4)] = opp["savings_usd"]
 
     # Add total row
-    ws2.cell(row=6, column=2).value = "TOTAL ESTIMATED ANNUAL SAVINGS"
-    ws2.cell(row=6, column=2).font = Font(bold=True)
-    ws2.cell(row=6, column=4).value = "$1,830,000"
-    ws2.cell(row=6, column=4).font = Font(bold=True)
-
-    # =========================================================================
-    # PART 3: Methodology
-    # =========================================================================
-    print("Processing Part 3: Methodology...")
-    ws3 = wb['Methodology']
-
-    methodology_text = """METHODOLOGY & APPROACH
+    total_row = len(rendered["opportunities"]) + 3
+    opportunities[(total_row, 2)] = TOTAL_LABEL
+    opportunities[(total_row, 4)] = rendered["total_savings_usd"]
+    bold = {"font": Font(bold=True)}
+    opportunity_styles = {(total_row, 2): bold, (total_row, 4): bold}
+
+    # PART 3: Methodology, PART 4: Executive Memo (CEO/CFO Recommendations)
+    wrap_top = {"alignment": Alignment(wrap_text=True, vertical='top')}
+    cells = {
+        'Top 3 Opportunities': opportunities,
+        'Methodology': {(2, 1): rendered["methodology"]},
+        'CEOCFO Recommendations': {(2, 1): rendered["memo"]},
+    }
+    styles = {
+        'Top 3 Opportunities': opportunity_styles,
+        'Methodology': {(2, 1): wrap_top},
+        'CEOCFO Recommendations': {(2, 1): wrap_top},
+    }
+    return cells, styles, rendered
+
+
+def apply_summary_cells(wb, cells, styles):
+    """Write summary tab contents from summary_tab_cells() into a loaded workbook."""
+    for title, sheet_cells in cells.items():
+        ws = wb[title]
+        for (row, col), value in sheet_cells.items():
+            ws.cell(row=row, column=col).value = value
+    for title, sheet_styles in styles.items():
+        ws = wb[title]
+        for (row, col), overrides in sheet_styles.items():
+            for attr, style in overrides.items():
+                setattr(ws.cell(row=row, column=col), attr, style)
 
-1. TOOL USED: Claude Code CLI (Model: claude-opus-4-6)
-All analysis was performed exclusively using Claude Code CLI as required. The tool was used to:
-- Read and parse the Excel vendor data programmatically using Python (openpyxl)
-- Classify all 386 vendors into departments, generate descriptions, and assign recommendations
-- Generate the completed workbook with all tabs populated
-- Produce the executive memo and supporting documentation
 
-2. APPROACH:
-Step 1 - Data Extraction & Exploration:
-Used Claude Code to read the Excel template, extract all vendor names and spend data, and analyze spend distribution patterns. Identified that total spend is $7.89M across 386 vendors, with Salesforce alone at $3.12M (39.5%).
-
-Step 2 - Vendor Research & Classification:
-For each vendor, Claude Code was used to:
-(a) Identify the vendor's business based on company name, known industry databases, and contextual clues (e.g., ".D.O.O." indicating Croatian LLC entities)
-(b) Assign to one of 12 departments from the Config tab (Engineering, Facilities, G&A, Legal, M&A, Marketing, SaaS, Product, Professional Services, Sales, Support, Finance)
-(c) Write a specific one-line description of what the vendor provides
-(d) Recommend Terminate, Consolidate, or Optimize based on strategic value, overlap analysis, and spend materiality
-
-Step 3 - Strategic Analysis:
-Grouped vendors by function to identify consolidation opportunities (e.g., 8+ office space providers, 6+ accounting firms, overlapping CRM/sales tools). Calculated category-level spend to identify highest-impact savings.
-
-Step 4 - Financial Modeling:
-Applied industry benchmarks for savings estimates:
-- Salesforce license optimization: 25-30% reduction on unused licenses (industry benchmark)
-- Office space consolidation: 50-60% reduction through remote-first strategy
-- Professional services consolidation: 30-40% savings through volume negotiation
-
-3. PROMPTS CREATED:
-- "Analyze vendor spend data from Excel file and categorize each vendor by department, description, and strategic recommendation"
-- "Identify the top 3 highest-impact cost reduction opportunities with financial justification"
-- "Generate a Python script to populate the Excel template with all analysis results"
-- Iterative refinement prompts to validate classifications against known vendor databases
-
-4. QUALITY CHECKS PERFORMED:
-(a) Completeness Check: Verified all 386 vendors received department, description, and recommendation values - no blank cells remain in columns B, D, E.
-(b) Department Validation: Cross-referenced all department assignments against the 12 valid departments in the Config tab to ensure no invalid categories.
-(c) Description Specificity: Reviewed descriptions to ensure none are generic (e.g., "business services provider") - each describes the specific function the vendor performs.
-(d) Recommendation Logic: Validated that:
-   - "Terminate" was only applied to clearly non-essential vendors (entertainment, luxury dining, low-value subscriptions)
-   - "Consolidate" was applied where multiple vendors serve the same function (e.g., multiple coworking providers, multiple accounting firms)
-   - "Optimize" was applied to essential vendors with cost reduction potential
-(e) Financial Validation: Verified that Top 3 opportunity savings estimates sum correctly and are based on realistic industry benchmarks (not exceeding 30% of addressable spend per category).
-(f) Spend Coverage: Confirmed that savings targets address the highest-spend categories first (Salesforce at 39.5%, Facilities at 12%, Professional Services at 9%).
-(g) Cross-Referencing: Spot-checked 50+ vendor classifications against public business information to verify accuracy of department and description assignments."""
+# =============================================================================
+# MAIN PROCESSING
+# =============================================================================
 
-    ws3.cell(row=2, column=1).value = methodology_text
-    ws3.cell(row=2, column=1).alignment = Alignment(wrap_text=True, vertical='top')
+DEFAULT_INPUT_FILE = "A - TEMPLATE - RWA - Vendor Spend Strategy (NAME) (1).xlsx"
+DEFAULT_OUTPUT_FILE = "Vendor_Analysis_Assessment_Completed.xlsx"
+
+# "Last 12 months Cost (USD)" on the assessment sheet
+COST_COLUMN = 3
+# Added after the template's columns A-E on the assessment sheet
+CONSOLIDATE_INTO_COLUMN = 6
+PARENT_COLUMN = 7
+ADDED_ASSESSMENT_COLUMNS = {CONSOLIDATE_INTO_COLUMN: "Consolidate Into", PARENT_COLUMN: "Parent"}
+# Added when an FX rate file converted the costs; column C keeps the original
+CONVERTED_COST_COLUMN = 8
+
+
+# Files a run produces that the run cache stores and restores
+CACHED_ARTIFACTS = (
+    ("output_file", "validation_file", "cube_file", "changes_file")
+    + tuple(f"{table}_{fmt}_file" for table in ("vendors", "aggregates") for fmt in EXPORT_FORMATS)
+)
+
+
+def output_paths(output_file, export_formats=DEFAULT_EXPORT_FORMATS):
+    """Paths of the side files written next to the output workbook."""
+    output_dir = os.path.dirname(output_file)
+    paths = {
+        "validation_file": os.path.join(output_dir, "Vendor_Analysis_Validation.json"),
+        "cube_file": os.path.join(output_dir, "Vendor_Analysis_Cube.sqlite"),
+        "history_file": os.path.join(output_dir, "Vendor_Analysis_History.sqlite"),
+        "changes_file": os.path.join(output_dir, "Vendor_Analysis_Changes.json"),
+    }
+    for fmt in export_formats:
+        paths[f"vendors_{fmt}_file"] = os.path.join(output_dir, f"Vendor_Analysis_Vendors.{fmt}")
+        paths[f"aggregates_{fmt}_file"] = os.path.join(output_dir,
+                                                       f"Vendor_Analysis_Aggregates.{fmt}")
+    return paths
+
+
+def write_outputs(rows, agg, opportunities, documents, trends, overlaps, plan, consolidation,
+                  parents, input_file, output_file,
+                  streaming_output=False, compare_to=None, budget=None,
+                  export_formats=DEFAULT_EXPORT_FORMATS, converted=False, log=None):
+    """Write stage: fill the workbook from the stage results and write every side file.
+
+    With converted (an FX rate file was applied), a converted cost column
+    after the added columns holds each row's USD amount, matching the totals,
+    history and exports; the cost column keeps the original amount.
+
+    Under a memory budget the run-to-run diff spills its snapshots to sorted
+    run files and merge-joins them instead of building in-memory hash tables.
+    Progress is printed to log (default: stdout).
+    """
+    log = log if log is not None else sys.stdout
+    paths = output_paths(output_file, export_formats)
+    vendor_exports = {fmt: paths[f"vendors_{fmt}_file"] for fmt in export_formats}
+    aggregate_exports = {fmt: paths[f"aggregates_{fmt}_file"] for fmt in export_formats}
+    validation_file = paths["validation_file"]
+    cube_file = paths["cube_file"]
+    history_file = paths["history_file"]
+    changes_file = paths["changes_file"]
+    assessment_columns = dict(ADDED_ASSESSMENT_COLUMNS)
+    if converted:
+        assessment_columns[CONVERTED_COST_COLUMN] = CONVERTED_COST_HEADER
+
+    if streaming_output:
+        # Write-only output: the template is re-emitted row by row with styles
+        # cached as NamedStyles, so memory stays proportional to one row
+        print("Opening template for streaming output...", file=log)
+        writer = StreamingWorkbookWriter(input_file, assessment_columns,
+                                         {CONVERTED_COST_COLUMN: COST_COLUMN})
+        write_row = writer.write_assessment_row
+    else:
+        print("Loading workbook...", file=log)
+        wb = openpyxl.load_workbook(input_file)
+        ws = wb['Vendor Analysis Assessment']
+        for col, title in assessment_columns.items():
+            header = ws.cell(row=1, column=col)
+            header.value = title
+            header._style = copy(ws.cell(row=1, column=5)._style)
+            ws.column_dimensions[get_column_letter(col)].width = ADDED_COLUMN_WIDTH
+
+        def write_row(row, extra):
+            ws.cell(row=row.row_idx, column=2).value = row.dept
+            ws.cell(row=row.row_idx, column=4).value = row.desc
+            ws.cell(row=row.row_idx, column=5).value = row.rec
+            for col, value in extra.items():
+                ws.cell(row=row.row_idx, column=col).value = value
+            if CONVERTED_COST_COLUMN in extra:
+                ws.cell(row=row.row_idx, column=CONVERTED_COST_COLUMN).number_format = \
+                    ws.cell(row=row.row_idx, column=COST_COLUMN).number_format
 
     # =========================================================================
-    # PART 4: Executive Memo (CEO/CFO Recommendations)
+    # PART 1: Populate Vendor Analysis Assessment
     # =========================================================================
-    print("Processing Part 4: Executive Memo...")
-    ws4 = wb['CEOCFO Recommendations']
-
-    memo_text = """MEMORANDUM
-
-TO: CEO & CFO
-FROM: VP of Operations
-RE: Vendor Spend Optimization — Findings & Recommendations
-DATE: February 2026
-
-EXECUTIVE SUMMARY
-
-A comprehensive review of 386 vendor relationships totaling $7.89M in annual spend has identified $1.83M in actionable savings (23.2% reduction). Three initiatives drive the majority of impact and can be executed within 90 days of approval.
-
-CURRENT STATE
-
-Total annual vendor spend: $7,887,360
-Number of active vendors: 386
-Top vendor (Salesforce): $3,117,226 — 39.5% of total spend
-Key issue: Significant vendor fragmentation — 8+ office space providers, 6+ accounting firms, and overlapping SaaS tools across regions with no centralized procurement governance.
-
-TOP 3 RECOMMENDATIONS
-
-1. SALESFORCE LICENSE OPTIMIZATION — Est. Savings: $850K/year
-Salesforce is our largest vendor at $3.12M/year. Preliminary analysis indicates substantial over-licensing typical of post-acquisition portfolios. Combined with $70K in redundant sales tools (HubSpot, Cognism, Lusha, 6Sense), we recommend an immediate license utilization audit and contract renegotiation.
-Next step: Engage Salesforce account team for usage analytics; target 25% seat reduction.
-
-2. OFFICE SPACE RATIONALIZATION — Est. Savings: $550K/year
-We maintain 8+ coworking arrangements globally ($956K+) plus $280K in associated facilities costs. For a remote-first organization, this is excessive. We recommend consolidating to 3 strategic hubs (Zagreb, London, Chennai) and exiting all other arrangements.
-Next step: Map headcount per location; issue termination notices for sub-15-person offices.
-
-3. PROFESSIONAL SERVICES CONSOLIDATION — Est. Savings: $430K/year
-Six separate accounting firms ($529K), five recruitment agencies ($167K), and numerous consultants operate without volume leverage. Consolidating to one global accounting partner and two recruitment agencies will reduce cost and management overhead.
-Next step: Issue RFP to BDO for consolidated global engagement; reduce agency panel.
-
-TOTAL PROJECTED ANNUAL SAVINGS: $1,830,000
-
-IMPLEMENTATION TIMELINE
-
-Weeks 1-2: Launch Salesforce license audit; begin office headcount mapping
-Weeks 3-4: Issue accounting RFP; begin recruitment panel review
-Weeks 5-8: Execute Salesforce renegotiation; issue non-essential lease terminations
-Weeks 9-12: Complete professional services transition; validate realized savings
-
-ADDITIONAL FINDINGS
-
-- 47 vendors recommended for termination (mostly non-essential: entertainment venues, luxury dining, low-value subscriptions) representing ~$125K in spend
-- 89 vendors recommended for consolidation across overlapping categories
-- Travel spend ($416K across two Navan entities) should be reviewed for policy compliance
-- 10+ individual contractor relationships lack clear scope documentation
-
-I recommend we schedule a 30-minute review to align on priorities and authorize the Salesforce audit as the highest-ROI immediate action.
-
-— VP of Operations"""
-
-    ws4.cell(row=2, column=1).value = memo_text
-    ws4.cell(row=2, column=1).alignment = Alignment(wrap_text=True, vertical='top')
-
+    print("Processing Part 1: Vendor Analysis...", file=log)
+
+    # One pass over the classified rows fans out to the sheet, the run
+    # history and the flat-file exports
+    history = HistoryStore(history_file)
+    run = history.begin_run(input_file, output_file)
+    currency_rows = {}
+    try:
+        try:
+            with FanOutWriter(open_sinks(vendor_exports, VENDOR_COLUMNS)) as exports:
+                for row in rows:
+                    target, parent = consolidation.target(row), parents.parent_of(row)
+                    extra = {CONSOLIDATE_INTO_COLUMN: target, PARENT_COLUMN: parent}
+                    if converted:
+                        extra[CONVERTED_COST_COLUMN] = from_cents(row.cents)
+                    write_row(row, extra)
+                    run.add(row)
+                    exports.write(vendor_record(row, target, parent))
+                    if row.currency:
+                        currency_rows[row.currency] = currency_rows.get(row.currency, 0) + 1
+            run_id = run.commit()
+            run_digest = run.digest
+        except BaseException:
+            run.rollback()
+            raise
+        previous_run = history.previous_run_id(run_id)
+        if budget is not None:
+            current_snapshot = sort_snapshot_rows(history.run_rows(run_id), budget)
+        else:
+            current_snapshot = snapshot_from_history(history, run_id)
+        if compare_to:
+            baseline = compare_to
+            if budget is not None:
+                previous_snapshot = sort_snapshot_rows(workbook_snapshot_rows(compare_to), budget)
+            else:
+                previous_snapshot = snapshot_from_workbook(compare_to)
+        elif previous_run is not None:
+            baseline = f"run {previous_run}"
+            if budget is not None:
+                previous_snapshot = sort_snapshot_rows(history.run_rows(previous_run), budget)
+            else:
+                previous_snapshot = snapshot_from_history(history, previous_run)
+        else:
+            baseline = previous_snapshot = None
+    finally:
+        history.close()
+
+    classified = agg.classified
+    fallback_used = agg.fallback_used
+    total_spend = agg.total_spend
+    dept_spend = agg.dept_spend
+    recommendation_counts = agg.recommendation_counts
+    terminate_savings = agg.terminate_savings
+    consolidate_savings = agg.consolidate_savings
+
+    print(f"  Classified {classified} vendors ({fallback_used} via fallback heuristics)",
+          file=log)
+    print(f"  Total spend: {format_cents(agg.total_cents)}", file=log)
+    print(f"  Recommendations: {recommendation_counts}", file=log)
+    print(f"  Department breakdown:", file=log)
+    for dept, cents in sorted(agg.dept_cents.items(), key=lambda x: -x[1]):
+        print(f"    {dept}: {format_cents(cents)}", file=log)
+    if currency_rows:
+        print("  Currencies (converted to USD): " + ", ".join(
+            f"{currency} {count}" for currency, count in sorted(currency_rows.items())),
+              file=log)
+    print(f"  Recorded as run {run_id} in: {history_file}", file=log)
+    for path in vendor_exports.values():
+        print(f"  Vendor table exported to: {path}", file=log)
+    print(f"  Region breakdown (inferred from legal-entity suffixes):", file=log)
+    for region, cents in sorted(agg.region_cents.items(), key=lambda x: -x[1]):
+        print(f"    {region}: {format_cents(cents)}", file=log)
+
+    # =========================================================================
+    # PARTS 2-4: Top 3 Opportunities, Methodology, Executive Memo
+    # =========================================================================
+    print("\nProcessing Part 2: Top 3 Opportunities...", file=log)
+    print("Processing Part 3: Methodology...", file=log)
+    print("Processing Part 4: Executive Memo...", file=log)
+    cells, styles, rendered = summary_tab_cells({**opportunities, **documents})
+    if streaming_output:
+        writer.write_summary_sheets(cells, styles)
+        out_wb = writer.wb
+    else:
+        apply_summary_cells(wb, cells, styles)
+        out_wb = wb
+
+    # =========================================================================
+    # SPEND CONCENTRATION
+    # =========================================================================
+    print("Processing spend concentration...", file=log)
+    concentration = agg.concentration.summary()
+    total_conc = concentration["total"]
+    print(f"  Top 5 vendors: {total_conc['top5_share'] * 100:.1f}% of spend; "
+          f"80% of spend in {total_conc['pareto']['80%']} vendors; HHI {total_conc['hhi']:,.0f}",
+          file=log)
+    add_table_sheet(out_wb, "Spend Concentration", concentration_tables(concentration),
+                    widths=[24, 10, 18, 30] + [14] * 12)
+
+    # =========================================================================
+    # SPEND TRENDS
+    # =========================================================================
+    if trends is not None:
+        print("Processing spend trends...", file=log)
+        print(f"  {len(trends)} vendor series over {len(trends.months)} months "
+              f"({trends.months[0]} to {trends.months[-1]})", file=log)
+        for flag, count in trends.flag_counts().items():
+            print(f"    {flag}: {count}", file=log)
+        add_table_sheet(out_wb, "Spend Trends", trend_tables(trends, rows),
+                        widths=[40, 16, 14, 12, 18, 18, 14, 12, 12, 40])
+
+    # =========================================================================
+    # OVERLAP GROUPS
+    # =========================================================================
+    print("Processing overlap groups...", file=log)
+    print(f"  {len(overlaps)} groups of near-identical services across departments "
+          f"({sum(g['vendors'] for g in overlaps.groups)} vendors, "
+          f"{format_cents(overlaps.overlap_cents)} combined spend)", file=log)
+    add_table_sheet(out_wb, "Overlap Groups", overlaps.tables(),
+                    widths=[8, 60, 30, 40, 40, 18])
+
+    # =========================================================================
+    # CONSOLIDATION MAP
+    # =========================================================================
+    print("Processing consolidation map...", file=log)
+    print(f"  {len(consolidation.targets)} vendors consolidate into {len(consolidation)} "
+          f"survivors ({format_cents(consolidation.absorbed_cents)} absorbed, "
+          f"{format_cents(consolidation.savings_cents)} expected volume-discount savings)",
+          file=log)
+    add_table_sheet(out_wb, "Consolidation Map", consolidation.tables(),
+                    widths=[24, 40, 22, 16, 16, 16, 18])
+
+    # =========================================================================
+    # PARENT SUMMARY
+    # =========================================================================
+    print("Processing parent summary...", file=log)
+    parent_rows = parents.tables()[0][1]
+    print(f"  {len(parent_rows)} parents over {len(parents.hierarchy)} hierarchy entries; "
+          f"{format_cents(parents.grouped_cents)} of spend rolls up to a global parent",
+          file=log)
+    add_table_sheet(out_wb, "Parent Summary", parents.tables(), widths=[40, 8, 30, 10, 18])
+
+    # =========================================================================
+    # ACTION PLAN
+    # =========================================================================
+    print("Processing action plan...", file=log)
+    print(f"  {len(plan.actions)} actions ({plan.method}), estimated savings "
+          f"{format_cents(plan.savings_cents)}", file=log)
+    add_table_sheet(out_wb, "Action Plan", plan.tables(),
+                    widths=[26, 40, 22, 16, 18, 18, 10])
+
+    # =========================================================================
+    # SPEND CUBE + PIVOT
+    # =========================================================================
+    print("Processing spend cube...", file=log)
+    agg.cube.save(cube_file)
+    parents.save(cube_file)
+    print(f"  {len(agg.cube.cells)} cube cells saved to: {cube_file}", file=log)
+    add_table_sheet(out_wb, "Spend Pivot", pivot_tables(agg.cube),
+                    widths=[26] + [16] * 13)
+    write_aggregates(agg.cube, aggregate_exports)
+    for path in aggregate_exports.values():
+        print(f"  Aggregates exported to: {path}", file=log)
+
     # =========================================================================
-    # SAVE OUTPUT
+    # CHANGES SINCE THE PREVIOUS RUN
     # =========================================================================
-    print(f"\nSaving to {output_file}...")
-    wb.save(output_file)
-    print(f"Done! Output saved to: {output_file}")
+    print("Processing changes since previous run...", file=log)
+    if previous_snapshot is None:
+        changes = None
+        print("  No previous run or --compare-to workbook; skipping the Changes sheet",
+              file=log)
+    else:
+        if budget is not None:
+            changes = diff_sorted_snapshots(previous_snapshot, current_snapshot, budget)
+        else:
+            changes = diff_snapshots(previous_snapshot, current_snapshot)
+        print(f"  {len(changes)} changes against {baseline}", file=log)
+        add_table_sheet(out_wb, "Changes", changes_tables(changes, baseline),
+                        widths=[16, 40, 22, 22, 22, 18, 18, 16, 16])
+        write_changes_report(changes, baseline, changes_file)
+        print(f"  Changes report saved to: {changes_file}", file=log)
+
+    # =========================================================================
+    # QUALITY CHECKS + SAVE OUTPUT
+    # =========================================================================
+    if streaming_output:
+        # Write-only sheets cannot be read back; validate the saved file instead
+        print(f"\nSaving to {output_file}...", file=log)
+        writer.save(output_file)
+        print(f"Done! Output saved to: {output_file}", file=log)
+        print("Running quality checks...", file=log)
+        saved = openpyxl.load_workbook(output_file, read_only=True)
+        report = validate_workbook(saved, load_valid_departments(saved))
+        saved.close()
+    else:
+        print("Running quality checks...", file=log)
+        report = validate_workbook(wb, load_valid_departments(wb))
+    print_validation_summary(report, log)
+    write_validation_report(report, validation_file)
+    print(f"  Validation report saved to: {validation_file}", file=log)
+
+    if not streaming_output:
+        print(f"\nSaving to {output_file}...", file=log)
+        wb.save(output_file)
+        print(f"Done! Output saved to: {output_file}", file=log)
 
     # Print summary stats
-    print(f"\n{'='*60}")
-    print("ANALYSIS SUMMARY")
-    print(f"{'='*60}")
-    print(f"Total vendors analyzed: {classified}")
-    print(f"Total annual spend: ${total_spend:,.2f}")
-    print(f"\nRecommendations breakdown:")
+    print(f"\n{'='*60}", file=log)
+    print("ANALYSIS SUMMARY", file=log)
+    print(f"{'='*60}", file=log)
+    print(f"Total vendors analyzed: {classified}", file=log)
+    print(f"Total annual spend: {format_cents(agg.total_cents)}", file=log)
+    print(f"\nRecommendations breakdown:", file=log)
     for rec, count in sorted(recommendation_counts.items()):
-        print(f"  {rec}: {count} vendors")
-    print(f"\nDepartment spend breakdown:")
-    for dept, spend in sorted(dept_spend.items(), key=lambda x: -x[1]):
-        pct = (spend / total_spend * 100) if total_spend > 0 else 0
-        print(f"  {dept:25s}: ${spend:>12,.2f} ({pct:.1f}%)")
-    print(f"\nEstimated total annual savings: $1,830,000")
-    print(f"Savings as % of total spend: {1830000/total_spend*100:.1f}%")
+        print(f"  {rec}: {count} vendors", file=log)
+    print(f"\nDepartment spend breakdown:", file=log)
+    for dept, cents in sorted(agg.dept_cents.items(), key=lambda x: -x[1]):
+        pct = (cents * 100 / agg.total_cents) if agg.total_cents > 0 else 0
+        print(f"  {dept:25s}: {format_cents(cents):>13} ({pct:.1f}%)", file=log)
+    total_savings = rendered["total_savings"]
+    print(f"\nEstimated total annual savings: {rendered['total_savings_usd']}", file=log)
+    print(f"Savings as % of total spend: {total_savings/total_spend*100:.1f}%", file=log)
+
+    return {
+        "output_file": output_file,
+        "validation_file": validation_file,
+        "cube_file": cube_file,
+        "history_file": history_file,
+        "run_id": run_id,
+        "run_digest": run_digest,
+        "changes_file": changes_file if changes is not None else None,
+        "changes": len(changes) if changes is not None else None,
+        **{f"vendors_{fmt}_file": path for fmt, path in vendor_exports.items()},
+        **{f"aggregates_{fmt}_file": path for fmt, path in aggregate_exports.items()},
+        "vendors": classified,
+        "fallback_used": fallback_used,
+        "total_spend": total_spend,
+        "recommendation_counts": recommendation_counts,
+        "dept_spend": dept_spend,
+        "region_spend": agg.region_spend,
+        "total_savings": total_savings,
+        "concentration": concentration,
+        "validation_passed": report["passed"],
+    }
+
+
+def analysis_stages(input_file, output_file, streaming_output=False, compare_to=None,
+                    budget=None, export_formats=DEFAULT_EXPORT_FORMATS, fx_file=None,
+                    fx_date=None, ledger_file=None, use_prior=True,
+                    plan_max_actions=DEFAULT_MAX_ACTIONS, plan_dept_risk=DEFAULT_MAX_DEPT_RISK,
+                    plan_overrides=None, parents_file=DEFAULT_PARENTS_FILE):
+    """Declare the analysis as stages for vendor_stages.StageRunner.
+
+    classify [-> currency] -> recommend -> aggregate -> opportunities -> report -> write
+               trends ----^         \-> discover ----^
+              overlap ----^-----------------^
+
+    classify streams the input workbook through the threaded read ->
+    normalize -> classify pipeline (see vendor_pipeline). The trends stage
+    reads monthly spend (columns or ledger_file) and is None without any. The
+    currency stage runs only with an FX rate file. recommend applies the
+    vendor_rules table (keeping VENDOR_DB recommendations as the prior unless
+    use_prior is False), with overlap, the groups of near-identical
+    descriptions across departments (see vendor_overlap), as a feature. plan,
+    also fed by recommend, picks the savings-maximizing actions under the
+    plan_* limits for write (see vendor_planner). discover prices the function
+    clusters and overlap groups of the recommended rows as opportunity
+    candidates, and the Top 3 of them drive the report (see vendor_reports). With a MemoryBudget the
+    row-set stages produce disk-spilling SpooledRows.
+    """
+    classified = "currency" if fx_file else "classify"
+    has_parents = bool(parents_file) and os.path.exists(parents_file)
+    currency = []
+    if fx_file:
+        currency.append(
+            Stage("currency", convert_currency_rows, inputs=["classify"],
+                  params={"fx_file": fx_file, "as_of": fx_date, "budget": budget},
+                  depends_on=(FileContent(fx_file), vendor_fx)))
+    return [
+        Stage("trends", build_trends,
+              params={"input_file": input_file, "ledger_file": ledger_file},
+              depends_on=(FileContent(input_file),
+                          FileContent(ledger_file) if ledger_file else None,
+                          vendor_timeseries)),
+        Stage("classify", classify_rows,
+              params={"input_file": input_file, "classify": lookup_vendor, "budget": budget},
+              depends_on=(FileContent(input_file), stream_vendor_rows, normalize_rows,
+                          VendorRow._fields, vendor_money, VENDOR_DB, classify_vendor_fallback,
+                          make_classify_stage, vendor_regions)),
+        *currency,
+        Stage("overlap", find_overlaps, inputs=[classified],
+              depends_on=(vendor_overlap,)),
+        Stage("recommend", recommend_rows, inputs=[classified, "trends", "overlap"],
+              params={"use_prior": use_prior, "budget": budget},
+              depends_on=(vendor_rules,)),
+        Stage("aggregate", aggregate_rows, inputs=["recommend"],
+              depends_on=(SpendAggregate, vendor_concentration, vendor_cube, vendor_money)),
+        Stage("plan", plan_actions, inputs=["recommend"],
+              params={"max_actions": plan_max_actions, "max_dept_risk": plan_dept_risk,
+                      "overrides_file": plan_overrides},
+              depends_on=(FileContent(plan_overrides) if plan_overrides else None,
+                          vendor_planner)),
+        Stage("hierarchy", load_hierarchy, params={"parents_file": parents_file},
+              depends_on=(FileContent(parents_file) if has_parents else None,
+                          vendor_hierarchy)),
+        Stage("parents", roll_up, inputs=["recommend", "hierarchy"],
+              depends_on=(vendor_hierarchy,)),
+        Stage("consolidation", assign_targets, inputs=["recommend"],
+              depends_on=(vendor_consolidation, vendor_rules.vendor_function,
+                          vendor_rules.FUNCTION_KEYWORDS)),
+        Stage("discover", find_opportunities, inputs=["recommend", "consolidation", "overlap"],
+              depends_on=(vendor_reports, vendor_planner, vendor_rules.vendor_function,
+                          vendor_rules.FUNCTION_KEYWORDS)),
+        Stage("opportunities", render_opportunities, inputs=["aggregate", "discover"],
+              depends_on=(vendor_reports,)),
+        Stage("report", render_documents, inputs=["opportunities"],
+              depends_on=(vendor_reports,)),
+        Stage("write", write_outputs,
+              inputs=["recommend", "aggregate", "opportunities", "report", "trends", "overlap",
+                      "plan", "consolidation", "parents"],
+              params={"input_file": input_file, "output_file": output_file,
+                      "streaming_output": streaming_output, "compare_to": compare_to,
+                      "budget": budget, "export_formats": export_formats,
+                      "converted": bool(fx_file)},
+              cache=False),
+    ]
+
+
+def main(input_file=DEFAULT_INPUT_FILE, output_file=DEFAULT_OUTPUT_FILE, streaming_output=False,
+         compare_to=None, force=False, resume=False, max_memory=None, export=None,
+         fx_rates=None, fx_date=None, ledger=None, rules_only=False,
+         plan_max_actions=DEFAULT_MAX_ACTIONS, plan_dept_risk=DEFAULT_MAX_DEPT_RISK,
+         plan_overrides=None, parents=DEFAULT_PARENTS_FILE, log=None):
+    """Run the analysis of input_file into output_file and its side files.
+
+    Progress is printed to log, a text stream (default: stdout), so callers
+    such as the daemon can capture one run's output without redirecting the
+    whole process.
+    """
+    log = log if log is not None else sys.stdout
+    output_dir = os.path.dirname(output_file)
+    budget = MemoryBudget.parse(max_memory)
+    export_formats = parse_export_formats(export)
+    paths = output_paths(output_file, export_formats)
+
+    # Identical inputs, rules, code and diff baseline produce identical results:
+    # reuse them. Without --compare-to the Changes sheet diffs against the
+    # latest run in the history store, so its digest is part of the key
+    baseline = None
+    history_file = paths["history_file"]
+    if not compare_to and os.path.exists(history_file):
+        with HistoryStore(history_file) as history:
+            latest = history.latest_run()
+        if latest is not None:
+            run_id, digest = latest
+            baseline = digest or f"run {run_id}"
+    run_cache = RunCache(os.path.join(output_dir, DEFAULT_CACHE_DIR))
+    cache_key = run_key(input_file, {"streaming_output": streaming_output,
+                                     "compare_to": bool(compare_to), "baseline": baseline,
+                                     "export_formats": export_formats,
+                                     "fx_date": fx_date, "rules_only": rules_only,
+                                     "plan_max_actions": plan_max_actions,
+                                     "plan_dept_risk": plan_dept_risk},
+                        [compare_to, fx_rates, ledger, plan_overrides,
+                         parents if parents and os.path.exists(parents) else None])
+    if not force:
+        cached = run_cache.get(cache_key, {"output_file": output_file,
+                                           **{name: paths[name] for name in CACHED_ARTIFACTS
+                                              if name in paths}})
+        if cached is not None:
+            # The restored run is still a run: record it in the history
+            with HistoryStore(history_file) as history:
+                run_id = history.repeat_run(cached["run_id"], cached.get("run_digest"),
+                                            input_file, output_file)
+            if run_id is not None:
+                cached["history_file"] = history_file
+                cached["run_id"] = run_id
+                print(f"Inputs, rules and code unchanged (run {cache_key[:12]}); "
+                      f"restored cached output to: {output_file}", file=log)
+                print(f"  Recorded as run {run_id} in: {history_file}", file=log)
+                print("  Use --force to rerun the analysis.", file=log)
+                return cached
+            # The cached run is no longer in the history store: recompute
+            run_cache.discard(cache_key)
+
+    # Otherwise run the stages, reusing any intermediate artifact whose
+    # inputs are unchanged (e.g. classification when only the memo changed)
+    runner = StageRunner(
+        analysis_stages(input_file, output_file, streaming_output, compare_to, budget,
+                        export_formats, fx_rates, fx_date, ledger, use_prior=not rules_only,
+                        plan_max_actions=plan_max_actions, plan_dept_risk=plan_dept_risk,
+                        plan_overrides=plan_overrides, parents_file=parents),
+        cache_dir=os.path.join(output_dir, DEFAULT_STAGE_CACHE_DIR),
+        force=force,
+        budget=budget,
+    )
+
+    # Classification checkpoints its progress; --resume continues from the
+    # last checkpoint of the same classify stage key
+    checkpoint = ClassificationCheckpoint(
+        os.path.join(output_dir, DEFAULT_CHECKPOINT_FILE), runner.keys["classify"], resume=resume
+    )
+    runner.stages["classify"].context["checkpoint"] = checkpoint
+    runner.stages["write"].context["log"] = log
+
+    result = runner.run("write")
+    print(f"\nStages run: {', '.join(runner.ran)}", file=log)
+    if runner.reused:
+        print(f"Stages reused from cache: {', '.join(runner.reused)}", file=log)
+    if checkpoint.resumed_rows:
+        print(f"Classification resumed from checkpoint ({checkpoint.resumed_rows} rows reused)",
+              file=log)
+
+    run_cache.put(cache_key, result, {name: result.get(name) for name in CACHED_ARTIFACTS})
+    return result
 
 
 if __name__ == "__main__":
-    main()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Vendor spend strategy analysis")
+    parser.add_argument("--input", default=DEFAULT_INPUT_FILE, help="Template workbook to read")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT_FILE, help="Completed workbook to write")
+    parser.add_argument("--streaming-output", action="store_true",
+                        help="Write the output through a write-only workbook (low memory)")
+    parser.add_argument("--compare-to", default=None,
+                        help="Previous output workbook to diff against "
+                             "(default: the previous run in the history store)")
+    parser.add_argument("--force", action="store_true",
+                        help="Rerun even if the inputs, rules and code match a cached run")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue classification from the last checkpoint of an "
+                             "interrupted run")
+    parser.add_argument("--max-memory", default=None, metavar="SIZE",
+                        help="Keep row sets and diff tables under SIZE (e.g. 512M), "
+                             "spilling to temporary files")
+    parser.add_argument("--export", default=None, metavar="FORMATS",
+                        help="Comma-separated flat-file exports of the vendor table and "
+                             "aggregates: csv, jsonl, parquet (default: csv,jsonl; "
+                             "parquet needs pyarrow)")
+    parser.add_argument("--fx-rates", default=None, metavar="CSV",
+                        help="Local month,currency,rate file; converts spend to USD using "
+                             "each row's Currency column or its entity's region")
+    parser.add_argument("--fx-date", default=None, metavar="DATE",
+                        help="Convert at the latest rates on or before DATE "
+                             "(default: the latest rates in the file)")
+    parser.add_argument("--ledger", default=None, metavar="CSV",
+                        help="Transaction ledger (vendor,date,amount) for the monthly spend "
+                             "trends (default: monthly columns in the input sheet, if any)")
+    parser.add_argument("--rules-only", action="store_true",
+                        help="Derive every recommendation from the rule table, ignoring the "
+                             "static VENDOR_DB recommendations")
+    parser.add_argument("--plan-max-actions", type=int, default=DEFAULT_MAX_ACTIONS,
+                        metavar="N", help="Most actions in the Action Plan "
+                                          f"(default: {DEFAULT_MAX_ACTIONS})")
+    parser.add_argument("--plan-dept-risk", type=int, default=DEFAULT_MAX_DEPT_RISK,
+                        metavar="POINTS", help="Most risk points of actions per department "
+                                               f"(default: {DEFAULT_MAX_DEPT_RISK})")
+    parser.add_argument("--plan-overrides", default=None, metavar="CSV",
+                        help="vendor,risk,keep file of risk scores and must-keep vendors "
+                             "for the Action Plan")
+    parser.add_argument("--parents", default=DEFAULT_PARENTS_FILE, metavar="CSV",
+                        help="vendor,parent hierarchy file for the Parent column and the "
+                             "Parent Summary tab (default: vendor_parents.csv)")
+    args = parser.parse_args()
+    try:
+        main(args.input, args.output, streaming_output=args.streaming_output,
+             compare_to=args.compare_to, force=args.force, resume=args.resume,
+             max_memory=args.max_memory, export=args.export, fx_rates=args.fx_rates,
+             fx_date=args.fx_date, ledger=args.ledger, rules_only=args.rules_only,
+             plan_max_actions=args.plan_max_actions, plan_dept_risk=args.plan_dept_risk,
+             plan_overrides=args.plan_overrides, parents=args.parents)
+    except (MissingRateError, LedgerError) as exc:
+        parser.exit(1, f"Error: {exc}\n")
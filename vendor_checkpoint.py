@@ -0,0 +1,94 @@
+"""
+Classification Checkpoints
+================================
+Periodic, append-only checkpoints of the classify stage so that a crash
+late in a long run does not mean starting over.
+
+The checkpoint file is a header record (the classify stage's cache key)
+followed by one pickled batch of classified rows per checkpoint. Appends are
+flushed and fsynced; a record cut short by a crash is dropped on resume.
+Rows arrive in ascending row order, so the last checkpointed row index marks
+the processed range and resuming simply skips rows up to it. The resumed run
+produces exactly the rows (and therefore aggregates) of an uninterrupted one.
+
+A checkpoint written for different inputs, rules or code has a different key
+and is ignored.
+"""
+
+import os
+import pickle
+
+CHECKPOINT_VERSION = 1
+DEFAULT_CHECKPOINT_FILE = "Vendor_Analysis_Checkpoint.pkl"
+DEFAULT_CHECKPOINT_EVERY = 50_000
+
+
+class ClassificationCheckpoint:
+    """Append-only checkpoint of classified VendorRows for one classify stage key."""
+
+    def __init__(self, path, key, resume=False, every=DEFAULT_CHECKPOINT_EVERY):
+        self.path = path
+        self.key = key
+        self.resume = resume
+        self.every = every
+        self.resumed_rows = 0
+        self._f = None
+
+    def load(self, into):
+        """Append the rows saved by a previous attempt to `into` and return their count.
+
+        Nothing is loaded unless resuming a run with the same key.
+        """
+        if not self.resume or not os.path.exists(self.path):
+            return 0
+        count = 0
+        good_offset = 0
+        with open(self.path, "rb") as f:
+            try:
+                header = pickle.load(f)
+            except (EOFError, pickle.UnpicklingError):
+                return 0
+            if header != {"version": CHECKPOINT_VERSION, "key": self.key}:
+                return 0
+            good_offset = f.tell()
+            while True:
+                try:
+                    batch = pickle.load(f)
+                except (EOFError, pickle.UnpicklingError):
+                    break
+                into.extend(batch)
+                count += len(batch)
+                good_offset = f.tell()
+        # Drop a partially written trailing record so appends continue cleanly
+        with open(self.path, "r+b") as f:
+            f.truncate(good_offset)
+        self._f = open(self.path, "ab")
+        self.resumed_rows = count
+        return count
+
+    def _open(self):
+        if self._f is None:
+            self._f = open(self.path, "wb")
+            self._write({"version": CHECKPOINT_VERSION, "key": self.key})
+
+    def _write(self, record):
+        pickle.dump(record, self._f, protocol=pickle.HIGHEST_PROTOCOL)
+        self._f.flush()
+        os.fsync(self._f.fileno())
+
+    def save(self, batch):
+        """Append a batch of newly classified rows."""
+        if batch:
+            self._open()
+            self._write(batch)
+
+    def close(self):
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+    def complete(self):
+        """The stage finished: its artifact supersedes the checkpoint."""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,279 @@
+"""
+Spend Concentration Analytics
+================================
+Single-pass, bounded-memory concentration metrics over the classified
+vendor rows, reported in total and per department:
+
+- Top-K vendors (min-heap of size K)
+- Pareto curve: how many vendors make up 80/90/95% of spend
+- Herfindahl-Hirschman index (from a running sum of squared spend)
+- Long-tail vendor counts and spend below configurable thresholds
+
+Memory per scope is O(K + histogram buckets) regardless of vendor count.
+The Pareto counts are exact while a scope has no more vendors than the
+exact-tracking heap holds; beyond that the remainder is resolved from a
+log-scale spend histogram (24 buckets per decade), so counts are accurate
+to within one bucket's vendors.
+
+Spend is tracked in integer cents (see vendor_money); shares, Pareto
+targets and the long-tail thresholds are compared in integers, and amounts
+are converted back to currency units only in summary().
+"""
+
+import heapq
+import math
+
+import numpy as np
+
+from vendor_money import CENTS_PER_UNIT, from_cents, group_sum, sum_of_squares
+
+DEFAULT_TOP_K = 10
+DEFAULT_EXACT_K = 512
+DEFAULT_PARETO_LEVELS = (0.80, 0.90, 0.95)
+DEFAULT_LONG_TAIL_THRESHOLDS = (1_000, 5_000, 10_000)
+
+_BUCKETS_PER_DECADE = 24
+
+# Pareto levels are compared as integer basis points of the total
+_BASIS_POINTS = 10_000
+
+
+def _bucket(cents):
+    if cents <= 0:
+        return None
+    return math.floor(math.log10(cents) * _BUCKETS_PER_DECADE)
+
+
+def _buckets(cents):
+    """Log buckets of an array of positive cents."""
+    return np.floor(np.log10(cents) * _BUCKETS_PER_DECADE).astype(np.int64)
+
+
+# =============================================================================
+# PER-SCOPE STATE
+# =============================================================================
+
+class ScopeConcentration:
+    """Streaming concentration state for one scope (the total, or one department)."""
+
+    def __init__(self, exact_k=DEFAULT_EXACT_K, long_tail_thresholds=DEFAULT_LONG_TAIL_THRESHOLDS):
+        self.exact_k = exact_k
+        self.vendors = 0
+        self.total = 0              # cents
+        self.sum_sq = 0             # cents squared (Python int, never overflows)
+        self._seq = 0
+        self._heap = []             # (cents, -seq, vendor, bucket) min-heap of the largest vendors
+        self._hist_count = {}       # log bucket -> vendor count
+        self._hist_spend = {}       # log bucket -> cents
+        # threshold (currency units) -> [vendors, cents]
+        self.long_tail = {t: [0, 0] for t in long_tail_thresholds}
+
+    def add(self, vendor_name, cents):
+        self.vendors += 1
+        self.total += cents
+        self.sum_sq += cents * cents
+        for threshold, bucket in self.long_tail.items():
+            if cents < threshold * CENTS_PER_UNIT:
+                bucket[0] += 1
+                bucket[1] += cents
+
+        b = _bucket(cents)
+        if b is not None:
+            self._hist_count[b] = self._hist_count.get(b, 0) + 1
+            self._hist_spend[b] = self._hist_spend.get(b, 0) + cents
+
+        self._seq += 1
+        self._push((cents, -self._seq, vendor_name, b))
+
+    def add_batch(self, vendor_names, cents):
+        """Vectorized add() of an int64 cents array and the matching vendor names."""
+        n = len(cents)
+        if not n:
+            return
+        self.vendors += n
+        self.total += int(cents.sum())
+        self.sum_sq += sum_of_squares(cents)
+        for threshold, bucket in self.long_tail.items():
+            below = cents[cents < threshold * CENTS_PER_UNIT]
+            bucket[0] += len(below)
+            bucket[1] += int(below.sum())
+
+        buckets = np.full(n, -1, dtype=np.int64)
+        positive = cents > 0
+        if positive.any():
+            buckets[positive] = _buckets(cents[positive])
+            values, inverse = np.unique(buckets[positive], return_inverse=True)
+            counts = np.bincount(inverse, minlength=len(values))
+            spend = group_sum(inverse, cents[positive], len(values))
+            for b, count, total in zip(values.tolist(), counts.tolist(), spend.tolist()):
+                self._hist_count[b] = self._hist_count.get(b, 0) + count
+                self._hist_spend[b] = self._hist_spend.get(b, 0) + total
+
+        # Only the batch's own top exact_k (largest spend, then earliest) can
+        # enter the heap, and the kept set does not depend on push order
+        order = np.lexsort((np.arange(n), -cents))[:self.exact_k]
+        for i in order.tolist():
+            b = int(buckets[i])
+            self._push((int(cents[i]), -(self._seq + 1 + i), vendor_names[i],
+                        b if b >= 0 else None))
+        self._seq += n
+
+    def _push(self, item):
+        # Earlier rows win ties so the result is independent of heap internals
+        if len(self._heap) < self.exact_k:
+            heapq.heappush(self._heap, item)
+        elif item > self._heap[0]:
+            heapq.heapreplace(self._heap, item)
+
+    def top(self, k=DEFAULT_TOP_K):
+        """Return [(vendor, cents)] for the k largest vendors, largest first."""
+        return [(name, cents) for cents, _, name, _ in heapq.nlargest(k, self._heap)]
+
+    def hhi(self):
+        """Herfindahl-Hirschman index on the 0-10,000 scale."""
+        if self.total <= 0:
+            return 0.0
+        return 10_000 * self.sum_sq / (self.total * self.total)
+
+    def vendors_for_share(self, share):
+        """Smallest number of vendors whose combined spend reaches share of the total."""
+        if self.total <= 0:
+            return 0
+        # Everything below is scaled by _BASIS_POINTS so the comparisons stay integral
+        target = round(share * _BASIS_POINTS) * self.total
+        covered = 0
+        count = 0
+
+        # Exact part: the tracked largest vendors, removed from the histogram
+        hist_count = dict(self._hist_count)
+        hist_spend = dict(self._hist_spend)
+        for cents, _, _name, b in sorted(self._heap, reverse=True):
+            if cents <= 0:
+                break
+            count += 1
+            covered += cents * _BASIS_POINTS
+            if covered >= target:
+                return count
+            hist_count[b] -= 1
+            hist_spend[b] -= cents
+
+        # Approximate part: remaining vendors from the histogram, largest bucket first
+        for b in sorted(hist_count, reverse=True):
+            n = hist_count[b]
+            if n <= 0:
+                continue
+            bucket_spend = hist_spend[b] * _BASIS_POINTS
+            if covered + bucket_spend >= target:
+                # ceil((target - covered) / (bucket_spend / n))
+                needed = -(-(target - covered) * n // bucket_spend)
+                return count + min(n, max(1, needed))
+            count += n
+            covered += bucket_spend
+        return count
+
+    def summary(self, top_k=DEFAULT_TOP_K, levels=DEFAULT_PARETO_LEVELS):
+        top = self.top(top_k)
+        top_share = (top[0][1] / self.total) if top and self.total else 0.0
+        top5_share = (sum(c for _, c in top[:5]) / self.total) if self.total else 0.0
+        return {
+            "vendors": self.vendors,
+            "total_spend": from_cents(self.total),
+            "top_vendor": top[0][0] if top else None,
+            "top_vendor_spend": from_cents(top[0][1]) if top else 0.0,
+            "top_vendor_share": top_share,
+            "top5_share": top5_share,
+            "top_vendors": [{"vendor": n, "spend": from_cents(c)} for n, c in top],
+            "pareto": {f"{int(round(level * 100))}%": self.vendors_for_share(level)
+                       for level in levels},
+            "hhi": self.hhi(),
+            "long_tail": {
+                str(threshold): {"vendors": n, "spend": from_cents(cents)}
+                for threshold, (n, cents) in sorted(self.long_tail.items())
+            },
+        }
+
+
+# =============================================================================
+# TRACKER
+# =============================================================================
+
+class ConcentrationTracker:
+    """Concentration state for the total and for every department, updated in one pass."""
+
+    def __init__(self, exact_k=DEFAULT_EXACT_K, long_tail_thresholds=DEFAULT_LONG_TAIL_THRESHOLDS):
+        self.exact_k = exact_k
+        self.long_tail_thresholds = tuple(long_tail_thresholds)
+        self.total = ScopeConcentration(exact_k, self.long_tail_thresholds)
+        self.departments = {}
+
+    def _scope(self, dept):
+        scope = self.departments.get(dept)
+        if scope is None:
+            scope = self.departments[dept] = ScopeConcentration(
+                self.exact_k, self.long_tail_thresholds
+            )
+        return scope
+
+    def add(self, vendor_name, dept, cents):
+        self.total.add(vendor_name, cents)
+        self._scope(dept).add(vendor_name, cents)
+
+    def add_batch(self, vendor_names, dept_codes, depts, cents):
+        """Vectorized add(): dept_codes index into depts (see vendor_money.encode)."""
+        names = np.asarray(vendor_names, dtype=object)
+        self.total.add_batch(names, cents)
+        for code, dept in enumerate(depts):
+            members = dept_codes == code
+            self._scope(dept).add_batch(names[members], cents[members])
+
+    def summary(self, top_k=DEFAULT_TOP_K, levels=DEFAULT_PARETO_LEVELS):
+        """Return {"total": {...}, "departments": {dept: {...}}}, departments by spend."""
+        depts = sorted(self.departments.items(), key=lambda x: -x[1].total)
+        return {
+            "total": self.total.summary(top_k, levels),
+            "departments": {dept: scope.summary(top_k, levels) for dept, scope in depts},
+        }
+
+
+# =============================================================================
+# OUTPUT
+# =============================================================================
+
+def concentration_tables(summary, levels=DEFAULT_PARETO_LEVELS):
+    """Build (header, rows, number_formats) blocks for the Spend Concentration sheet."""
+    pareto_keys = [f"{int(round(level * 100))}%" for level in levels]
+    tail_keys = list(summary["total"]["long_tail"])
+
+    header = (["Scope", "Vendors", "Total Spend (USD)", "Top Vendor", "Top Vendor Share",
+               "Top 5 Share"]
+              + [f"Vendors for {k} of Spend" for k in pareto_keys]
+              + ["HHI"]
+              + [f"Vendors < ${int(t):,}" for t in tail_keys]
+              + [f"Spend < ${int(t):,}" for t in tail_keys])
+    scopes = [("Total", summary["total"])] + list(summary["departments"].items())
+    rows = []
+    for name, s in scopes:
+        rows.append(
+            [name, s["vendors"], s["total_spend"], s["top_vendor"], s["top_vendor_share"],
+             s["top5_share"]]
+            + [s["pareto"][k] for k in pareto_keys]
+            + [round(s["hhi"], 1)]
+            + [s["long_tail"][k]["vendors"] for k in tail_keys]
+            + [s["long_tail"][k]["spend"] for k in tail_keys]
+        )
+    n_tail = len(tail_keys)
+    scope_formats = ({2: '"$"#,##0', 4: "0.0%", 5: "0.0%", 6 + len(pareto_keys): "#,##0.0"}
+                     | {7 + len(pareto_keys) + n_tail + i: '"$"#,##0' for i in range(n_tail)})
+
+    total = summary["total"]
+    cumulative = 0.0
+    top_rows = []
+    for rank, v in enumerate(total["top_vendors"], start=1):
+        cumulative += v["spend"]
+        share = v["spend"] / total["total_spend"] if total["total_spend"] else 0.0
+        cum_share = cumulative / total["total_spend"] if total["total_spend"] else 0.0
+        top_rows.append([rank, v["vendor"], v["spend"], share, cum_share])
+    top_header = ["Rank", "Top Vendor", "Spend (USD)", "Share of Total", "Cumulative Share"]
+    top_formats = {2: '"$"#,##0', 3: "0.0%", 4: "0.0%"}
+
+    return [(header, rows, scope_formats), (top_header, top_rows, top_formats)]
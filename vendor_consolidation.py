@@ -0,0 +1,193 @@
+"""
+Consolidation Targets
+================================
+Maps every vendor recommended for consolidation to the vendor it should be
+consolidated into. Vendors are grouped into functional clusters by what they
+do (the vendor_rules keyword taxonomy). A vendor whose description names no
+function is left out: a department (e.g. all of Facilities) is too broad
+to consolidate. Location-bound functions (LOCATION_BOUND_FUNCTIONS:
+offices, catering) cluster per region, since a Zagreb coworking space cannot
+absorb a London one. In each cluster that has a Consolidate vendor one
+survivor is picked:
+
+- never a vendor recommended for termination,
+- preferring the vendor being kept (recommended Optimize), then a vendor
+  curated in VENDOR_DB, then the largest spend.
+
+Every other Consolidate vendor in the cluster is absorbed by the survivor.
+The expected savings is the extra volume discount on the combined spend:
+the VOLUME_DISCOUNT_TIERS rate of the combined contract, less the discounts
+the vendors already get on their own spend.
+
+Clusters are encoded as integers and the survivor, absorbed spend and
+discounts are computed with a sort and grouped sums over all clusters at
+once, so thousands of clusters cost no more than a few.
+"""
+
+import numpy as np
+
+from vendor_money import encode, from_cents, group_sum
+from vendor_regions import UNKNOWN
+from vendor_rules import keyword_function
+
+_BASIS_POINTS = 10_000
+
+# (minimum annual spend in cents, discount in basis points), largest first
+VOLUME_DISCOUNT_TIERS = (
+    (1_000_000_00, 1_200),
+    (250_000_00, 800),
+    (50_000_00, 500),
+    (0, 200),
+)
+
+# Functions served on site, so only vendors in the same region can consolidate
+LOCATION_BOUND_FUNCTIONS = frozenset({"Workspace", "Catering & Dining"})
+
+ROLE_SURVIVOR = "Survivor"
+ROLE_ABSORBED = "Absorbed"
+
+
+def volume_discount_cents(cents):
+    """Discount on each annual spend (int64 cents array) at its VOLUME_DISCOUNT_TIERS rate."""
+    cents = np.asarray(cents, dtype=np.int64)
+    rates = np.zeros(len(cents), dtype=np.int64)
+    for threshold, basis_points in reversed(VOLUME_DISCOUNT_TIERS):
+        rates[cents >= threshold] = basis_points
+    return np.maximum(cents, 0) * rates // _BASIS_POINTS
+
+
+def function_cluster(row):
+    """Default cluster of a row: its taxonomy function, per region for
+    location-bound functions; None (not consolidated) when its description
+    names no function or a location-bound vendor has no known region."""
+    function = keyword_function(row.desc)
+    if function in LOCATION_BOUND_FUNCTIONS:
+        known = row.region and row.region != UNKNOWN
+        return f"{function} ({row.region})" if known else None
+    return function
+
+
+class ConsolidationMap:
+    """Survivor per cluster and the consolidation target of each absorbed vendor."""
+
+    def __init__(self, targets, roles, clusters, members):
+        self.targets = targets
+        self.roles = roles
+        self.clusters = clusters
+        self.members = members
+
+    def __len__(self):
+        return len(self.clusters)
+
+    def target(self, row):
+        """Vendor that a VendorRow consolidates into, or None."""
+        return self.targets.get(row.row_idx)
+
+    @property
+    def absorbed_cents(self):
+        return sum(c["absorbed_cents"] for c in self.clusters)
+
+    @property
+    def savings_cents(self):
+        return sum(c["savings_cents"] for c in self.clusters)
+
+    def tables(self):
+        """Build (header, rows, number_formats) blocks for the Consolidation Map sheet:
+        one line per cluster, then every survivor and absorbed vendor."""
+        money = '"$"#,##0'
+        cluster_rows = [[c["cluster"], c["survivor"], from_cents(c["survivor_cents"]),
+                         c["absorbed"], from_cents(c["absorbed_cents"]),
+                         from_cents(c["survivor_cents"] + c["absorbed_cents"]),
+                         from_cents(c["savings_cents"])]
+                        for c in self.clusters]
+        member_rows = [[m["cluster"], m["vendor"], m["department"], m["role"],
+                        from_cents(m["cents"]), m["target"]]
+                       for m in self.members]
+        return [
+            (["Cluster", "Survivor", "Survivor Spend", "Vendors Absorbed", "Absorbed Spend",
+              "Combined Spend", "Expected Discount Savings"],
+             cluster_rows, {2: money, 4: money, 5: money, 6: money}),
+            (["Cluster", "Vendor", "Department", "Role", "Spend", "Consolidate Into"],
+             member_rows, {4: money}),
+        ]
+
+
+def assign_targets(rows, cluster_of=None):
+    """Stage: ConsolidationMap for the recommended rows.
+
+    cluster_of(row) names a row's functional cluster, or None to leave the
+    row out (default: function_cluster). Each cluster also records the
+    function of its survivor, so function-level reports can name it.
+    """
+    cluster_of = cluster_of or function_cluster
+    row_idxs, vendors, depts, recs, from_db, clusters, cents = [], [], [], [], [], [], []
+    functions = []
+    for row in rows:
+        cluster = cluster_of(row)
+        if cluster is None:
+            continue
+        row_idxs.append(row.row_idx)
+        vendors.append(row.vendor)
+        depts.append(row.dept)
+        recs.append(row.rec)
+        from_db.append(row.source == "db")
+        clusters.append(cluster)
+        functions.append(keyword_function(row.desc) or cluster)
+        cents.append(row.cents)
+    n = len(row_idxs)
+    cents = np.asarray(cents, dtype=np.int64)
+    cluster_codes, cluster_names = encode(clusters)
+    k = len(cluster_names)
+    consolidate = np.fromiter((rec == "Consolidate" for rec in recs), dtype=bool, count=n)
+    keep = np.fromiter((rec == "Optimize" for rec in recs), dtype=bool, count=n)
+    eligible = np.fromiter((rec != "Terminate" for rec in recs), dtype=bool, count=n)
+    from_db = np.asarray(from_db, dtype=bool)
+
+    # Survivor: first row per cluster ordered by eligibility, then the flags,
+    # then spend (row order breaks ties)
+    order = np.lexsort((np.arange(n), -cents, ~from_db, ~keep, ~eligible, cluster_codes))
+    first = np.ones(n, dtype=bool)
+    first[1:] = cluster_codes[order][1:] != cluster_codes[order][:-1]
+    survivor = np.full(k, -1, dtype=np.int64)
+    heads = order[first]
+    heads = heads[eligible[heads]]
+    survivor[cluster_codes[heads]] = heads
+
+    has_survivor = survivor[cluster_codes] >= 0
+    absorbed = consolidate & has_survivor & (survivor[cluster_codes] != np.arange(n))
+    active = np.bincount(cluster_codes[absorbed], minlength=k) > 0
+
+    absorbed_cents = group_sum(cluster_codes[absorbed], cents[absorbed], k)
+    absorbed_counts = np.bincount(cluster_codes[absorbed], minlength=k)
+    own_discount = group_sum(cluster_codes[absorbed], volume_discount_cents(cents[absorbed]), k)
+    survivor_cents = np.where(survivor >= 0, cents[np.maximum(survivor, 0)], 0)
+    combined = survivor_cents + absorbed_cents
+    savings = (volume_discount_cents(combined) - volume_discount_cents(survivor_cents)
+               - own_discount)
+
+    targets = {}
+    roles = {}
+    for i in np.flatnonzero(absorbed).tolist():
+        targets[row_idxs[i]] = vendors[survivor[cluster_codes[i]]]
+        roles[row_idxs[i]] = ROLE_ABSORBED
+    cluster_list = []
+    for c in np.flatnonzero(active)[np.argsort(-absorbed_cents[active], kind="stable")].tolist():
+        s = int(survivor[c])
+        roles[row_idxs[s]] = ROLE_SURVIVOR
+        cluster_list.append({
+            "cluster": cluster_names[c], "function": functions[s], "survivor": vendors[s],
+            "survivor_cents": int(survivor_cents[c]), "absorbed": int(absorbed_counts[c]),
+            "absorbed_cents": int(absorbed_cents[c]), "savings_cents": int(savings[c]),
+        })
+
+    ranks = {c["cluster"]: rank for rank, c in enumerate(cluster_list)}
+    member_order = sorted(
+        (i for i in range(n) if row_idxs[i] in roles),
+        key=lambda i: (ranks[cluster_names[cluster_codes[i]]],
+                       roles[row_idxs[i]] != ROLE_SURVIVOR, -int(cents[i]), i),
+    )
+    members = [{"cluster": cluster_names[cluster_codes[i]], "vendor": vendors[i],
+                "department": depts[i], "role": roles[row_idxs[i]], "cents": int(cents[i]),
+                "target": targets.get(row_idxs[i])}
+               for i in member_order]
+    return ConsolidationMap(targets, roles, cluster_list, members)
@@ -0,0 +1,214 @@
+"""
+Spend Cube
+================================
+Precomputed vendor counts and spend over every combination of department,
+recommendation, region and classification source, including all roll-ups
+("*" stands for "all values" of a dimension). The cube is filled in the same
+single pass as the other aggregates and persisted to SQLite keyed on the
+four dimensions, so any slice is a primary-key lookup:
+
+    python vendor_cube.py --department Facilities --region Croatia --recommendation Consolidate
+
+Cell spend is kept (and stored) as integer cents; get() and query_cube()
+return currency units.
+"""
+
+import argparse
+import itertools
+import os
+import sqlite3
+
+import numpy as np
+
+from vendor_money import encode, from_cents, group_sum
+
+DIMENSIONS = ("department", "recommendation", "region", "source")
+ALL = "*"
+
+# Every subset of dimensions to roll up, as a tuple of booleans (True = keep the value)
+_MASKS = list(itertools.product((True, False), repeat=len(DIMENSIONS)))
+_REC_MASKS = [mask for mask in _MASKS if mask[DIMENSIONS.index("recommendation")]]
+
+RECOMMENDATION_ORDER = ("Terminate", "Consolidate", "Optimize")
+
+
+# =============================================================================
+# CUBE
+# =============================================================================
+
+class SpendCube:
+    """{(department, recommendation, region, source): [vendors, cents]} with roll-ups."""
+
+    def __init__(self):
+        self.cells = {}
+
+    def _add_cell(self, key, vendors, cents):
+        cell = self.cells.get(key)
+        if cell is None:
+            self.cells[key] = [vendors, cents]
+        else:
+            cell[0] += vendors
+            cell[1] += cents
+
+    def add(self, department, recommendation, region, source, cents):
+        values = (department, recommendation, region, source)
+        for mask in _MASKS:
+            self._add_cell(tuple(v if keep else ALL for v, keep in zip(values, mask)), 1, cents)
+
+    def add_batch(self, columns, cents):
+        """Vectorized add(): one list per dimension plus an int64 cents array."""
+        if not len(cents):
+            return
+        encoded = [encode(column) for column in columns]
+        for mask in _MASKS:
+            # Mixed-radix code over the kept dimensions identifies the cell
+            combined = np.zeros(len(cents), dtype=np.int64)
+            for (codes, values), keep in zip(encoded, mask):
+                if keep:
+                    combined = combined * len(values) + codes
+            cells, inverse = np.unique(combined, return_inverse=True)
+            counts = np.bincount(inverse, minlength=len(cells))
+            totals = group_sum(inverse, cents, len(cells))
+            for code, vendors, total in zip(cells.tolist(), counts.tolist(), totals.tolist()):
+                key = []
+                for (_, values), keep in zip(reversed(encoded), reversed(mask)):
+                    if keep:
+                        code, digit = divmod(code, len(values))
+                        key.append(values[digit])
+                    else:
+                        key.append(ALL)
+                self._add_cell(tuple(reversed(key)), vendors, total)
+
+    def move(self, department, region, source, cents, old_recommendation, new_recommendation):
+        """Move one vendor between recommendations: a delta on the cells that keep
+        the recommendation (the others are unchanged). Emptied cells are dropped."""
+        for mask in _REC_MASKS:
+            for recommendation, vendors, delta in ((old_recommendation, -1, -cents),
+                                                   (new_recommendation, 1, cents)):
+                values = (department, recommendation, region, source)
+                key = tuple(v if keep else ALL for v, keep in zip(values, mask))
+                self._add_cell(key, vendors, delta)
+                if self.cells[key][0] == 0:
+                    del self.cells[key]
+
+    def get(self, department=ALL, recommendation=ALL, region=ALL, source=ALL):
+        """Return (vendors, spend) for one slice; (0, 0) when no vendor falls in it."""
+        vendors, cents = self.cells.get((department, recommendation, region, source), (0, 0))
+        return vendors, from_cents(cents)
+
+    def values(self, dimension):
+        """Distinct non-rolled-up values of a dimension, largest spend first."""
+        i = DIMENSIONS.index(dimension)
+        totals = {}
+        for key, (_, cents) in self.cells.items():
+            if key[i] != ALL and all(k == ALL for j, k in enumerate(key) if j != i):
+                totals[key[i]] = cents
+        return sorted(totals, key=lambda v: -totals[v])
+
+    def save(self, path):
+        """Write the cube to a SQLite file, replacing any previous cube there."""
+        if os.path.exists(path):
+            os.remove(path)
+        conn = sqlite3.connect(path)
+        try:
+            with conn:
+                conn.execute(
+                    "CREATE TABLE cube ("
+                    "department TEXT NOT NULL, recommendation TEXT NOT NULL, "
+                    "region TEXT NOT NULL, source TEXT NOT NULL, "
+                    "vendors INTEGER NOT NULL, spend_cents INTEGER NOT NULL, "
+                    "PRIMARY KEY (department, recommendation, region, source)"
+                    ") WITHOUT ROWID"
+                )
+                conn.executemany(
+                    "INSERT INTO cube VALUES (?, ?, ?, ?, ?, ?)",
+                    (key + (vendors, cents) for key, (vendors, cents) in self.cells.items()),
+                )
+        finally:
+            conn.close()
+
+
+def load_cube(path):
+    """Read a cube written by SpendCube.save() back into memory."""
+    cube = SpendCube()
+    conn = sqlite3.connect(path)
+    try:
+        for *key, vendors, cents in conn.execute("SELECT * FROM cube"):
+            cube.cells[tuple(key)] = [vendors, cents]
+    finally:
+        conn.close()
+    return cube
+
+
+def query_cube(path, department=ALL, recommendation=ALL, region=ALL, source=ALL):
+    """Answer one slice straight from the SQLite file (a primary-key lookup)."""
+    conn = sqlite3.connect(path)
+    try:
+        row = conn.execute(
+            "SELECT vendors, spend_cents FROM cube "
+            "WHERE department = ? AND recommendation = ? AND region = ? AND source = ?",
+            (department, recommendation, region, source),
+        ).fetchone()
+    finally:
+        conn.close()
+    return (row[0], from_cents(row[1])) if row else (0, 0)
+
+
+# =============================================================================
+# PIVOT TAB
+# =============================================================================
+
+def _pivot(cube, dimension, label):
+    recs = [r for r in RECOMMENDATION_ORDER if cube.get(recommendation=r)[0]]
+    recs += [r for r in cube.values("recommendation") if r not in recs]
+    header = ([label] + [f"{r} Spend" for r in recs] + ["Total Spend"]
+              + [f"{r} Vendors" for r in recs] + ["Total Vendors"])
+
+    def row(value):
+        slice_ = {dimension: value} if value != ALL else {}
+        counts = [cube.get(recommendation=r, **slice_) for r in recs]
+        total = cube.get(**slice_)
+        return ([value if value != ALL else "Total"]
+                + [spend for _, spend in counts] + [total[1]]
+                + [vendors for vendors, _ in counts] + [total[0]])
+
+    rows = [row(v) for v in cube.values(dimension)] + [row(ALL)]
+    formats = {i: '"$"#,##0' for i in range(1, len(recs) + 2)}
+    return header, rows, formats
+
+
+def pivot_tables(cube):
+    """Build (header, rows, number_formats) blocks for the Spend Pivot sheet.
+
+    One block per dimension (department, region, source), each broken down by
+    recommendation, followed by a department x region spend matrix.
+    """
+    tables = [
+        _pivot(cube, "department", "Department"),
+        _pivot(cube, "region", "Region"),
+        _pivot(cube, "source", "Classification Source"),
+    ]
+
+    regions = cube.values("region")
+    header = ["Department \\ Region"] + regions + ["Total"]
+    rows = []
+    for dept in cube.values("department") + [ALL]:
+        label = dept if dept != ALL else "Total"
+        rows.append([label] + [cube.get(department=dept, region=r)[1] for r in regions]
+                    + [cube.get(department=dept)[1]])
+    tables.append((header, rows, {i: '"$"#,##0' for i in range(1, len(regions) + 2)}))
+    return tables
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query a saved vendor spend cube.")
+    parser.add_argument("--cube", default="Vendor_Analysis_Cube.sqlite")
+    for dim in DIMENSIONS:
+        parser.add_argument(f"--{dim}", default=ALL, help=f"{dim} value (default: all)")
+    args = parser.parse_args()
+    vendors, spend = query_cube(args.cube, **{dim: getattr(args, dim) for dim in DIMENSIONS})
+    print(f"{vendors} vendors, ${spend:,.2f}")
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Vendor Analysis Daemon
+================================
+Long-running process that keeps the vendor classifier warm (VENDOR_DB,
+openpyxl, the reference features unknown names are scored against and the
+memoized classification cache are loaded once) and accepts jobs over a local
+Unix domain socket. A classify job scores all of its unknown names in one
+batch.
+
+Protocol: one JSON object per line in each direction.
+    {"job": "ping"}
+    {"job": "classify", "names": ["Salesforce Uk Ltd-Uk", "Lusha"]}
+    {"job": "process", "input": "template.xlsx", "output": "completed.xlsx"}
+    {"job": "stats"}
+    {"job": "shutdown"}
+
+Usage:
+    python3 vendor_daemon.py serve
+    python3 vendor_daemon.py classify "Lusha" "Bdo Llp"
+    python3 vendor_daemon.py process --input in.xlsx --output out.xlsx
+    python3 vendor_daemon.py stop
+
+The client side only imports the standard library so that each scheduled job
+pays for little more than interpreter startup and one socket round trip.
+"""
+
+import argparse
+import json
+import os
+import socket
+import sys
+
+DEFAULT_SOCKET_PATH = os.environ.get("VENDOR_DAEMON_SOCKET", "/tmp/vendor_analysis.sock")
+
+
+# =============================================================================
+# SERVER
+# =============================================================================
+
+def serve(socket_path=DEFAULT_SOCKET_PATH):
+    """Load the classifier once and serve jobs on a Unix socket until shut down."""
+    import io
+    import socketserver
+    import threading
+    import time
+
+    import vendor_analysis
+
+    started = time.time()
+    stats = {"jobs": 0, "classified": 0, "processed": 0, "errors": 0}
+    stats_lock = threading.Lock()
+    process_lock = threading.Lock()
+
+    # Build the reference features once and warm the cache with every known
+    # vendor so first requests are hits
+    vendor_analysis.reference_features()
+    vendor_analysis.classify_vendors(vendor_analysis.VENDOR_DB.keys())
+
+    def handle_job(request, server):
+        job = request.get("job")
+        if job == "ping":
+            return {"ok": True}
+
+        if job == "classify":
+            names = request.get("names") or []
+            results = vendor_analysis.classify_vendors(names)
+            with stats_lock:
+                stats["classified"] += len(names)
+            return {
+                "ok": True,
+                "results": [
+                    {"vendor": name, "department": dept, "description": desc,
+                     "recommendation": rec, "source": source}
+                    for name, (dept, desc, rec, source) in zip(names, results)
+                ],
+            }
+
+        if job == "process":
+            input_file = request.get("input", vendor_analysis.DEFAULT_INPUT_FILE)
+            output_file = request.get("output", vendor_analysis.DEFAULT_OUTPUT_FILE)
+            log = io.StringIO()
+            # One run at a time (runs share caches next to their outputs); each
+            # job's progress goes to its own log, not the daemon's stdout
+            with process_lock:
+                summary = vendor_analysis.main(input_file, output_file, log=log)
+            with stats_lock:
+                stats["processed"] += 1
+            return {"ok": True, "summary": summary, "log": log.getvalue()}
+
+        if job == "stats":
+            info = vendor_analysis.classify_cache_info()
+            with stats_lock:
+                snapshot = dict(stats)
+            snapshot.update({
+                "uptime_seconds": round(time.time() - started, 3),
+                "cache_hits": info["hits"],
+                "cache_misses": info["misses"],
+                "cache_size": info["size"],
+            })
+            return {"ok": True, "stats": snapshot}
+
+        if job == "shutdown":
+            threading.Thread(target=server.shutdown, daemon=True).start()
+            return {"ok": True}
+
+        return {"ok": False, "error": f"Unknown job: {job!r}"}
+
+    class JobHandler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                if not line.strip():
+                    continue
+                try:
+                    response = handle_job(json.loads(line), self.server)
+                except Exception as exc:
+                    with stats_lock:
+                        stats["errors"] += 1
+                    response = {"ok": False, "error": f"{type(exc).__name__}: {exc}"}
+                with stats_lock:
+                    stats["jobs"] += 1
+                self.wfile.write((json.dumps(response) + "\n").encode("utf-8"))
+                self.wfile.flush()
+
+    class Server(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+
+    with Server(socket_path, JobHandler) as server:
+        os.chmod(socket_path, 0o600)
+        print(f"Vendor analysis daemon listening on {socket_path} "
+              f"({len(vendor_analysis.VENDOR_DB)} vendors loaded)")
+        try:
+            server.serve_forever()
+        finally:
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+    print("Daemon stopped.")
+
+
+# =============================================================================
+# CLIENT
+# =============================================================================
+
+def send_job(request, socket_path=DEFAULT_SOCKET_PATH, timeout=None):
+    """Send one job to the daemon and return its decoded response."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path)
+        sock.sendall((json.dumps(request) + "\n").encode("utf-8"))
+        with sock.makefile("rb") as f:
+            line = f.readline()
+    if not line:
+        raise ConnectionError("Daemon closed the connection without responding")
+    return json.loads(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Vendor analysis daemon and client")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET_PATH, help="Unix socket path")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("serve", help="Run the daemon in the foreground")
+    classify = sub.add_parser("classify", help="Classify vendor names")
+    classify.add_argument("names", nargs="+")
+    process = sub.add_parser("process", help="Process a workbook")
+    process.add_argument("--input", dest="input_file")
+    process.add_argument("--output", dest="output_file")
+    sub.add_parser("stats", help="Show daemon statistics")
+    sub.add_parser("ping", help="Check that the daemon is running")
+    sub.add_parser("stop", help="Shut the daemon down")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        serve(args.socket)
+        return 0
+
+    if args.command == "classify":
+        request = {"job": "classify", "names": args.names}
+    elif args.command == "process":
+        request = {"job": "process"}
+        if args.input_file:
+            request["input"] = os.path.abspath(args.input_file)
+        if args.output_file:
+            request["output"] = os.path.abspath(args.output_file)
+    elif args.command == "stop":
+        request = {"job": "shutdown"}
+    else:
+        request = {"job": args.command}
+
+    try:
+        response = send_job(request, args.socket)
+    except (FileNotFoundError, ConnectionRefusedError):
+        print(f"No daemon listening on {args.socket} (start one with: vendor_daemon.py serve)",
+              file=sys.stderr)
+        return 2
+
+    if not response.get("ok"):
+        print(f"Error: {response.get('error')}", file=sys.stderr)
+        return 1
+
+    if args.command == "classify":
+        for r in response["results"]:
+            print(f"{r['vendor']}\t{r['department']}\t{r['recommendation']}\t{r['description']}")
+    elif args.command == "process":
+        summary = response["summary"]
+        print(f"Processed {summary['vendors']} vendors "
+              f"(total spend ${summary['total_spend']:,.2f}) -> {summary['output_file']}")
+    elif args.command == "stats":
+        for key, value in response["stats"].items():
+            print(f"{key}: {value}")
+    else:
+        print("ok")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,282 @@
+"""
+Run-to-Run Diff
+================================
+Compares this run's classifications with a previous snapshot (the previous
+run in the history store, or a previous output workbook) by hash-joining on
+the normalized vendor key. Reports:
+
+- New vendors (only in the current run)
+- Vanished vendors (only in the previous snapshot)
+- Reclassifications (department or recommendation changed)
+- Spend changes whose absolute delta is at least a threshold
+
+Spend is compared in integer cents (as recorded in the history store; the
+previous workbook's costs are rounded on read), so deltas are exact and
+converted to dollars only for the Changes sheet and report. Both snapshots
+are read once into / probed against a dict, so the join is linear in the
+number of vendors; only the reported changes are sorted, by
+absolute spend impact. Under a memory budget the snapshots are externally
+sorted by vendor key instead and joined by a sort-merge, with the same
+result.
+"""
+
+import json
+from operator import itemgetter
+
+import openpyxl
+
+from vendor_fx import CONVERTED_COST_HEADER
+from vendor_history import vendor_key
+from vendor_money import from_cents, to_cents
+from vendor_spill import ExternalSorter
+
+DEFAULT_SPEND_THRESHOLD = 1_000
+
+CHANGE_TYPES = ("New", "Vanished", "Reclassified", "Spend Change")
+
+
+# =============================================================================
+# SNAPSHOTS
+# =============================================================================
+
+def build_snapshot(rows):
+    """Build {vendor_key: [vendor, department, recommendation, spend_cents]} from
+    (vendor_key, vendor, department, recommendation, spend_cents) rows.
+
+    Repeated keys are merged: spend is summed and the first classification kept.
+    """
+    snapshot = {}
+    for key, vendor, dept, rec, cents in rows:
+        entry = snapshot.get(key)
+        if entry is None:
+            snapshot[key] = [vendor, dept, rec, cents or 0]
+        else:
+            entry[3] += cents or 0
+    return snapshot
+
+
+def snapshot_from_history(store, run_id):
+    """Snapshot of one recorded run from a HistoryStore."""
+    return build_snapshot(store.run_rows(run_id))
+
+
+def workbook_snapshot_rows(path, sheet_name="Vendor Analysis Assessment"):
+    """Yield snapshot rows from a completed output workbook (streamed read-only),
+    with the costs rounded to cents. A converted cost column, when the workbook
+    has one, is used in place of column C."""
+    wb = openpyxl.load_workbook(path, read_only=True)
+    try:
+        ws = wb[sheet_name]
+        header = next(ws.iter_rows(max_row=1, values_only=True), ())
+        converted = header.index(CONVERTED_COST_HEADER) if CONVERTED_COST_HEADER in header else None
+        width = max(5, (converted or 0) + 1)
+        for values in ws.iter_rows(min_row=2, max_col=width, values_only=True):
+            values = tuple(values) + (None,) * (width - len(values))
+            vendor, dept, cost, _desc, rec = values[:5]
+            if converted is not None:
+                cost = values[converted]
+            if not vendor:
+                continue
+            vendor = str(vendor).strip()
+            yield (vendor_key(vendor), vendor, dept, rec,
+                   to_cents(cost) if isinstance(cost, (int, float)) else 0)
+    finally:
+        wb.close()
+
+
+def snapshot_from_workbook(path):
+    """Snapshot of a previous output workbook."""
+    return build_snapshot(workbook_snapshot_rows(path))
+
+
+# =============================================================================
+# DIFF
+# =============================================================================
+
+def _change(change_type, vendor, prev, cur):
+    prev_cents = prev[3] if prev else 0
+    cur_cents = cur[3] if cur else 0
+    delta = cur_cents - prev_cents
+    # Spend changes matter by how much moved; the others by the spend they touch
+    if change_type == "Spend Change":
+        impact = abs(delta)
+    else:
+        impact = max(abs(prev_cents), abs(cur_cents))
+    return {
+        "change_type": change_type,
+        "vendor": vendor,
+        "previous_department": prev[1] if prev else None,
+        "department": cur[1] if cur else None,
+        "previous_recommendation": prev[2] if prev else None,
+        "recommendation": cur[2] if cur else None,
+        "previous_cents": prev_cents,
+        "cents": cur_cents,
+        "delta_cents": delta,
+        "impact": impact,
+    }
+
+
+def _compare(prev, cur, spend_threshold):
+    """Return the change for a vendor present in both snapshots, or None."""
+    if (prev[1], prev[2]) != (cur[1], cur[2]):
+        return _change("Reclassified", cur[0], prev, cur)
+    if abs(cur[3] - prev[3]) >= to_cents(spend_threshold):
+        return _change("Spend Change", cur[0], prev, cur)
+    return None
+
+
+def change_order(change):
+    """Sort key for reported changes: largest impact first."""
+    return (-change["impact"], change["vendor"], change["change_type"])
+
+
+def diff_snapshots(previous, current, spend_threshold=DEFAULT_SPEND_THRESHOLD):
+    """Hash-join two snapshots and return the list of changes, largest impact first.
+
+    Each change is a dict with change_type, vendor, previous/current department,
+    recommendation and spend cents, delta cents and impact (absolute cents
+    affected); spend_threshold is in dollars. A
+    reclassified vendor whose spend also moved past the threshold is reported
+    once, as a reclassification, with its delta.
+    """
+    changes = []
+    seen = set()
+
+    # Probe the previous snapshot's hash table with each current vendor
+    for key, cur in current.items():
+        prev = previous.get(key)
+        if prev is None:
+            changes.append(_change("New", cur[0], None, cur))
+            continue
+        seen.add(key)
+        change = _compare(prev, cur, spend_threshold)
+        if change:
+            changes.append(change)
+
+    for key, prev in previous.items():
+        if key not in seen:
+            changes.append(_change("Vanished", prev[0], prev, None))
+
+    changes.sort(key=change_order)
+    return changes
+
+
+# =============================================================================
+# DIFF UNDER A MEMORY BUDGET
+# =============================================================================
+
+def sort_snapshot_rows(rows, budget):
+    """Externally sort snapshot rows by vendor key (stable, so duplicates keep row order)."""
+    sorter = ExternalSorter(key=itemgetter(0), budget=budget)
+    sorter.extend(rows)
+    return sorter
+
+
+def _merged(sorted_rows):
+    """Yield (vendor_key, entry) from key-sorted rows, merging duplicates like build_snapshot()."""
+    key = entry = None
+    for row_key, vendor, dept, rec, cents in sorted_rows:
+        if row_key == key:
+            entry[3] += cents or 0
+            continue
+        if entry is not None:
+            yield key, entry
+        key, entry = row_key, [vendor, dept, rec, cents or 0]
+    if entry is not None:
+        yield key, entry
+
+
+def diff_sorted_snapshots(previous_sorted, current_sorted, budget,
+                          spend_threshold=DEFAULT_SPEND_THRESHOLD):
+    """Sort-merge join of two key-sorted snapshots; same changes as diff_snapshots().
+
+    Returns an ExternalSorter yielding the changes largest impact first, so
+    neither the snapshots nor the change list need to fit in memory.
+    """
+    changes = ExternalSorter(key=change_order, budget=budget)
+    previous = _merged(previous_sorted)
+    current = _merged(current_sorted)
+    prev = next(previous, None)
+    cur = next(current, None)
+    while prev is not None or cur is not None:
+        if cur is None or (prev is not None and prev[0] < cur[0]):
+            changes.add(_change("Vanished", prev[1][0], prev[1], None))
+            prev = next(previous, None)
+        elif prev is None or cur[0] < prev[0]:
+            changes.add(_change("New", cur[1][0], None, cur[1]))
+            cur = next(current, None)
+        else:
+            change = _compare(prev[1], cur[1], spend_threshold)
+            if change:
+                changes.add(change)
+            prev = next(previous, None)
+            cur = next(current, None)
+    return changes
+
+
+def summarize_changes(changes):
+    """Return {change_type: {"vendors": n, "delta": spend delta}} for every change type
+    (delta in dollars, summed in cents)."""
+    counts = {t: 0 for t in CHANGE_TYPES}
+    deltas = {t: 0 for t in CHANGE_TYPES}
+    for c in changes:
+        counts[c["change_type"]] += 1
+        deltas[c["change_type"]] += c["delta_cents"]
+    return {t: {"vendors": counts[t], "delta": from_cents(deltas[t])} for t in CHANGE_TYPES}
+
+
+def change_record(change):
+    """A change with its spend in dollars, for the Changes sheet and report."""
+    return {
+        "change_type": change["change_type"],
+        "vendor": change["vendor"],
+        "previous_department": change["previous_department"],
+        "department": change["department"],
+        "previous_recommendation": change["previous_recommendation"],
+        "recommendation": change["recommendation"],
+        "previous_spend": from_cents(change["previous_cents"]),
+        "spend": from_cents(change["cents"]),
+        "delta": from_cents(change["delta_cents"]),
+        "impact": from_cents(change["impact"]),
+    }
+
+
+# =============================================================================
+# OUTPUT
+# =============================================================================
+
+def changes_tables(changes, baseline):
+    """Build (header, rows, number_formats) blocks for the Changes sheet."""
+    summary = summarize_changes(changes)
+    summary_header = ["Change Type", "Vendors", "Spend Delta (USD)", "Compared Against"]
+    summary_rows = [[t, s["vendors"], s["delta"], baseline] for t, s in summary.items()]
+
+    header = ["Change Type", "Vendor", "Previous Department", "Department",
+              "Previous Recommendation", "Recommendation", "Previous Spend (USD)",
+              "Spend (USD)", "Delta (USD)"]
+    rows = (
+        [c["change_type"], c["vendor"], c["previous_department"], c["department"],
+         c["previous_recommendation"], c["recommendation"], from_cents(c["previous_cents"]),
+         from_cents(c["cents"]), from_cents(c["delta_cents"])]
+        for c in changes
+    )
+    money = '"$"#,##0'
+    return [
+        (summary_header, summary_rows, {2: money}),
+        (header, rows, {6: money, 7: money, 8: money}),
+    ]
+
+
+def write_changes_report(changes, baseline, path, spend_threshold=DEFAULT_SPEND_THRESHOLD):
+    """Write the diff as JSON, one change per line, streaming from `changes`."""
+    header = {
+        "compared_against": baseline,
+        "spend_threshold": spend_threshold,
+        "summary": summarize_changes(changes),
+    }
+    with open(path, "w") as f:
+        f.write(json.dumps(header, default=str)[:-1] + ', "changes": [')
+        for index, change in enumerate(changes):
+            f.write(",\n" if index else "\n")
+            f.write(json.dumps(change_record(change), default=str))
+        f.write("\n]}\n")
@@ -0,0 +1,184 @@
+"""
+Multi-Format Export
+================================
+Fan-out of the classified vendor table and the aggregate cube to flat files
+for downstream BI jobs, so they never have to parse the workbook:
+
+- CSV (csv module)
+- JSON Lines (one object per row)
+- Parquet (optional; requires pyarrow, written one row group per batch)
+
+Every sink is a streaming writer: rows are written as they arrive during
+the single pass over the classified rows that also fills the workbook and
+the run history, so adding formats adds no per-row memory.
+"""
+
+import contextlib
+import csv
+import json
+
+from vendor_money import from_cents
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export is optional
+    pa = pq = None
+
+EXPORT_FORMATS = ("csv", "jsonl", "parquet")
+DEFAULT_EXPORT_FORMATS = ("csv", "jsonl")
+PARQUET_ROW_GROUP = 8192
+
+VENDOR_COLUMNS = ("row", "vendor", "spend", "department", "description", "recommendation",
+                  "source", "entity_type", "region", "currency", "amount", "consolidate_into",
+                  "parent")
+AGGREGATE_COLUMNS = ("department", "recommendation", "region", "source", "vendors", "spend")
+
+
+def parse_export_formats(text):
+    """Parse "csv,jsonl,parquet" into a tuple of formats, checking Parquet support."""
+    if text is None:
+        return DEFAULT_EXPORT_FORMATS
+    formats = tuple(f.strip().lower() for f in text.split(",") if f.strip())
+    unknown = [f for f in formats if f not in EXPORT_FORMATS]
+    if unknown:
+        raise ValueError(f"Unknown export format(s): {', '.join(unknown)} "
+                         f"(choose from {', '.join(EXPORT_FORMATS)})")
+    if "parquet" in formats and pa is None:
+        raise ValueError("Parquet export requires pyarrow (pip install pyarrow)")
+    return formats
+
+
+def vendor_record(row, consolidate_into=None, parent=None):
+    """Flat export record for one classified VendorRow.
+
+    spend is in the reporting currency; amount is the cost as read, in currency.
+    """
+    return (row.row_idx, row.vendor, from_cents(row.cents), row.dept, row.desc, row.rec,
+            row.source, row.entity_type, row.region, row.currency, row.cost, consolidate_into,
+            parent)
+
+
+# =============================================================================
+# SINKS
+# =============================================================================
+
+class CsvSink:
+    def __init__(self, path, columns):
+        self.path = path
+        self._f = open(path, "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._f)
+        self._writer.writerow(columns)
+
+    def write(self, record):
+        self._writer.writerow(record)
+
+    def close(self):
+        self._f.close()
+
+
+class JsonLinesSink:
+    def __init__(self, path, columns):
+        self.path = path
+        self.columns = columns
+        self._f = open(path, "w", encoding="utf-8")
+
+    def write(self, record):
+        self._f.write(json.dumps(dict(zip(self.columns, record)), ensure_ascii=False))
+        self._f.write("\n")
+
+    def close(self):
+        self._f.close()
+
+
+class ParquetSink:
+    """Buffers one row group at a time and appends it to a ParquetWriter."""
+
+    def __init__(self, path, columns, types):
+        self.path = path
+        self.columns = columns
+        self.schema = pa.schema([(name, t) for name, t in zip(columns, types)])
+        self._writer = pq.ParquetWriter(path, self.schema)
+        self._buffer = [[] for _ in columns]
+        self._buffered = 0
+
+    def write(self, record):
+        for values, value in zip(self._buffer, record):
+            values.append(value)
+        self._buffered += 1
+        if self._buffered >= PARQUET_ROW_GROUP:
+            self._flush()
+
+    def _flush(self):
+        if self._buffered:
+            arrays = [pa.array(values, type=field.type)
+                      for values, field in zip(self._buffer, self.schema)]
+            self._writer.write_table(pa.Table.from_arrays(arrays, schema=self.schema))
+            self._buffer = [[] for _ in self.columns]
+            self._buffered = 0
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+
+
+def _parquet_types(columns):
+    numeric = {"row": pa.int64(), "vendors": pa.int64(), "spend": pa.float64(),
+               "amount": pa.float64()}
+    return [numeric.get(name, pa.string()) for name in columns]
+
+
+def open_sinks(paths, columns):
+    """Open one sink per {format: path} entry. If one fails to open, the sinks
+    already opened are closed before the error propagates."""
+    sinks = []
+    with contextlib.ExitStack() as opened:
+        for fmt, path in paths.items():
+            if fmt == "csv":
+                sink = CsvSink(path, columns)
+            elif fmt == "jsonl":
+                sink = JsonLinesSink(path, columns)
+            elif fmt == "parquet":
+                sink = ParquetSink(path, columns, _parquet_types(columns))
+            else:
+                continue
+            opened.callback(sink.close)
+            sinks.append(sink)
+        opened.pop_all()
+    return sinks
+
+
+# =============================================================================
+# FAN-OUT
+# =============================================================================
+
+class FanOutWriter:
+    """Writes each record to every open sink; use as a context manager."""
+
+    def __init__(self, sinks):
+        self.sinks = sinks
+        self.records = 0
+
+    def write(self, record):
+        for sink in self.sinks:
+            sink.write(record)
+        self.records += 1
+
+    def close(self):
+        # Every sink is closed even if closing an earlier one fails
+        with contextlib.ExitStack() as stack:
+            for sink in self.sinks:
+                stack.callback(sink.close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_aggregates(cube, paths):
+    """Export every cube cell (with roll-ups, "*" = all) to each format."""
+    with FanOutWriter(open_sinks(paths, AGGREGATE_COLUMNS)) as out:
+        for key, (vendors, cents) in cube.cells.items():
+            out.write(key + (vendors, from_cents(cents)))
@@ -0,0 +1,146 @@
+"""
+Currency Normalization
+================================
+Converts vendor spend to the reporting currency with a local table of
+monthly FX rates (no network access). The rate file is a CSV:
+
+    month,currency,rate
+    2025-01,GBP,1.2648
+    2025-01,EUR,1.0354
+
+where rate is reporting-currency units per one unit of `currency`, and
+month is YYYY-MM (the first of the month) or a full YYYY-MM-DD date.
+
+The table is held as one sorted int64 array of (currency, day) keys with a
+parallel float64 array of rates, so a whole batch of rows is converted with
+a single np.searchsorted: each row gets the latest rate on or before its
+as-of date. A row's currency is the input's Currency column when present,
+otherwise the currency of its inferred region. A currency or date the table
+has no rate for raises MissingRateError, naming the first such row.
+"""
+
+import csv
+
+import numpy as np
+
+from vendor_money import cents_array
+
+REPORTING_CURRENCY = "USD"
+# Assessment column holding each row's converted amount when a rate file is used
+CONVERTED_COST_HEADER = "Converted Cost (USD)"
+
+# Currency of an entity's jurisdiction (see vendor_regions); others report as-is
+REGION_CURRENCIES = {
+    "United States": "USD",
+    "United Kingdom": "GBP",
+    "Ireland": "EUR",
+    "Croatia": "EUR",  # since 2023-01-01; older HRK spend needs a Currency column
+    "India": "INR",
+    "Singapore": "SGD",
+    "Australia": "AUD",
+    "Germany": "EUR",
+    "Netherlands": "EUR",
+    "Italy": "EUR",
+    "France": "EUR",
+    "Spain": "EUR",
+    "Finland": "EUR",
+    "Sweden": "SEK",
+    "Denmark": "DKK",
+}
+
+# Keys are (currency code << 32) | (day + _DAY_OFFSET); days count from 1970-01-01
+_DAY_OFFSET = 1 << 31
+_LATEST = (1 << 32) - 1
+
+
+def _day(date):
+    """Offset day number of a date, datetime or ISO string (YYYY-MM counts as the 1st)."""
+    return int(np.datetime64(date, "D").astype(np.int64)) + _DAY_OFFSET
+
+
+class MissingRateError(ValueError):
+    """No rate for a row's currency on or before its as-of date; index is the
+    position of the first such row in the batch."""
+
+    def __init__(self, message, index):
+        super().__init__(message)
+        self.index = index
+
+
+def currency_for_region(region, reporting=REPORTING_CURRENCY):
+    return REGION_CURRENCIES.get(region, reporting)
+
+
+class FxTable:
+    """Monthly FX rates to one reporting currency, as sorted arrays for as-of lookups."""
+
+    def __init__(self, entries, reporting=REPORTING_CURRENCY, source=None):
+        """entries: iterable of (date, currency, rate)."""
+        self.reporting = reporting
+        self.source = source
+        self.currencies = {}
+        keys, rates = [], []
+        for date, currency, rate in entries:
+            currency = currency.strip().upper()
+            rate = float(rate)
+            if rate <= 0:
+                raise ValueError(f"Non-positive {currency} rate {rate} for {date} in {source}")
+            code = self.currencies.setdefault(currency, len(self.currencies))
+            keys.append((code << 32) | _day(date))
+            rates.append(rate)
+        order = np.argsort(np.asarray(keys, dtype=np.int64), kind="stable")
+        self.keys = np.asarray(keys, dtype=np.int64)[order]
+        self.rates = np.asarray(rates, dtype=np.float64)[order]
+        if len(self.keys) and (np.diff(self.keys) == 0).any():
+            raise ValueError(f"Duplicate currency/month rates in {source}")
+
+    @classmethod
+    def load(cls, path, reporting=REPORTING_CURRENCY):
+        """Read a month,currency,rate CSV."""
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            date_field = "month" if "month" in (reader.fieldnames or ()) else "date"
+            entries = [(row[date_field].strip(), row["currency"], row["rate"]) for row in reader]
+        return cls(entries, reporting, source=path)
+
+    def rates_for(self, currencies, as_of=None):
+        """Vectorized as-of lookup: the rate for each currency on or before as_of.
+
+        as_of is one date for every row, a sequence of per-row dates, or None
+        for the latest rate in the table.
+        """
+        n = len(currencies)
+        codes = np.fromiter((self.currencies.get(c, -1) for c in currencies),
+                            dtype=np.int64, count=n)
+        native = np.fromiter((c == self.reporting for c in currencies), dtype=bool, count=n)
+        unknown = (codes < 0) & ~native
+        if unknown.any():
+            i = int(np.argmax(unknown))
+            raise MissingRateError(
+                f"No {currencies[i]} rates in {self.source or 'the FX table'}", i)
+
+        if as_of is None:
+            days = np.full(n, _LATEST, dtype=np.int64)
+        elif isinstance(as_of, (list, tuple, np.ndarray)):
+            days = np.asarray(as_of, dtype="datetime64[D]").astype(np.int64) + _DAY_OFFSET
+        else:
+            days = np.full(n, _day(as_of), dtype=np.int64)
+
+        codes = np.where(native, 0, codes)
+        index = np.searchsorted(self.keys, (codes << 32) | days, side="right") - 1
+        found = index >= 0
+        found[found] = (self.keys[index[found]] >> 32) == codes[found]
+        missing = ~found & ~native
+        if missing.any():
+            i = int(np.argmax(missing))
+            day = np.datetime64(int(days[i]) - _DAY_OFFSET, "D") if as_of is not None else "now"
+            raise MissingRateError(f"No {currencies[i]} rate on or before {day} "
+                                   f"in {self.source or 'the FX table'}", i)
+        rates = np.ones(n, dtype=np.float64)
+        rates[~native] = self.rates[index[~native]]
+        return rates
+
+    def convert(self, currencies, amounts, as_of=None):
+        """Convert amounts in the given currencies to int64 reporting-currency cents."""
+        return cents_array(np.asarray(amounts, dtype=np.float64)
+                           * self.rates_for(currencies, as_of))
@@ -0,0 +1,282 @@
+"""
+Vendor Hierarchy
+================================
+Parent/child relationships between vendor entities (regional subsidiaries,
+member firms of accounting networks, acquired companies) loaded from a
+vendor,parent CSV (vendor_parents.csv by default):
+
+    vendor,parent
+    Bdo Llp,BDO UK
+    BDO UK,BDO International
+
+The hierarchy is kept as a precomputed transitive closure: one
+(ancestor, descendant, depth) pair for every node and each of its
+ancestors, itself included at depth 0. Rolling spend up to every parent at
+every level is then a single grouped sum over the closure pairs, and the
+closure and roll-ups are saved next to the spend cube keyed on the
+parent, so "total spend under BDO International" is one primary-key
+lookup:
+
+    python vendor_hierarchy.py "BDO International"
+    python vendor_hierarchy.py "Amazon" --children
+"""
+
+import argparse
+import csv
+import os
+import sqlite3
+
+import numpy as np
+
+from vendor_history import vendor_key
+from vendor_money import from_cents, group_sum
+
+DEFAULT_PARENTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                    "vendor_parents.csv")
+DEFAULT_CUBE_FILE = "Vendor_Analysis_Cube.sqlite"
+
+_SCHEMA = """
+CREATE TABLE vendor_closure (
+    ancestor_key TEXT NOT NULL,
+    descendant_key TEXT NOT NULL,
+    descendant TEXT NOT NULL,
+    depth INTEGER NOT NULL,
+    PRIMARY KEY (ancestor_key, descendant_key)
+);
+CREATE INDEX idx_vendor_closure_descendant ON vendor_closure (descendant_key);
+CREATE TABLE parent_rollup (
+    parent_key TEXT PRIMARY KEY,
+    parent TEXT NOT NULL,
+    level INTEGER NOT NULL,
+    vendors INTEGER NOT NULL,
+    spend_cents INTEGER NOT NULL
+);
+"""
+
+
+class VendorHierarchy:
+    """Vendor parent/child forest with its transitive closure as parallel arrays."""
+
+    def __init__(self, edges=(), source=None):
+        """edges: iterable of (vendor, parent) names."""
+        self.source = source
+        self.names = {}
+        self.parents = {}
+        for child, parent in edges:
+            child_key, parent_key = vendor_key(child), vendor_key(parent)
+            if child_key == parent_key:
+                raise ValueError(f"{child!r} is its own parent in {source}")
+            if self.parents.get(child_key, parent_key) != parent_key:
+                raise ValueError(f"{child!r} has more than one parent in {source}")
+            self.names.setdefault(child_key, child.strip())
+            self.names.setdefault(parent_key, parent.strip())
+            self.parents[child_key] = parent_key
+
+        # Closure: walk up from every node once
+        self.keys = list(self.names)
+        self._index = {key: i for i, key in enumerate(self.keys)}
+        ancestors, descendants, depths = [], [], []
+        self._roots = {}
+        for key in self.keys:
+            node, depth, seen = key, 0, {key}
+            while True:
+                ancestors.append(self._index[node])
+                descendants.append(self._index[key])
+                depths.append(depth)
+                parent = self.parents.get(node)
+                if parent is None:
+                    break
+                if parent in seen:
+                    raise ValueError(f"Cycle through {self.names[parent]!r} in {source}")
+                seen.add(parent)
+                node, depth = parent, depth + 1
+            self._roots[key] = node
+        self.ancestor = np.asarray(ancestors, dtype=np.int64)
+        self.descendant = np.asarray(descendants, dtype=np.int64)
+        self.depth = np.asarray(depths, dtype=np.int64)
+        # A node's level is its depth below its root (0 = global parent)
+        self.level = np.zeros(len(self.keys), dtype=np.int64)
+        np.maximum.at(self.level, self.descendant, self.depth)
+
+    @classmethod
+    def load(cls, path=DEFAULT_PARENTS_FILE):
+        """Read a vendor,parent CSV."""
+        with open(path, newline="", encoding="utf-8") as f:
+            edges = [(row["vendor"], row["parent"]) for row in csv.DictReader(f)
+                     if row["vendor"] and row["parent"]]
+        return cls(edges, source=path)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def root(self, vendor_name):
+        """Top-level parent of a vendor, or None if it has no parent."""
+        key = vendor_key(vendor_name)
+        if key not in self.parents:
+            return None
+        return self.names[self._roots[key]]
+
+    def is_parent(self):
+        """Boolean array over nodes: True for nodes that have children."""
+        flags = np.zeros(len(self.keys), dtype=bool)
+        flags[[self._index[p] for p in self.parents.values()]] = True
+        return flags
+
+
+def load_hierarchy(parents_file=None):
+    """Stage: the VendorHierarchy from parents_file (empty without one)."""
+    if not parents_file or not os.path.exists(parents_file):
+        return VendorHierarchy()
+    return VendorHierarchy.load(parents_file)
+
+
+# =============================================================================
+# ROLL-UPS
+# =============================================================================
+
+class ParentRollup:
+    """Spend and entity counts under every parent, at every level."""
+
+    def __init__(self, hierarchy, vendors, cents):
+        self.hierarchy = hierarchy
+        self.vendors = vendors
+        self.cents = cents
+
+    def parent_of(self, row):
+        """Top-level parent of a VendorRow's vendor, or None."""
+        return self.hierarchy.root(row.vendor)
+
+    def spend_cents(self, parent_name):
+        i = self.hierarchy._index.get(vendor_key(parent_name))
+        return int(self.cents[i]) if i is not None else 0
+
+    def parents(self):
+        """Node indexes of parents with spend under them, in tree order: roots by
+        spend, each followed by its child parents (again by spend)."""
+        h = self.hierarchy
+        shown = h.is_parent() & (self.vendors > 0)
+        children = {}
+        for child, parent in h.parents.items():
+            children.setdefault(h._index[parent], []).append(h._index[child])
+        roots = [i for i in np.flatnonzero(shown).tolist() if h.keys[i] not in h.parents]
+
+        order = []
+
+        def visit(nodes):
+            for i in sorted(nodes, key=lambda i: (-int(self.cents[i]), h.names[h.keys[i]])):
+                if shown[i]:
+                    order.append(i)
+                    visit(children.get(i, ()))
+
+        visit(roots)
+        return order
+
+    @property
+    def grouped_cents(self):
+        """Spend of the vendors that have a parent (all under some root)."""
+        h = self.hierarchy
+        roots = [i for i in np.flatnonzero(h.is_parent()).tolist() if h.keys[i] not in h.parents]
+        return int(self.cents[roots].sum()) if roots else 0
+
+    def tables(self):
+        """Build (header, rows, number_formats) blocks for the Parent Summary sheet."""
+        h = self.hierarchy
+        rows = []
+        for i in self.parents():
+            key = h.keys[i]
+            parent = h.parents.get(key)
+            rows.append(["    " * int(h.level[i]) + h.names[key], int(h.level[i]),
+                         h.names[parent] if parent else None, int(self.vendors[i]),
+                         from_cents(int(self.cents[i]))])
+        return [(["Parent", "Level", "Belongs To", "Entities", "Spend"], rows,
+                 {4: '"$"#,##0'})]
+
+    def save(self, path):
+        """Add the closure and roll-up tables to a saved cube file (see vendor_cube)."""
+        h = self.hierarchy
+        conn = sqlite3.connect(path)
+        try:
+            conn.executescript(
+                "DROP TABLE IF EXISTS vendor_closure; DROP TABLE IF EXISTS parent_rollup;"
+                + _SCHEMA
+            )
+            conn.executemany(
+                "INSERT INTO vendor_closure VALUES (?, ?, ?, ?)",
+                zip((h.keys[a] for a in h.ancestor.tolist()),
+                    (h.keys[d] for d in h.descendant.tolist()),
+                    (h.names[h.keys[d]] for d in h.descendant.tolist()), h.depth.tolist()),
+            )
+            conn.executemany(
+                "INSERT INTO parent_rollup VALUES (?, ?, ?, ?, ?)",
+                ((h.keys[i], h.names[h.keys[i]], int(h.level[i]), int(self.vendors[i]),
+                  int(self.cents[i])) for i in np.flatnonzero(h.is_parent()).tolist()),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+
+def roll_up(rows, hierarchy):
+    """Stage: ParentRollup of the rows' spend through the hierarchy's closure."""
+    nodes, cents = [], []
+    for row in rows:
+        i = hierarchy._index.get(vendor_key(row.vendor))
+        if i is not None:
+            nodes.append(i)
+            cents.append(row.cents)
+    n = len(hierarchy)
+    nodes = np.asarray(nodes, dtype=np.int64)
+    leaf_cents = group_sum(nodes, np.asarray(cents, dtype=np.int64), n)
+    leaf_vendors = np.bincount(nodes, minlength=n)
+    # Every (ancestor, descendant) pair carries the descendant's own spend up
+    totals = group_sum(hierarchy.ancestor, leaf_cents[hierarchy.descendant], n)
+    vendors = group_sum(hierarchy.ancestor, leaf_vendors[hierarchy.descendant], n)
+    return ParentRollup(hierarchy, vendors, totals)
+
+
+# =============================================================================
+# QUERIES
+# =============================================================================
+
+def query_parent(path, parent):
+    """(level, entities, spend) under one parent from a saved cube file, or None."""
+    conn = sqlite3.connect(path)
+    try:
+        row = conn.execute(
+            "SELECT level, vendors, spend_cents FROM parent_rollup WHERE parent_key = ?",
+            (vendor_key(parent),),
+        ).fetchone()
+    finally:
+        conn.close()
+    return (row[0], row[1], from_cents(row[2])) if row else None
+
+
+def query_children(path, parent):
+    """[(depth, entity)] under one parent from a saved cube file."""
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute(
+            "SELECT depth, descendant FROM vendor_closure "
+            "WHERE ancestor_key = ? AND depth > 0 ORDER BY depth, descendant_key",
+            (vendor_key(parent),),
+        ).fetchall()
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query vendor parent roll-ups in a saved cube.")
+    parser.add_argument("parent")
+    parser.add_argument("--cube", default=DEFAULT_CUBE_FILE)
+    parser.add_argument("--children", action="store_true",
+                        help="Also list every entity under the parent")
+    args = parser.parse_args()
+    result = query_parent(args.cube, args.parent)
+    if result is None:
+        print(f"No parent {args.parent!r} in {args.cube}")
+    else:
+        level, vendors, spend = result
+        print(f"{args.parent} (level {level}): {vendors} entities, ${spend:,.2f}")
+        if args.children:
+            for depth, name in query_children(args.cube, args.parent):
+                print(f"  {'  ' * (depth - 1)}{name}")
@@ -0,0 +1,293 @@
+"""
+Classification History
+================================
+Append-only SQLite record of every run's per-vendor classification, spend
+(integer cents, like the rest of the analysis; see vendor_money) and source. Runs are never updated or deleted; each one adds a row to `runs`
+and one row per vendor to `classifications`, written in a single
+transaction.
+
+Each run also stores a digest of its classification rows, so callers can
+tell whether the latest run matches an earlier one without reading it back
+(see vendor_analysis.main, which keys its run cache on the diff baseline).
+
+Indexes on (vendor_key, run_id) and run_id keep per-vendor history and
+per-run lookups to index range scans however many runs accumulate:
+
+    python vendor_history.py runs
+    python vendor_history.py changes "Lusha"
+    python vendor_history.py trend "Lusha" --last 24
+"""
+
+import argparse
+import hashlib
+import re
+import sqlite3
+from datetime import datetime, timezone
+
+from vendor_money import from_cents
+
+DEFAULT_HISTORY_FILE = "Vendor_Analysis_History.sqlite"
+INSERT_BATCH_SIZE = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_at TEXT NOT NULL,
+    input_file TEXT,
+    output_file TEXT,
+    vendors INTEGER,
+    total_cents INTEGER,
+    digest TEXT
+);
+CREATE TABLE IF NOT EXISTS classifications (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id),
+    vendor_key TEXT NOT NULL,
+    vendor TEXT NOT NULL,
+    department TEXT,
+    description TEXT,
+    recommendation TEXT,
+    source TEXT,
+    region TEXT,
+    spend_cents INTEGER,
+    currency TEXT,
+    amount REAL
+);
+CREATE INDEX IF NOT EXISTS idx_classifications_vendor ON classifications (vendor_key, run_id);
+CREATE INDEX IF NOT EXISTS idx_classifications_run ON classifications (run_id);
+"""
+
+# Columns added after the first release; older history files gain them on open
+_ADDED_COLUMNS = {
+    "runs": (("digest", "TEXT"), ("total_cents", "INTEGER")),
+    "classifications": (("currency", "TEXT"), ("amount", "REAL"), ("spend_cents", "INTEGER")),
+}
+# Dollar columns of older history files, converted once into the cents columns
+_LEGACY_COLUMNS = {("runs", "total_cents"): "total_spend",
+                   ("classifications", "spend_cents"): "spend"}
+_CLASSIFICATION_COLUMNS = ("vendor_key, vendor, department, description, recommendation, "
+                           "source, region, spend_cents, currency, amount")
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def vendor_key(vendor_name):
+    """Case- and whitespace-insensitive key so the same vendor matches across runs."""
+    return _WHITESPACE.sub(" ", vendor_name.strip().lower())
+
+
+# =============================================================================
+# STORE
+# =============================================================================
+
+class HistoryStore:
+    """Append-only run history in a SQLite file."""
+
+    def __init__(self, path=DEFAULT_HISTORY_FILE):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(_SCHEMA)
+        for table, columns in _ADDED_COLUMNS.items():
+            existing = {row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")}
+            for name, sql_type in columns:
+                if name not in existing:
+                    self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {sql_type}")
+                    legacy = _LEGACY_COLUMNS.get((table, name))
+                    if legacy in existing:
+                        self.conn.execute(
+                            f"UPDATE {table} SET {name} = CAST(ROUND({legacy} * 100) AS INTEGER)"
+                        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def begin_run(self, input_file=None, output_file=None, run_at=None):
+        """Open a transaction for a new run and return its RunRecorder."""
+        return RunRecorder(self, input_file, output_file, run_at)
+
+    # -------------------------------------------------------------------------
+    # Queries
+    # -------------------------------------------------------------------------
+
+    def runs(self):
+        """Return [(run_id, run_at, vendors, total_spend)], oldest first."""
+        return [(run_id, run_at, vendors, from_cents(total_cents or 0))
+                for run_id, run_at, vendors, total_cents in self.conn.execute(
+                    "SELECT run_id, run_at, vendors, total_cents FROM runs ORDER BY run_id")]
+
+    def latest_run(self):
+        """Return (run_id, digest) of the last completed run, or None."""
+        return self.conn.execute(
+            "SELECT run_id, digest FROM runs WHERE vendors IS NOT NULL "
+            "ORDER BY run_id DESC LIMIT 1"
+        ).fetchone()
+
+    def repeat_run(self, run_id, digest, input_file=None, output_file=None, run_at=None):
+        """Record a new run with the same classifications as run_id (a run restored
+        from a cache). Returns the new run id, or None if run_id is not in the
+        store with that digest."""
+        row = self.conn.execute(
+            "SELECT vendors, total_cents FROM runs WHERE run_id = ? AND digest = ?",
+            (run_id, digest),
+        ).fetchone()
+        if row is None:
+            return None
+        run_at = run_at or datetime.now(timezone.utc).isoformat(timespec="seconds")
+        with self.conn:
+            new_id = self.conn.execute(
+                "INSERT INTO runs (run_at, input_file, output_file, vendors, total_cents, digest) "
+                "VALUES (?, ?, ?, ?, ?, ?)", (run_at, input_file, output_file, *row, digest),
+            ).lastrowid
+            self.conn.execute(
+                f"INSERT INTO classifications (run_id, {_CLASSIFICATION_COLUMNS}) "
+                f"SELECT ?, {_CLASSIFICATION_COLUMNS} FROM classifications WHERE run_id = ? "
+                f"ORDER BY rowid", (new_id, run_id),
+            )
+        return new_id
+
+    def previous_run_id(self, run_id):
+        """Return the run recorded just before run_id, or None."""
+        row = self.conn.execute(
+            "SELECT MAX(run_id) FROM runs WHERE run_id < ? AND vendors IS NOT NULL", (run_id,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def run_rows(self, run_id):
+        """Yield (vendor_key, vendor, department, recommendation, spend_cents) for one run."""
+        yield from self.conn.execute(
+            "SELECT vendor_key, vendor, department, recommendation, spend_cents "
+            "FROM classifications WHERE run_id = ?", (run_id,)
+        )
+
+    def vendor_history(self, vendor_name, last=None):
+        """Return one dict per run that saw the vendor, oldest first (the last N runs if given)."""
+        sql = (
+            "SELECT c.run_id, r.run_at, c.vendor, c.department, c.recommendation, "
+            "c.source, c.region, c.spend_cents "
+            "FROM classifications c JOIN runs r ON r.run_id = c.run_id "
+            "WHERE c.vendor_key = ? ORDER BY c.run_id DESC"
+        )
+        params = [vendor_key(vendor_name)]
+        if last:
+            sql += " LIMIT ?"
+            params.append(last)
+        cols = ("run_id", "run_at", "vendor", "department", "recommendation",
+                "source", "region")
+        rows = [dict(zip(cols, row[:-1]), spend=from_cents(row[-1] or 0))
+                for row in self.conn.execute(sql, params)]
+        rows.reverse()
+        return rows
+
+    def recommendation_changes(self, vendor_name):
+        """Return the runs where the vendor's recommendation or department changed."""
+        changes = []
+        previous = None
+        for entry in self.vendor_history(vendor_name):
+            if previous is None or (entry["recommendation"], entry["department"]) != (
+                    previous["recommendation"], previous["department"]):
+                changes.append({
+                    "run_id": entry["run_id"],
+                    "run_at": entry["run_at"],
+                    "department": entry["department"],
+                    "recommendation": entry["recommendation"],
+                    "previous_department": previous and previous["department"],
+                    "previous_recommendation": previous and previous["recommendation"],
+                })
+            previous = entry
+        return changes
+
+    def spend_trend(self, vendor_name, last=24):
+        """Return [(run_at, spend)] for the vendor over its last N runs."""
+        return [(e["run_at"], e["spend"]) for e in self.vendor_history(vendor_name, last)]
+
+
+class RunRecorder:
+    """Buffers one run's rows and inserts them in batches inside a single transaction."""
+
+    def __init__(self, store, input_file, output_file, run_at):
+        self.conn = store.conn
+        self.conn.execute("BEGIN")
+        run_at = run_at or datetime.now(timezone.utc).isoformat(timespec="seconds")
+        self.run_id = self.conn.execute(
+            "INSERT INTO runs (run_at, input_file, output_file) VALUES (?, ?, ?)",
+            (run_at, input_file, output_file),
+        ).lastrowid
+        self.vendors = 0
+        self.total_cents = 0
+        self._digest = hashlib.sha256()
+        self._pending = []
+
+    def add(self, row):
+        """Record one classified VendorRow (spend in cents of the reporting currency,
+        and the amount as read with its currency)."""
+        values = (vendor_key(row.vendor), row.vendor, row.dept, row.desc, row.rec,
+                  row.source, row.region, row.cents, row.currency, row.cost)
+        self._pending.append((self.run_id, *values))
+        self._digest.update(repr(values).encode())
+        self.vendors += 1
+        self.total_cents += row.cents
+        if len(self._pending) >= INSERT_BATCH_SIZE:
+            self._flush()
+
+    def _flush(self):
+        self.conn.executemany(
+            f"INSERT INTO classifications (run_id, {_CLASSIFICATION_COLUMNS}) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", self._pending
+        )
+        self._pending = []
+
+    @property
+    def digest(self):
+        """SHA-256 of the rows recorded so far."""
+        return self._digest.hexdigest()
+
+    def commit(self):
+        self._flush()
+        self.conn.execute(
+            "UPDATE runs SET vendors = ?, total_cents = ?, digest = ? WHERE run_id = ?",
+            (self.vendors, self.total_cents, self.digest, self.run_id),
+        )
+        self.conn.commit()
+        return self.run_id
+
+    def rollback(self):
+        self._pending = []
+        self.conn.rollback()
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query the vendor classification history.")
+    parser.add_argument("--history", default=DEFAULT_HISTORY_FILE)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("runs", help="list recorded runs")
+    changes_p = sub.add_parser("changes", help="runs where a vendor's classification changed")
+    changes_p.add_argument("vendor")
+    trend_p = sub.add_parser("trend", help="spend for a vendor across runs")
+    trend_p.add_argument("vendor")
+    trend_p.add_argument("--last", type=int, default=24)
+    args = parser.parse_args()
+
+    with HistoryStore(args.history) as store:
+        if args.command == "runs":
+            for run_id, run_at, vendors, total_spend in store.runs():
+                print(f"{run_id:>5}  {run_at}  {vendors or 0:>6} vendors  ${total_spend:,.2f}")
+        elif args.command == "changes":
+            for c in store.recommendation_changes(args.vendor):
+                before = (f"{c['previous_department']}/{c['previous_recommendation']} -> "
+                          if c["previous_recommendation"] else "")
+                print(f"run {c['run_id']} ({c['run_at']}): "
+                      f"{before}{c['department']}/{c['recommendation']}")
+        else:
+            for run_at, spend in store.spend_trend(args.vendor, args.last):
+                print(f"{run_at}  ${spend:,.2f}")
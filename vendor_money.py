@@ -0,0 +1,72 @@
+"""
+Fixed-Point Money
+================================
+Spend is converted to integer cents as rows are normalized, and every sum,
+share and savings figure from there on is integer arithmetic: per-batch
+int64 arrays for the grouped totals, Python ints where a product could
+overflow 64 bits. Amounts become floats or text only when they are written
+out, so totals reconcile to the cent however many rows are added and in
+whatever order.
+
+Conversion rounds half away from zero on the float value read from the
+workbook.
+"""
+
+import numpy as np
+
+CENTS_PER_UNIT = 100
+
+
+def to_cents(amount):
+    """Round one amount to integer cents."""
+    if not amount:
+        return 0
+    cents = int(abs(amount) * CENTS_PER_UNIT + 0.5)
+    return -cents if amount < 0 else cents
+
+
+def cents_array(amounts):
+    """Round a sequence of amounts to a contiguous int64 array of cents."""
+    values = np.asarray(amounts, dtype=np.float64)
+    cents = np.floor(np.abs(values) * CENTS_PER_UNIT + 0.5)
+    return np.copysign(cents, values).astype(np.int64)
+
+
+def from_cents(cents):
+    """Amount in currency units, for output."""
+    return cents / CENTS_PER_UNIT
+
+
+def format_cents(cents):
+    """Exact "$1,234.56" text for an integer number of cents."""
+    units, rest = divmod(abs(int(cents)), CENTS_PER_UNIT)
+    return f"{'-' if cents < 0 else ''}${units:,}.{rest:02d}"
+
+
+# =============================================================================
+# GROUPED SUMS
+# =============================================================================
+
+def encode(values):
+    """Dictionary-encode a list: (int64 codes, distinct values in first-seen order)."""
+    index = {}
+    codes = np.fromiter((index.setdefault(v, len(index)) for v in values),
+                        dtype=np.int64, count=len(values))
+    return codes, list(index)
+
+
+def group_sum(codes, cents, groups):
+    """Exact int64 sum of cents per group code (0 .. groups - 1)."""
+    totals = np.zeros(groups, dtype=np.int64)
+    np.add.at(totals, codes, cents)
+    return totals
+
+
+def sum_of_squares(cents):
+    """Exact sum of squared cents as a Python int."""
+    if not len(cents):
+        return 0
+    peak = int(np.abs(cents).max())
+    if peak * peak * len(cents) < 2 ** 63:
+        return int(np.dot(cents, cents))
+    return sum(c * c for c in cents.tolist())
@@ -0,0 +1,323 @@
+"""
+Functional Overlap
+================================
+Finds groups of vendors offering near-identical services from their
+Description column (VENDOR_DB descriptions and generated ones alike), so
+overlaps across departments surface without grouping vendors by hand:
+
+    "Management consulting and strategic advisory services"   (Professional Services)
+    "Management consulting and advisory services in Croatia"  (M&A)
+
+Each description is normalized (lowercase, parenthesized vendor names and
+STOP_WORDS dropped) and cut into SHINGLE_SIZE-character shingles. A MinHash
+signature of NUM_PERMUTATIONS multiply-shift hashes estimates the Jaccard
+similarity of two shingle sets, and locality-sensitive hashing over BANDS
+bands of ROWS_PER_BAND values finds the candidate pairs without comparing
+every pair: descriptions that share a band bucket are linked to their
+neighbour in the bucket when their estimated similarity is at least
+SIMILARITY_THRESHOLD, and the linked components are the overlap groups.
+
+Identical descriptions are signed once, and every step is a sort, grouped
+minimum or grouped sum over NumPy arrays, so the work grows with the
+number of distinct descriptions times the signature length (near-linear at
+100k vendors).
+
+OverlapIndex keeps the signatures, band buckets and components of a fixed
+reference set, so single vendors (the daemon and service classify one name
+at a time) are placed in their group without redoing the reference set.
+"""
+
+import re
+import zlib
+from itertools import chain
+
+import numpy as np
+
+from vendor_money import encode, from_cents, group_sum
+
+SHINGLE_SIZE = 4
+BANDS = 20
+ROWS_PER_BAND = 3
+NUM_PERMUTATIONS = BANDS * ROWS_PER_BAND
+SIMILARITY_THRESHOLD = 0.5
+# Overlap groups reported (and fed to the rules) must span this many departments
+MIN_DEPARTMENTS = 2
+
+STOP_WORDS = frozenset((
+    "a", "an", "and", "by", "company", "for", "in", "of", "on", "or", "provider", "providers",
+    "service", "services", "the", "to", "with",
+))
+
+_SEED = 0x5EED_0F_0E71A9
+_BLOCK_PAIRS = 1 << 16
+_EMPTY = np.iinfo(np.uint32).max
+_PARENTHESIZED = re.compile(r"\([^)]*\)")
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def normalize_description(description):
+    """Lowercase content words of a description ("" when it has none)."""
+    text = _PARENTHESIZED.sub(" ", (description or "").lower())
+    return " ".join(w for w in _WORD.findall(text) if w not in STOP_WORDS)
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    """Set of overlapping size-character substrings (the whole text if shorter)."""
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+# =============================================================================
+# MINHASH / LSH
+# =============================================================================
+
+def _hash_parameters(count, seed=_SEED):
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, 2 ** 63, size=count, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    b = rng.integers(0, 2 ** 63, size=count, dtype=np.uint64)
+    return a, b
+
+
+_A, _B = _hash_parameters(NUM_PERMUTATIONS)
+
+
+def minhash_signatures(texts, size=SHINGLE_SIZE):
+    """(len(texts), NUM_PERMUTATIONS) uint32 MinHash signatures of normalized texts.
+
+    Texts without shingles get an all-ones signature (never similar to anything).
+    """
+    sets = [shingles(text, size) for text in texts]
+    counts = np.fromiter(map(len, sets), dtype=np.int64, count=len(sets))
+    docs = np.repeat(np.arange(len(sets), dtype=np.int64), counts)
+    ids, distinct = encode(list(chain.from_iterable(sets)))
+    # Each distinct shingle is hashed once under every permutation; multiply-shift
+    # hashing in wrapping uint64 arithmetic, keeping the high 32 bits
+    values = np.fromiter((zlib.crc32(s.encode()) for s in distinct), dtype=np.uint64,
+                         count=len(distinct))
+    table = ((values[:, None] * _A + _B) >> np.uint64(32)).astype(np.uint32)
+
+    signatures = np.full((len(texts), NUM_PERMUTATIONS), _EMPTY, dtype=np.uint32)
+    # Doc-aligned blocks keep the (pairs x permutations) matrix small
+    start = 0
+    while start < len(docs):
+        last = docs[min(start + _BLOCK_PAIRS, len(docs)) - 1]
+        end = int(np.searchsorted(docs, last, side="right"))
+        block_docs = docs[start:end]
+        heads = np.flatnonzero(np.r_[True, block_docs[1:] != block_docs[:-1]])
+        signatures[block_docs[heads]] = np.minimum.reduceat(table[ids[start:end]], heads, axis=0)
+        start = end
+    return signatures
+
+
+def _band_keys(signatures, band):
+    columns = signatures[:, band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+    key = np.zeros(len(signatures), dtype=np.uint64)
+    for c in range(ROWS_PER_BAND):
+        key = key * np.uint64(0x100000001B3) ^ columns[:, c].astype(np.uint64)
+    return key
+
+
+def _components(n, left, right):
+    """Connected component label (smallest member) of each of n nodes."""
+    labels = np.arange(n, dtype=np.int64)
+    while True:
+        merged = labels.copy()
+        np.minimum.at(merged, left, labels[right])
+        np.minimum.at(merged, right, labels[left])
+        merged = merged[merged]
+        if np.array_equal(merged, labels):
+            return labels
+        labels = merged
+
+
+def similar_components(signatures, threshold=SIMILARITY_THRESHOLD):
+    """Component label of each signature after LSH candidate linking."""
+    n = len(signatures)
+    valid = signatures[:, 0] != _EMPTY
+    left, right = [], []
+    for band in range(BANDS):
+        keys = _band_keys(signatures, band)
+        order = np.lexsort((np.arange(n), keys))
+        order = order[valid[order]]
+        same = keys[order][1:] == keys[order][:-1]
+        a, b = order[:-1][same], order[1:][same]
+        agreement = (signatures[a] == signatures[b]).mean(axis=1) if len(a) else np.zeros(0)
+        keep = agreement >= threshold
+        left.append(a[keep])
+        right.append(b[keep])
+    return _components(n, np.concatenate(left), np.concatenate(right))
+
+
+# =============================================================================
+# GROUPS
+# =============================================================================
+
+class OverlapGroups:
+    """Overlap group of every vendor and the groups spanning MIN_DEPARTMENTS departments."""
+
+    def __init__(self, row_idxs, group, rank, departments, groups, members):
+        self._index = {row_idx: i for i, row_idx in enumerate(row_idxs)}
+        self.group = group
+        self.rank = rank
+        self.departments = departments
+        self.groups = groups
+        self.members = members
+
+    def __len__(self):
+        return len(self.groups)
+
+    def lookup(self, row):
+        """Index of a VendorRow in the per-vendor arrays, or None."""
+        return self._index.get(row.row_idx)
+
+    @property
+    def overlap_cents(self):
+        return sum(g["cents"] for g in self.groups)
+
+    def tables(self):
+        """Build (header, rows, number_formats) blocks for the Overlap Groups sheet:
+        one line per group by combined spend, then every member."""
+        money = '"$"#,##0'
+        group_rows = [[g["group"], g["service"], g["vendors"], ", ".join(g["departments"]),
+                       g["largest"], from_cents(g["cents"])]
+                      for g in self.groups]
+        member_rows = [[m["group"], m["vendor"], m["department"], m["description"],
+                        from_cents(m["cents"])]
+                       for m in self.members]
+        return [
+            (["Group", "Service", "Vendors", "Departments", "Largest Vendor", "Combined Spend"],
+             group_rows, {5: money}),
+            (["Group", "Vendor", "Department", "Description", "Spend"],
+             member_rows, {4: money}),
+        ]
+
+
+def find_overlaps(rows, threshold=SIMILARITY_THRESHOLD, min_departments=MIN_DEPARTMENTS):
+    """Stage: OverlapGroups of the classified rows by description similarity."""
+    row_idxs, vendors, depts, descs, texts, cents = [], [], [], [], [], []
+    for row in rows:
+        row_idxs.append(row.row_idx)
+        vendors.append(row.vendor)
+        depts.append(row.dept)
+        descs.append(row.desc)
+        texts.append(normalize_description(row.desc))
+        cents.append(row.cents)
+    n = len(row_idxs)
+    cents = np.asarray(cents, dtype=np.int64)
+
+    # Sign each distinct description once
+    text_codes, distinct = encode(texts)
+    labels = similar_components(minhash_signatures(distinct), threshold)
+    has_text = np.fromiter((bool(t) for t in distinct), dtype=bool, count=len(distinct))
+    label_codes, _ = encode(labels.tolist())
+    component = np.where(has_text[text_codes], label_codes[text_codes], -1)
+
+    k = int(component.max()) + 1 if n else 0
+    dept_codes, dept_names = encode(depts)
+    d = max(len(dept_names), 1)
+    grouped = component >= 0
+    sizes = np.bincount(component[grouped], minlength=k)
+    # Distinct departments per component: count distinct (component, department) pairs
+    pairs = np.unique(component[grouped] * d + dept_codes[grouped])
+    dept_counts = np.bincount(pairs // d, minlength=k)
+    reported = (sizes >= 2) & (dept_counts >= min_departments)
+
+    group = np.full(n, -1, dtype=np.int64)
+    departments = np.zeros(n, dtype=np.int64)
+    rank = np.zeros(n, dtype=np.int64)
+    in_group = grouped.copy()
+    in_group[grouped] = reported[component[grouped]]
+    # Spend rank within the group (largest first, earlier rows first on ties)
+    members = np.flatnonzero(in_group)
+    order = members[np.lexsort((members, -cents[members], component[members]))]
+    starts = np.searchsorted(component[order], component[order], side="left")
+    rank[order] = np.arange(len(order)) - starts
+    totals = group_sum(component[members], cents[members], k)
+
+    group_list, member_list = [], []
+    bounds = np.append(np.flatnonzero(rank[order] == 0), len(order))
+    firsts = np.argsort(-totals[component[order[bounds[:-1]]]], kind="stable")
+    for number, g in enumerate(firsts.tolist(), start=1):
+        indexes = order[bounds[g]:bounds[g + 1]]
+        head = int(indexes[0])
+        c = component[head]
+        group[indexes] = number
+        departments[indexes] = int(dept_counts[c])
+        group_list.append({
+            "group": number, "service": descs[head], "vendors": int(sizes[c]),
+            "departments": sorted({depts[i] for i in indexes.tolist()}),
+            "largest": vendors[head], "cents": int(totals[c]),
+        })
+        member_list.extend({"group": number, "vendor": vendors[i], "department": depts[i],
+                            "description": descs[i], "cents": int(cents[i])}
+                           for i in indexes.tolist())
+    return OverlapGroups(row_idxs, group, rank, departments, group_list, member_list)
+
+
+class OverlapIndex:
+    """Overlap groups of a fixed set of reference rows, for placing other rows
+    one at a time: query() gives each row the overlap features find_overlaps()
+    would give it as the one extra row after the references."""
+
+    def __init__(self, rows, threshold=SIMILARITY_THRESHOLD, min_departments=MIN_DEPARTMENTS):
+        self.threshold = threshold
+        self.min_departments = min_departments
+        texts, depts, cents = [], [], []
+        for row in rows:
+            texts.append(normalize_description(row.desc))
+            depts.append(row.dept)
+            cents.append(row.cents)
+        text_codes, distinct = encode(texts)
+        self.signatures = minhash_signatures(distinct)
+        labels = similar_components(self.signatures, threshold)
+        has_text = np.fromiter((bool(t) for t in distinct), dtype=bool, count=len(distinct))
+        self.labels = np.where(has_text, labels, -1)
+        self.text_index = {text: i for i, text in enumerate(distinct)}
+        # Members of each component: departments and spend
+        self.departments = {}
+        self.cents = {}
+        for code, dept, c in zip(text_codes.tolist(), depts, cents):
+            label = int(self.labels[code])
+            if label >= 0:
+                self.departments.setdefault(label, set()).add(dept)
+                self.cents.setdefault(label, []).append(c)
+        # A new text is compared with the last reference text in each of its buckets
+        valid = np.flatnonzero(self.signatures[:, 0] != _EMPTY)
+        self.buckets = [dict(zip(_band_keys(self.signatures[valid], band).tolist(),
+                                 valid.tolist()))
+                        for band in range(BANDS)]
+
+    def _linked(self, signature):
+        linked = set()
+        if signature[0] == _EMPTY:
+            return linked
+        for band, bucket in enumerate(self.buckets):
+            j = bucket.get(int(_band_keys(signature[None], band)[0]))
+            if j is not None and (self.signatures[j] == signature).mean() >= self.threshold:
+                linked.add(int(self.labels[j]))
+        return linked
+
+    def query(self, rows):
+        """(overlap_departments, overlap_rank) int64 arrays, one entry per row,
+        each row placed alone among the references (zero when in no group)."""
+        rows = list(rows)
+        texts = [normalize_description(row.desc) for row in rows]
+        new = list(dict.fromkeys(t for t in texts if t and t not in self.text_index))
+        signed = dict(zip(new, minhash_signatures(new))) if new else {}
+        departments = np.zeros(len(rows), dtype=np.int64)
+        rank = np.zeros(len(rows), dtype=np.int64)
+        for i, (row, text) in enumerate(zip(rows, texts)):
+            if not text:
+                continue
+            if text in self.text_index:
+                linked = {int(self.labels[self.text_index[text]])}
+            else:
+                linked = self._linked(signed[text])
+            depts = set().union(*(self.departments[g] for g in linked)) | {row.dept}
+            members = [c for g in linked for c in self.cents[g]]
+            if len(members) + 1 >= 2 and len(depts) >= self.min_departments:
+                departments[i] = len(depts)
+                # Spend rank; the row comes after every reference on ties
+                rank[i] = sum(1 for c in members if c >= row.cents)
+        return departments, rank
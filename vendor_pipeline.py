@@ -0,0 +1,385 @@
+"""
+Vendor Analysis Pipeline
+================================
+Part 1 of the analysis (read -> normalize -> classify -> region) as a
+pipeline of stages connected by bounded queues. Each stage runs in its own
+thread so that workbook parsing and classification overlap; rows travel in
+fixed-size batches, so the rows in flight between the threads are bounded
+by queue_depth * batch_size.
+
+    reader --q--> normalize --q--> classify --q--> region --q--> collector (caller's thread)
+
+The collector is not bounded: classify_rows() runs that chain as the first
+stage of the stage executor in vendor_stages and keeps every classified row
+for the stages after it, in memory, or in a disk-spilling SpooledRows under
+a memory budget (--max-memory). Recommendations are scored
+over all classified rows (overlap groups and trends span the whole sheet),
+so the sheet is written by a later stage rather than from this pipeline.
+recommend_rows() and aggregate_rows() are those later stages.
+
+Costs are rounded to integer cents when rows are normalized (VendorRow.cents;
+VendorRow.cost keeps the amount as read) and all aggregation is fixed-point,
+see vendor_money. aggregate_rows() folds rows in batches of int64 arrays.
+With an FX rate table, convert_currency_rows() re-prices each row in the
+reporting currency between classification and aggregation (vendor_fx).
+"""
+
+import queue
+import threading
+from collections import namedtuple
+
+import numpy as np
+import openpyxl
+
+from vendor_concentration import ConcentrationTracker
+from vendor_cube import SpendCube
+from vendor_fx import FxTable, MissingRateError, currency_for_region
+from vendor_money import cents_array, encode, from_cents, group_sum
+from vendor_regions import tag_region_rows
+from vendor_rules import build_features, score
+from vendor_spill import SpooledRows, batched
+
+DEFAULT_BATCH_SIZE = 512
+DEFAULT_QUEUE_DEPTH = 8
+# Rows per batch for the stages that work on numpy arrays
+ARRAY_BATCH_SIZE = 65_536
+
+_DONE = object()
+
+# One vendor row as it moves through the stages; later stages fill more fields
+VendorRow = namedtuple(
+    "VendorRow",
+    "row_idx vendor cost cents currency dept desc rec source entity_type region",
+    defaults=(None,) * 6,
+)
+
+
+# =============================================================================
+# AGGREGATES
+# =============================================================================
+
+class SpendAggregate:
+    """Running totals for the classified vendor rows, in integer cents.
+
+    The *_spend and *_savings properties convert to currency units for output.
+    """
+
+    def __init__(self):
+        self.classified = 0
+        self.fallback_used = 0
+        self.total_cents = 0
+        self.dept_cents = {}
+        self.recommendation_counts = {"Terminate": 0, "Consolidate": 0, "Optimize": 0}
+        self.terminate_cents = 0
+        self.consolidate_cents = 0
+        self.region_cents = {}
+        self.region_dept_cents = {}
+        self.concentration = ConcentrationTracker()
+        self.cube = SpendCube()
+
+    @property
+    def total_spend(self):
+        return from_cents(self.total_cents)
+
+    @property
+    def dept_spend(self):
+        return {dept: from_cents(c) for dept, c in self.dept_cents.items()}
+
+    @property
+    def terminate_savings(self):
+        return from_cents(self.terminate_cents)
+
+    @property
+    def consolidate_savings(self):
+        return from_cents(self.consolidate_cents)
+
+    @property
+    def region_spend(self):
+        return {region: from_cents(c) for region, c in self.region_cents.items()}
+
+    @property
+    def region_dept_spend(self):
+        return {key: from_cents(c) for key, c in self.region_dept_cents.items()}
+
+    @property
+    def top_vendor(self):
+        top = self.concentration.total.top(1)
+        return top[0][0] if top else None
+
+    @property
+    def top_vendor_spend(self):
+        top = self.concentration.total.top(1)
+        return from_cents(top[0][1]) if top else 0
+
+    def add_batch(self, rows):
+        """Fold a list of classified VendorRows into the totals with array operations."""
+        if not rows:
+            return
+        cents = np.fromiter((row.cents for row in rows), dtype=np.int64, count=len(rows))
+        vendors, depts, recs, regions, sources = (
+            [getattr(row, field) for row in rows]
+            for field in ("vendor", "dept", "rec", "region", "source")
+        )
+        dept_codes, dept_values = encode(depts)
+        rec_codes, rec_values = encode(recs)
+        region_codes, region_values = encode(regions)
+
+        self.classified += len(rows)
+        self.fallback_used += sources.count("fallback")
+        self.total_cents += int(cents.sum())
+        dept_sums = group_sum(dept_codes, cents, len(dept_values))
+        for dept, total in zip(dept_values, dept_sums.tolist()):
+            self.dept_cents[dept] = self.dept_cents.get(dept, 0) + total
+        rec_sums = group_sum(rec_codes, cents, len(rec_values))
+        rec_counts = np.bincount(rec_codes, minlength=len(rec_values))
+        for rec, count, total in zip(rec_values, rec_counts.tolist(), rec_sums.tolist()):
+            self.recommendation_counts[rec] = self.recommendation_counts.get(rec, 0) + count
+            if rec == "Terminate":
+                self.terminate_cents += total
+            elif rec == "Consolidate":
+                self.consolidate_cents += total
+
+        region_sums = group_sum(region_codes, cents, len(region_values))
+        for region, total in zip(region_values, region_sums.tolist()):
+            if region is not None:
+                self.region_cents[region] = self.region_cents.get(region, 0) + total
+        n_depts = len(dept_values)
+        pair_codes = region_codes * n_depts + dept_codes
+        pair_sums = group_sum(pair_codes, cents, len(region_values) * n_depts)
+        for code in np.unique(pair_codes).tolist():
+            region, dept = region_values[code // n_depts], dept_values[code % n_depts]
+            if region is not None:
+                key = (region, dept)
+                self.region_dept_cents[key] = self.region_dept_cents.get(key, 0) + int(pair_sums[code])
+
+        self.concentration.add_batch(vendors, dept_codes, dept_values, cents)
+        self.cube.add_batch((depts, recs, regions, sources), cents)
+
+
+# =============================================================================
+# STAGES
+# =============================================================================
+
+def _currency_column(header):
+    """1-based index of an optional "Currency" column in the header row, or None."""
+    for col, value in enumerate(header, start=1):
+        if isinstance(value, str) and value.strip().lower() == "currency":
+            return col
+    return None
+
+
+def stream_vendor_rows(input_file, sheet_name="Vendor Analysis Assessment"):
+    """Yield (row_idx, vendor_name, cost, currency) from the input workbook without
+    loading it into memory; currency is None unless the sheet has a Currency column."""
+    wb = openpyxl.load_workbook(input_file, read_only=True)
+    try:
+        ws = wb[sheet_name]
+        header = next(ws.iter_rows(min_row=1, max_row=1, values_only=True), ())
+        currency_col = _currency_column(header)
+        width = max(3, currency_col or 0)
+        for row_idx, values in enumerate(ws.iter_rows(min_row=2, max_col=width, values_only=True),
+                                         start=2):
+            values = tuple(values) + (None,) * (width - len(values))
+            yield row_idx, values[0], values[2], values[currency_col - 1] if currency_col else None
+    finally:
+        wb.close()
+
+
+def normalize_rows(batch):
+    """Drop blank vendor rows, strip names, coerce missing costs to zero and
+    round the costs to integer cents."""
+    kept = [(row_idx, str(vendor_name).strip(), cost if cost else 0,
+             str(currency).strip().upper() if currency else None)
+            for row_idx, vendor_name, cost, currency in batch if vendor_name]
+    cents = cents_array([row[2] for row in kept]).tolist()
+    return [VendorRow(row_idx, name, cost, c, currency)
+            for (row_idx, name, cost, currency), c in zip(kept, cents)]
+
+
+def make_classify_stage(classify):
+    """Build a stage that fills (dept, desc, rec, source) on each normalized row."""
+    def classify_rows(batch):
+        return [VendorRow(row.row_idx, row.vendor, row.cost, row.cents, row.currency,
+                          *classify(row.vendor))
+                for row in batch]
+    return classify_rows
+
+
+# =============================================================================
+# EXECUTION
+# =============================================================================
+
+def _put(q, item, stop):
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(q, stop):
+    while not stop.is_set():
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            continue
+    return _DONE
+
+
+def run_pipeline(source, stages, sink, batch_size=DEFAULT_BATCH_SIZE,
+                 queue_depth=DEFAULT_QUEUE_DEPTH):
+    """Run source -> stages -> sink with one thread per stage and bounded queues.
+
+    source: iterable of rows; stages: functions mapping a list of rows to a
+    list of rows; sink: called in the caller's thread with each output row.
+    The first exception raised by any stage is re-raised here.
+    """
+    stop = threading.Event()
+    errors = []
+    queues = [queue.Queue(maxsize=queue_depth) for _ in range(len(stages) + 1)]
+
+    def reader():
+        try:
+            batch = []
+            for row in source:
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    if not _put(queues[0], batch, stop):
+                        return
+                    batch = []
+            if batch:
+                _put(queues[0], batch, stop)
+        except BaseException as exc:
+            errors.append(exc)
+            stop.set()
+        finally:
+            _put(queues[0], _DONE, stop)
+
+    def worker(stage, in_q, out_q):
+        try:
+            while True:
+                batch = _get(in_q, stop)
+                if batch is _DONE:
+                    return
+                if not _put(out_q, stage(batch), stop):
+                    return
+        except BaseException as exc:
+            errors.append(exc)
+            stop.set()
+        finally:
+            _put(out_q, _DONE, stop)
+
+    threads = [threading.Thread(target=reader, name="pipeline-reader", daemon=True)]
+    for i, stage in enumerate(stages):
+        threads.append(threading.Thread(
+            target=worker, args=(stage, queues[i], queues[i + 1]),
+            name=f"pipeline-{getattr(stage, '__name__', i)}", daemon=True,
+        ))
+    for t in threads:
+        t.start()
+
+    try:
+        while True:
+            batch = _get(queues[-1], stop)
+            if batch is _DONE:
+                break
+            for row in batch:
+                sink(row)
+    except BaseException:
+        stop.set()
+        raise
+    finally:
+        stop.set()
+        for t in threads:
+            t.join()
+
+    if errors:
+        raise errors[0]
+
+
+def _collector(budget):
+    """A plain list, or a disk-spilling SpooledRows under a memory budget."""
+    return SpooledRows(budget) if budget is not None else []
+
+
+def classify_rows(input_file, classify, batch_size=DEFAULT_BATCH_SIZE,
+                  queue_depth=DEFAULT_QUEUE_DEPTH, checkpoint=None, budget=None):
+    """Stage: read, normalize, classify and region-tag every vendor row of input_file
+    through the threaded pipeline.
+
+    Rows stream from the workbook in batches and only classified rows are
+    collected. With a ClassificationCheckpoint, rows already classified by an
+    interrupted attempt are reused and progress is saved every
+    checkpoint.every rows.
+    """
+    out = _collector(budget)
+    source = stream_vendor_rows(input_file)
+    if checkpoint and checkpoint.load(out):
+        done = out[-1].row_idx
+        source = (row for row in source if row[0] > done)
+    pending = []
+
+    def sink(row):
+        out.append(row)
+        if checkpoint:
+            pending.append(row)
+            if len(pending) >= checkpoint.every:
+                checkpoint.save(pending)
+                pending.clear()
+
+    try:
+        run_pipeline(source, [normalize_rows, make_classify_stage(classify), tag_region_rows],
+                     sink, batch_size=batch_size, queue_depth=queue_depth)
+    except BaseException:
+        if checkpoint:
+            checkpoint.save(pending)
+            checkpoint.close()
+        raise
+    if checkpoint:
+        checkpoint.complete()
+    return out
+
+
+def convert_currency_rows(rows, fx_file, as_of=None, budget=None):
+    """Stage: re-price classified VendorRows in the reporting currency of fx_file.
+
+    Each row's currency is its Currency column value, else the currency of
+    its inferred region; cents is replaced by the converted amount at the
+    latest rate on or before as_of, and cost keeps the amount as read. A
+    missing rate raises MissingRateError naming the vendor row.
+    """
+    fx = FxTable.load(fx_file)
+    out = _collector(budget)
+    for batch in batched(rows, ARRAY_BATCH_SIZE):
+        currencies = [row.currency or currency_for_region(row.region, fx.reporting)
+                      for row in batch]
+        try:
+            cents = fx.convert(currencies, [row.cost for row in batch], as_of).tolist()
+        except MissingRateError as exc:
+            row = batch[exc.index]
+            raise MissingRateError(f"Row {row.row_idx} ({row.vendor}): {exc}", exc.index) from None
+        out.extend(row._replace(cents=c, currency=currency)
+                   for row, c, currency in zip(batch, cents, currencies))
+    return out
+
+
+def recommend_rows(rows, trends=None, overlaps=None, thresholds=None, use_prior=True,
+                   budget=None):
+    """Stage: set each classified VendorRow's recommendation from the rule table
+    (vendor_rules), using the monthly spend trends when there are any and the
+    description overlap groups (vendor_overlap)."""
+    recs, _ = score(build_features(rows, trends, overlaps), thresholds, use_prior)
+    out = _collector(budget)
+    out.extend(row if row.rec == rec else row._replace(rec=rec)
+               for row, rec in zip(rows, recs.tolist()))
+    return out
+
+
+def aggregate_rows(rows):
+    """Stage: fold classified VendorRows into a SpendAggregate, batch by batch."""
+    agg = SpendAggregate()
+    for batch in batched(rows, ARRAY_BATCH_SIZE):
+        agg.add_batch(batch)
+    return agg
@@ -0,0 +1,300 @@
+"""
+Action Planner
+================================
+Chooses which recommended actions to take first: the set of vendors whose
+estimated savings is largest subject to
+
+- at most max_actions actions in total,
+- at most max_dept_risk risk points of disruption per department,
+- never acting on a must-keep vendor.
+
+Each vendor's action is its recommendation. Estimated savings is its spend
+times SAVINGS_BASIS_POINTS for that action; risk is an integer score (effort
+of the action plus how large the vendor is within its department) unless
+given in an overrides CSV:
+
+    vendor,risk,keep
+    Salesforce Uk Ltd-Uk,8,
+    Lusha,,yes
+
+The selection is a knapsack problem solved exactly: a dynamic program per
+department over (actions, risk points), then a group knapsack over the
+total action count to split max_actions between departments. Only the
+largest savings at each risk weight can be chosen, so departments are
+pruned to those first. When the tables would still exceed
+EXACT_CELL_LIMIT cells it falls back to a greedy pass in order of savings
+per risk point.
+"""
+
+import csv
+
+import numpy as np
+
+from vendor_history import vendor_key
+from vendor_money import encode, from_cents
+
+_BASIS_POINTS = 10_000
+
+# Share of a vendor's annual spend saved by acting on each recommendation
+SAVINGS_BASIS_POINTS = {"Terminate": 10_000, "Consolidate": 3_000, "Optimize": 1_000}
+
+# Effort of each action, before adding the vendor's size within its department
+ACTION_RISK = {"Terminate": 3, "Consolidate": 2, "Optimize": 1}
+SIZE_RISK_LEVELS = 3
+
+DEFAULT_MAX_ACTIONS = 25
+DEFAULT_MAX_DEPT_RISK = 15
+EXACT_CELL_LIMIT = 20_000_000
+
+
+def estimated_savings(cents, recs):
+    """Estimated savings of each vendor (int64 cents): its spend times the
+    SAVINGS_BASIS_POINTS rate of its recommendation."""
+    cents = np.asarray(cents, dtype=np.int64)
+    rates = np.fromiter((SAVINGS_BASIS_POINTS.get(rec, 0) for rec in recs), dtype=np.int64,
+                        count=len(cents))
+    return np.maximum(cents, 0) * rates // _BASIS_POINTS
+
+
+def action_savings(cents, rec):
+    """Estimated savings of one vendor (int cents); estimated_savings for a scalar."""
+    return max(cents, 0) * SAVINGS_BASIS_POINTS.get(rec, 0) // _BASIS_POINTS
+
+
+def load_overrides(path):
+    """({vendor key: risk}, {must-keep vendor keys}) from a vendor,risk,keep CSV."""
+    risks, keep = {}, set()
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            key = vendor_key(row["vendor"])
+            if (row.get("risk") or "").strip():
+                risk = int(row["risk"])
+                if risk < 0:
+                    raise ValueError(f"Negative risk {risk} for {row['vendor']!r} in {path}")
+                risks[key] = risk
+            if (row.get("keep") or "").strip().lower() in ("1", "y", "yes", "true", "x"):
+                keep.add(key)
+    return risks, keep
+
+
+def default_risk(recs, dept_codes, cents):
+    """ACTION_RISK of each action plus 0..SIZE_RISK_LEVELS for the vendor's spend
+    rank within its department (the largest vendors are the most disruptive)."""
+    n = len(cents)
+    order = np.lexsort((cents, dept_codes))
+    sorted_depts = dept_codes[order]
+    start = np.searchsorted(sorted_depts, sorted_depts, side="left")
+    end = np.searchsorted(sorted_depts, sorted_depts, side="right")
+    percentile = np.empty(n)
+    percentile[order] = (np.arange(n) - start + 1) / (end - start)
+    size = np.minimum((percentile * (SIZE_RISK_LEVELS + 1)).astype(np.int64), SIZE_RISK_LEVELS)
+    base = np.fromiter((ACTION_RISK.get(rec, 1) for rec in recs), dtype=np.int64, count=n)
+    return base + size
+
+
+# =============================================================================
+# SOLVERS
+# =============================================================================
+
+def _prune(items, savings, risks, max_count, capacity):
+    """Items that can be in an optimal selection: for each risk weight w, only the
+    min(max_count, capacity // w) largest savings (any optimum can swap a smaller
+    one for a larger one of the same weight)."""
+    order = items[np.lexsort((items, -savings[items], risks[items]))]
+    weights = risks[order]
+    rank = np.arange(len(order)) - np.searchsorted(weights, weights, side="left")
+    limit = np.where(weights > 0, capacity // np.maximum(weights, 1), len(order))
+    if max_count is not None:
+        limit = np.minimum(limit, max_count)
+    return np.sort(order[rank < limit])
+
+
+def _dept_table(savings, risks, max_count, capacity):
+    """0/1 knapsack for one department.
+
+    Returns (best, take): best[c, r] is the largest savings with at most c
+    actions (a single row when max_count is None) and at most r risk points;
+    take[i, c, r] records whether item i is in that optimum after step i.
+    """
+    counted = max_count is not None
+    rows = max_count + 1 if counted else 1
+    best = np.zeros((rows, capacity + 1), dtype=np.int64)
+    take = np.zeros((len(savings), rows, capacity + 1), dtype=bool)
+    for i, (value, weight) in enumerate(zip(savings.tolist(), risks.tolist())):
+        if weight > capacity or value <= 0:
+            continue
+        if counted:
+            source, target = best[:-1, :capacity + 1 - weight], best[1:, weight:]
+            taken = take[i, 1:, weight:]
+        else:
+            source, target = best[:, :capacity + 1 - weight], best[:, weight:]
+            taken = take[i, :, weight:]
+        candidate = source + value
+        better = candidate > target
+        target[better] = candidate[better]
+        taken[better] = True
+    return best, take
+
+
+def _backtrack(take, risks, count, risk):
+    chosen = []
+    for i in range(len(risks) - 1, -1, -1):
+        if take[i, count, risk]:
+            chosen.append(i)
+            risk -= int(risks[i])
+            if take.shape[1] > 1:
+                count -= 1
+    return chosen
+
+
+def _solve_exact(dept_items, savings, risks, max_actions, capacities):
+    """Exact selection: per-department tables, then split max_actions between them."""
+    tables = []
+    for d, items in enumerate(dept_items):
+        max_count = None if max_actions is None else min(max_actions, len(items))
+        tables.append(_dept_table(savings[items], risks[items], max_count, capacities[d]))
+
+    if max_actions is None:
+        counts = [0] * len(dept_items)
+    else:
+        # Group knapsack over departments: total[k] = best savings with k actions
+        total = np.zeros(max_actions + 1, dtype=np.int64)
+        splits = []
+        for (best, _), capacity in zip(tables, capacities):
+            dept_best = best[:, capacity]
+            merged = total.copy()
+            split = np.zeros(max_actions + 1, dtype=np.int64)
+            for j in range(1, len(dept_best)):
+                candidate = total[:max_actions + 1 - j] + dept_best[j]
+                better = candidate > merged[j:]
+                merged[j:][better] = candidate[better]
+                split[j:][better] = j
+            splits.append(split)
+            total = merged
+        counts = [0] * len(dept_items)
+        k = int(np.argmax(total))
+        for d in range(len(dept_items) - 1, -1, -1):
+            counts[d] = int(splits[d][k])
+            k -= counts[d]
+
+    chosen = []
+    for items, (_, take), count, capacity in zip(dept_items, tables, counts, capacities):
+        chosen.extend(items[i] for i in _backtrack(take, risks[items], count, capacity))
+    return chosen
+
+
+def _solve_greedy(dept_codes, savings, risks, eligible, max_actions, capacities):
+    """Approximate selection in order of savings per risk point."""
+    ratio = savings / np.maximum(risks, 0.5)
+    order = np.lexsort((-savings, -ratio))
+    remaining = list(capacities)
+    chosen = []
+    for i in order.tolist():
+        if max_actions is not None and len(chosen) >= max_actions:
+            break
+        d = dept_codes[i]
+        if not eligible[i] or savings[i] <= 0 or risks[i] > remaining[d]:
+            continue
+        chosen.append(i)
+        remaining[d] -= int(risks[i])
+    return chosen
+
+
+# =============================================================================
+# PLAN
+# =============================================================================
+
+class ActionPlan:
+    """Selected actions, largest savings first, with per-department totals."""
+
+    def __init__(self, actions, method, max_actions, max_dept_risk, candidates, kept):
+        self.actions = actions
+        self.method = method
+        self.max_actions = max_actions
+        self.max_dept_risk = max_dept_risk
+        self.candidates = candidates
+        self.kept = kept
+
+    @property
+    def savings_cents(self):
+        return sum(a["savings_cents"] for a in self.actions)
+
+    def dept_totals(self):
+        """{department: (actions, risk points, savings cents)}"""
+        totals = {}
+        for a in self.actions:
+            count, risk, cents = totals.get(a["department"], (0, 0, 0))
+            totals[a["department"]] = (count + 1, risk + a["risk"], cents + a["savings_cents"])
+        return totals
+
+    def tables(self):
+        """Build (header, rows, number_formats) blocks for the Action Plan sheet."""
+        money = '"$"#,##0'
+        limit = self.max_dept_risk if self.max_dept_risk is not None else "None"
+        summary_rows = [
+            ["Actions", len(self.actions)],
+            ["Estimated Annual Savings", from_cents(self.savings_cents)],
+            ["Action Limit", self.max_actions if self.max_actions is not None else "None"],
+            ["Risk Limit per Department", limit],
+            ["Candidate Vendors", self.candidates],
+            ["Must-Keep Vendors", self.kept],
+            ["Method", self.method],
+        ]
+        dept_rows = [[dept, count, risk, limit, from_cents(cents)]
+                     for dept, (count, risk, cents) in
+                     sorted(self.dept_totals().items(), key=lambda x: -x[1][2])]
+        action_rows = [[rank, a["vendor"], a["department"], a["action"], from_cents(a["cents"]),
+                        from_cents(a["savings_cents"]), a["risk"]]
+                       for rank, a in enumerate(self.actions, start=1)]
+        return [
+            (["Plan", "Value"], summary_rows, {}),
+            (["Department", "Actions", "Risk Used", "Risk Limit", "Estimated Savings"],
+             dept_rows, {4: money}),
+            (["Rank", "Vendor", "Department", "Action", "Spend", "Estimated Savings", "Risk"],
+             action_rows, {4: money, 5: money}),
+        ]
+
+
+def plan_actions(rows, max_actions=DEFAULT_MAX_ACTIONS, max_dept_risk=DEFAULT_MAX_DEPT_RISK,
+                 overrides_file=None):
+    """Stage: the savings-maximizing ActionPlan for the classified rows."""
+    risk_overrides, must_keep = load_overrides(overrides_file) if overrides_file else ({}, set())
+    vendors, depts, recs, keys, cents = [], [], [], [], []
+    for row in rows:
+        vendors.append(row.vendor)
+        depts.append(row.dept)
+        recs.append(row.rec)
+        keys.append(vendor_key(row.vendor))
+        cents.append(row.cents)
+    n = len(vendors)
+    cents = np.asarray(cents, dtype=np.int64)
+    dept_codes, dept_values = encode(depts)
+
+    savings = estimated_savings(cents, recs)
+    risks = default_risk(recs, dept_codes, cents)
+    for i, key in enumerate(keys):
+        if key in risk_overrides:
+            risks[i] = risk_overrides[key]
+    eligible = np.fromiter((key not in must_keep for key in keys), dtype=bool, count=n)
+    eligible &= savings > 0
+
+    dept_items = [np.flatnonzero(eligible & (dept_codes == d)) for d in range(len(dept_values))]
+    capacities = [int(risks[items].sum()) if max_dept_risk is None else max_dept_risk
+                  for items in dept_items]
+    dept_items = [_prune(items, savings, risks, max_actions, capacity)
+                  for items, capacity in zip(dept_items, capacities)]
+    cells = sum(len(items) * ((min(max_actions, len(items)) + 1) if max_actions is not None else 1)
+                * (capacity + 1) for items, capacity in zip(dept_items, capacities))
+    if cells <= EXACT_CELL_LIMIT:
+        chosen, method = _solve_exact(dept_items, savings, risks, max_actions, capacities), "exact"
+    else:
+        chosen = _solve_greedy(dept_codes, savings, risks, eligible, max_actions, capacities)
+        method = "greedy"
+
+    chosen.sort(key=lambda i: (-savings[i], i))
+    actions = [{"vendor": vendors[i], "department": depts[i], "action": recs[i],
+                "cents": int(cents[i]), "savings_cents": int(savings[i]), "risk": int(risks[i])}
+               for i in chosen]
+    kept = sum(1 for key in keys if key in must_keep)
+    return ActionPlan(actions, method, max_actions, max_dept_risk,
+                      int(np.count_nonzero(eligible)), kept)
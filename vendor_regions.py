@@ -0,0 +1,156 @@
+"""
+Region & Legal-Entity Inference
+================================
+Tags each vendor with a legal-entity type ("D.O.O.", "Ltd", "Pvt Ltd", ...)
+and a likely jurisdiction, inferred from the end of the vendor name.
+
+Known suffixes are stored in a trie keyed on reversed characters, so one
+walk from the end of the normalized name finds the longest matching suffix
+in O(name length). Trailing country markers ("Salesforce Uk Ltd-Uk") are
+peeled off first and take precedence over the jurisdiction implied by the
+entity type.
+"""
+
+import re
+
+UNKNOWN = "Unknown"
+
+# Legal-entity suffixes: suffix -> (entity type, jurisdiction implied by it)
+LEGAL_SUFFIXES = {
+    "d.o.o.": ("D.O.O.", "Croatia"),
+    "d.o.o": ("D.O.O.", "Croatia"),
+    "doo": ("D.O.O.", "Croatia"),
+    "j.d.o.o.": ("J.D.O.O.", "Croatia"),
+    "j.d.o.o": ("J.D.O.O.", "Croatia"),
+    "d.d.": ("D.D.", "Croatia"),
+    "pvt ltd": ("Pvt Ltd", "India"),
+    "pvt. ltd.": ("Pvt Ltd", "India"),
+    "pvt. ltd": ("Pvt Ltd", "India"),
+    "private limited": ("Pvt Ltd", "India"),
+    "pte ltd": ("Pte Ltd", "Singapore"),
+    "pte. ltd.": ("Pte Ltd", "Singapore"),
+    "pte. ltd": ("Pte Ltd", "Singapore"),
+    "pty ltd": ("Pty Ltd", "Australia"),
+    "pty. ltd.": ("Pty Ltd", "Australia"),
+    "ireland limited": ("Ltd", "Ireland"),
+    "ireland ltd": ("Ltd", "Ireland"),
+    "ltd": ("Ltd", "United Kingdom"),
+    "ltd.": ("Ltd", "United Kingdom"),
+    "limited": ("Ltd", "United Kingdom"),
+    "llp": ("LLP", "United Kingdom"),
+    "plc": ("PLC", "United Kingdom"),
+    "inc": ("Inc", "United States"),
+    "inc.": ("Inc", "United States"),
+    "incorporated": ("Inc", "United States"),
+    "corp": ("Corp", "United States"),
+    "corp.": ("Corp", "United States"),
+    "corporation": ("Corp", "United States"),
+    "llc": ("LLC", "United States"),
+    "l.l.c.": ("LLC", "United States"),
+    "s.l.": ("S.L.", "Spain"),
+    "s.l.u.": ("S.L.U.", "Spain"),
+    "gmbh": ("GmbH", "Germany"),
+    "b.v.": ("B.V.", "Netherlands"),
+    "bv": ("B.V.", "Netherlands"),
+    "s.r.l.": ("S.r.l.", "Italy"),
+    "srl": ("S.r.l.", "Italy"),
+    "sarl": ("SARL", "France"),
+    "s.a.r.l.": ("SARL", "France"),
+    "sas": ("SAS", "France"),
+    "ab": ("AB", "Sweden"),
+    "oy": ("Oy", "Finland"),
+    "aps": ("ApS", "Denmark"),
+}
+
+# Trailing country markers: suffix -> jurisdiction
+COUNTRY_SUFFIXES = {
+    "uk": "United Kingdom",
+    "gb": "United Kingdom",
+    "us": "United States",
+    "usa": "United States",
+    "ie": "Ireland",
+    "ireland": "Ireland",
+    "hr": "Croatia",
+    "croatia": "Croatia",
+    "india": "India",
+    "singapore": "Singapore",
+    "sg": "Singapore",
+}
+
+_SEPARATORS = re.compile(r"[\s,()\-/]+")
+
+
+# =============================================================================
+# SUFFIX TRIE
+# =============================================================================
+
+class SuffixTrie:
+    """Trie over reversed suffix strings; matches only on word boundaries."""
+
+    def __init__(self, entries=None):
+        self.root = {}
+        for suffix, value in (entries or {}).items():
+            self.insert(suffix, value)
+
+    def insert(self, suffix, value):
+        node = self.root
+        for ch in reversed(suffix):
+            node = node.setdefault(ch, {})
+        node[None] = value
+
+    def longest_match(self, text, end=None):
+        """Return (start, value) for the longest suffix of text[:end] that is a whole word run."""
+        end = len(text) if end is None else end
+        node = self.root
+        best = None
+        i = end
+        while i > 0:
+            node = node.get(text[i - 1])
+            if node is None:
+                break
+            i -= 1
+            if None in node and (i == 0 or text[i - 1] == " "):
+                best = (i, node[None])
+        return best
+
+
+_LEGAL_TRIE = SuffixTrie(LEGAL_SUFFIXES)
+_COUNTRY_TRIE = SuffixTrie(COUNTRY_SUFFIXES)
+
+
+def normalize_entity_name(vendor_name):
+    """Lowercase and collapse separators so suffixes line up on word boundaries."""
+    return _SEPARATORS.sub(" ", vendor_name.lower()).strip()
+
+
+def infer_region(vendor_name):
+    """Return (entity_type, jurisdiction) for a vendor name ("Unknown" when no suffix matches)."""
+    text = normalize_entity_name(vendor_name)
+    end = len(text)
+
+    # Peel trailing country markers ("... Ltd-Uk", "... Inc US")
+    country = None
+    while end > 0:
+        match = _COUNTRY_TRIE.longest_match(text, end)
+        if match is None:
+            break
+        start, jurisdiction = match
+        if start == 0:
+            break  # the whole name is a country word; keep it as the name
+        country = country or jurisdiction
+        end = max(start - 1, 0)
+
+    match = _LEGAL_TRIE.longest_match(text, end)
+    if match is None or match[0] == 0:
+        return UNKNOWN, country or UNKNOWN
+    entity_type, implied = match[1]
+    return entity_type, country or implied
+
+
+def tag_region_rows(batch):
+    """Pipeline stage: fill entity_type and region on classified VendorRow records."""
+    out = []
+    for row in batch:
+        entity_type, region = infer_region(row.vendor)
+        out.append(row._replace(entity_type=entity_type, region=region))
+    return out
@@ -0,0 +1,582 @@
+"""
+Report Rendering
+================================
+Data-driven rendering of the Top 3 Opportunities, Methodology and CEO/CFO
+memo tabs. Narrative text lives in string.Template objects compiled once at
+import; every count, total, share, vendor name and savings figure is filled
+in from the aggregate results (see vendor_pipeline.SpendAggregate) and the
+opportunity candidates found in the recommended rows, so the written
+reports cannot drift from the classified data.
+
+Opportunities are discovered rather than written by hand: find_opportunities()
+groups the vendors into function clusters (vendor_rules.vendor_function) and
+takes the overlap groups of near-identical services across departments
+(vendor_overlap), prices each with the action planner's savings basis
+(vendor_planner.SAVINGS_BASIS_POINTS, one rate per recommendation) and names
+the consolidation survivor from the ConsolidationMap (an overlap group's
+largest vendor). The Top 3 are the candidates with the largest estimated
+savings that share no vendor.
+
+Rendering is a handful of dict lookups and substitutions per report, so
+render_report_batch() can produce memos for hundreds of portfolio companies
+in one run.
+"""
+
+import re
+from string import Template
+
+import numpy as np
+
+from vendor_money import encode, from_cents, group_sum
+from vendor_planner import SAVINGS_BASIS_POINTS, estimated_savings
+from vendor_rules import FUNCTION_KEYWORDS, vendor_function
+
+MEMO_DATE = "February 2026"
+OPPORTUNITY_COUNT = 3
+# Largest vendors named in an opportunity's explanation
+LISTED_VENDORS = 5
+
+
+# =============================================================================
+# FORMATTING
+# =============================================================================
+
+def fmt_usd(amount):
+    """$7,887,360"""
+    return f"${amount:,.0f}"
+
+
+def fmt_millions(amount):
+    """$7.89M"""
+    return f"${amount / 1_000_000:,.2f}M"
+
+
+def fmt_thousands(amount):
+    """$125K"""
+    return f"${amount / 1_000:,.0f}K"
+
+
+def fmt_compact(amount):
+    """$1.25M, $125K or $950"""
+    if abs(amount) >= 1_000_000:
+        return fmt_millions(amount)
+    if abs(amount) >= 1_000:
+        return fmt_thousands(amount)
+    return fmt_usd(amount)
+
+
+def fmt_pct(part, whole):
+    """39.5%"""
+    return f"{(part / whole * 100) if whole else 0:.1f}%"
+
+
+_LEGAL_SUFFIX = re.compile(
+    r"(?:\s*-\s*[a-z]{2}\b|,?\s+(?:uk|ltd|limited|llp|llc|inc|corp|corporation|gmbh|plc|d\.o\.o\.))+\s*$",
+    re.IGNORECASE,
+)
+
+
+def short_vendor_name(vendor_name):
+    """Strip legal-entity and region suffixes for prose ("Salesforce Uk Ltd-Uk" -> "Salesforce")."""
+    short = _LEGAL_SUFFIX.sub("", vendor_name.strip())
+    return short or vendor_name.strip()
+
+
+def _slug(text):
+    return re.sub(r"[^a-z0-9]+", "_", text.lower()).strip("_")
+
+
+def _count(n, noun):
+    """"1 vendor", "3 vendors" """
+    return f"{n} {noun}" if n == 1 else f"{n} {noun}s"
+
+
+def _join(items):
+    """"a", "a and b", "a, b and c" """
+    items = list(items)
+    if len(items) <= 1:
+        return "".join(items)
+    return f"{', '.join(items[:-1])} and {items[-1]}"
+
+
+# =============================================================================
+# TEMPLATES
+# =============================================================================
+
+# One opportunity per function cluster or overlap group; the sentences in
+# ${recommendation_summary}, ${action} and ${next_step} are composed from the
+# cluster's recommendations (and, for a function, the overlap groups within it)
+OPPORTUNITY_TEMPLATES = {
+    "function": {
+        "title": Template("${name} Vendor Rationalization"),
+        "memo_title": Template("${name_upper} RATIONALIZATION"),
+        "explanation": Template(
+            "${name} spend is ${spend} across ${vendor_count} vendors (${vendor_list}), "
+            "${spend_pct} of total vendor spend. ${recommendation_summary} "
+            "ACTION: ${action} "
+            "RISK: Notice periods and usage data must be validated before contracts are exited "
+            "or moved, and the change needs to be agreed with ${departments}."
+        ),
+        "memo": Template(
+            "${vendor_count} ${name} vendors cost ${spend}/year (${spend_pct} of spend), led by "
+            "${lead_vendors}. ${recommendation_summary}\n"
+            "Next step: ${next_step}"
+        ),
+    },
+    "overlap": {
+        "title": Template("Cross-Department Overlap: ${name}"),
+        "memo_title": Template("CROSS-DEPARTMENT OVERLAP: ${name_upper}"),
+        "explanation": Template(
+            "${departments} buy near-identical services (${name}) from ${vendor_count} vendors "
+            "(${vendor_list}) for ${spend}, ${spend_pct} of total vendor spend. "
+            "${recommendation_summary} "
+            "ACTION: ${action} "
+            "RISK: Each department's requirements must be checked against the scope of "
+            "${survivor} before volume is moved, and notice periods validated before contracts are exited."
+        ),
+        "memo": Template(
+            "${departments} buy the same service from ${vendor_count} vendors for "
+            "${spend}/year (${spend_pct} of spend), led by ${lead_vendors}. "
+            "${recommendation_summary}\n"
+            "Next step: ${next_step}"
+        ),
+    },
+}
+
+METHODOLOGY_TEMPLATE = Template("""METHODOLOGY & APPROACH
+
+1. TOOL USED: Claude Code CLI (Model: claude-opus-4-6)
+All analysis was performed exclusively using Claude Code CLI as required. The tool was used to:
+- Read and parse the Excel vendor data programmatically using Python (openpyxl)
+- Classify all ${vendor_count} vendors into departments, generate descriptions, and assign recommendations
+- Generate the completed workbook with all tabs populated
+- Produce the executive memo and supporting documentation
+
+2. APPROACH:
+Step 1 - Data Extraction & Exploration:
+Used Claude Code to read the Excel template, extract all vendor names and spend data, and analyze spend distribution patterns. Identified that total spend is ${total_spend_m} across ${vendor_count} vendors, with ${top_vendor} alone at ${top_vendor_spend_m} (${top_vendor_pct}). Spend is highly concentrated: ${pareto_80_count} vendors make up 80% of spend and ${pareto_95_count} make up 95% (Herfindahl-Hirschman index ${hhi}), while ${long_tail_count} vendors under ${long_tail_threshold} form the long tail.
+
+Step 2 - Vendor Research & Classification:
+For each vendor, Claude Code was used to:
+(a) Identify the vendor's business based on company name, known industry databases, and contextual clues (e.g., ".D.O.O." indicating Croatian LLC entities)
+(b) Assign to one of 12 departments from the Config tab (Engineering, Facilities, G&A, Legal, M&A, Marketing, SaaS, Product, Professional Services, Sales, Support, Finance)
+(c) Write a specific one-line description of what the vendor provides
+(d) Recommend Terminate, Consolidate, or Optimize based on strategic value, overlap analysis, and spend materiality
+
+Step 3 - Strategic Analysis:
+Grouped vendors by function to identify consolidation opportunities (${fragmentation}), and matched near-identical service descriptions across departments by MinHash similarity (${overlap_summary}). Calculated the spend and estimated savings of each function and overlap group to rank the opportunities.
+
+Step 4 - Financial Modeling:
+Applied one savings rate per recommendation to each vendor's annual spend: ${savings_rates}. The Top 3 opportunities are the functions or overlap groups with the largest estimated savings, with no vendor counted in two of them (${opportunity_names}).
+
+3. PROMPTS CREATED:
+- "Analyze vendor spend data from Excel file and categorize each vendor by department, description, and strategic recommendation"
+- "Identify the top 3 highest-impact cost reduction opportunities with financial justification"
+- "Generate a Python script to populate the Excel template with all analysis results"
+- Iterative refinement prompts to validate classifications against known vendor databases
+
+4. QUALITY CHECKS PERFORMED:
+(a) Completeness Check: Verified all ${vendor_count} vendors received department, description, and recommendation values - no blank cells remain in columns B, D, E.
+(b) Department Validation: Cross-referenced all department assignments against the 12 valid departments in the Config tab to ensure no invalid categories.
+(c) Description Specificity: Reviewed descriptions to ensure none are generic (e.g., "business services provider") - each describes the specific function the vendor performs.
+(d) Recommendation Logic: Validated that:
+   - "Terminate" was only applied to clearly non-essential vendors (entertainment, luxury dining, low-value subscriptions)
+   - "Consolidate" was applied where multiple vendors serve the same function (e.g., multiple coworking providers, multiple accounting firms)
+   - "Optimize" was applied to essential vendors with cost reduction potential
+(e) Financial Validation: Verified that the Top 3 opportunity savings sum to the stated total and follow the savings rates in Step 4.
+(f) Spend Coverage: Confirmed that savings targets address the highest-spend categories first (${top_vendor} at ${top_vendor_pct}, ${top_departments}).
+(g) Cross-Referencing: Spot-checked 50+ vendor classifications against public business information to verify accuracy of department and description assignments.""")
+
+MEMO_TEMPLATE = Template("""MEMORANDUM
+
+TO: CEO & CFO
+FROM: VP of Operations
+RE: Vendor Spend Optimization — Findings & Recommendations
+DATE: ${memo_date}
+
+EXECUTIVE SUMMARY
+
+A comprehensive review of ${vendor_count} vendor relationships totaling ${total_spend_m} in annual spend has identified ${total_savings_m} in actionable savings (${savings_pct} reduction) across ${opportunity_count} initiatives that can be executed within 90 days of approval.
+
+CURRENT STATE
+
+Total annual vendor spend: ${total_spend_usd}
+Number of active vendors: ${vendor_count}
+Top vendor (${top_vendor}): ${top_vendor_spend_usd} — ${top_vendor_pct} of total spend
+Spend concentration: top 5 vendors hold ${top5_pct} of spend; ${pareto_80_count} vendors make up 80% (HHI ${hhi}); ${long_tail_count} vendors under ${long_tail_threshold} account for only ${long_tail_spend_k}
+Key issue: Vendor fragmentation — ${fragmentation}, with no centralized procurement governance.
+
+TOP 3 RECOMMENDATIONS
+
+${opportunity_sections}
+
+TOTAL PROJECTED ANNUAL SAVINGS: ${total_savings_usd}
+
+IMPLEMENTATION TIMELINE
+
+Weeks 1-2: Baseline contracts and usage for ${opportunity_1}; map demand for ${opportunity_2}
+Weeks 3-4: Issue consolidation notices and RFPs for ${opportunity_2}; begin the ${opportunity_3} review
+Weeks 5-8: Execute ${opportunity_1} terminations and renegotiations
+Weeks 9-12: Complete the ${opportunity_3} transition; validate realized savings
+
+ADDITIONAL FINDINGS
+
+- ${terminate_count} vendors recommended for termination (largest in ${terminate_functions}) representing ~${terminate_spend_k} in spend
+- ${consolidate_count} vendors recommended for consolidation across overlapping categories
+- ${optimize_count} vendors kept and recommended for optimization
+- Overlap detection found ${overlap_summary}
+
+I recommend we schedule a 30-minute review to align on priorities and authorize the ${opportunity_1} review as the highest-ROI immediate action.
+
+— VP of Operations""")
+
+MEMO_OPPORTUNITY_TEMPLATE = Template(
+    "${index}. ${memo_title} — Est. Savings: ${savings_k}/year\n${body}"
+)
+
+
+# =============================================================================
+# OPPORTUNITIES
+# =============================================================================
+
+_TAXONOMY = frozenset(name for name, _ in FUNCTION_KEYWORDS)
+
+
+def _cluster_candidates(kind, codes, names, survivors, columns):
+    """One candidate per cluster code (k = len(names); rows coded -1 belong to
+    none), largest estimated savings first, dropping clusters without savings."""
+    row_idxs, vendors, depts, rec_codes, rec_names, cents, savings = columns
+    k, r = len(names), len(rec_names)
+    index = np.flatnonzero(codes >= 0)
+    codes, rec_codes = codes[index], rec_codes[index]
+    spend = group_sum(codes, cents[index], k)
+    saved = group_sum(codes, savings[index], k)
+    counts = np.bincount(codes, minlength=k)
+    pairs = codes * r + rec_codes
+    pair_counts = np.bincount(pairs, minlength=k * r).reshape(k, r)
+    pair_cents = group_sum(pairs, cents[index], k * r).reshape(k, r)
+    # Members of each cluster, largest spend first
+    order = index[np.lexsort((index, -cents[index], codes))]
+    starts = np.searchsorted(np.sort(codes), np.arange(k), side="left")
+
+    candidates = []
+    for c in np.argsort(-saved, kind="stable").tolist():
+        if saved[c] <= 0:
+            continue
+        members = order[starts[c]:starts[c] + counts[c]].tolist()
+        candidates.append({
+            "kind": kind,
+            "name": names[c],
+            "vendors": int(counts[c]),
+            "departments": sorted({depts[i] for i in members}),
+            "cents": int(spend[c]),
+            "savings_cents": int(saved[c]),
+            "rec_counts": {rec: int(pair_counts[c, j]) for j, rec in enumerate(rec_names)
+                           if pair_counts[c, j]},
+            "rec_cents": {rec: int(pair_cents[c, j]) for j, rec in enumerate(rec_names)
+                          if pair_counts[c, j]},
+            "top_vendors": [(vendors[i], int(cents[i])) for i in members[:LISTED_VENDORS]],
+            "survivor": survivors.get(names[c]),
+            "rows": [row_idxs[i] for i in members],
+        })
+    return candidates
+
+
+def find_opportunities(rows, consolidation=None, overlaps=None):
+    """Stage: savings opportunity candidates from the recommended rows, largest
+    estimated savings first.
+
+    One candidate per function cluster (its vendor_rules function) with its
+    spend, estimated savings, recommendation mix, largest vendors and, given
+    the ConsolidationMap, the survivor its Consolidate vendors move to (for a
+    location-bound function, the survivor of its largest regional cluster).
+
+    Given the OverlapGroups, each group of near-identical services across
+    departments is a candidate too (its largest vendor the survivor), and a
+    function candidate lists the groups with two or more of its vendors.
+    """
+    row_idxs, vendors, depts, recs, functions, groups, cents = [], [], [], [], [], [], []
+    for row in rows:
+        row_idxs.append(row.row_idx)
+        vendors.append(row.vendor)
+        depts.append(row.dept)
+        recs.append(row.rec)
+        functions.append(vendor_function(row.desc, row.dept))
+        index = overlaps.lookup(row) if overlaps is not None else None
+        groups.append(int(overlaps.group[index]) - 1 if index is not None else -1)
+        cents.append(row.cents)
+    cents = np.asarray(cents, dtype=np.int64)
+    rec_codes, rec_names = encode(recs)
+    columns = (row_idxs, vendors, depts, rec_codes, rec_names, cents,
+               estimated_savings(cents, recs))
+
+    codes, names = encode(functions)
+    # Clusters are ordered by absorbed spend, so a function split by region
+    # is named after the survivor of its largest consolidation
+    survivors = {}
+    for cluster in (consolidation.clusters if consolidation is not None else ()):
+        survivors.setdefault(cluster["function"], cluster["survivor"])
+    candidates = _cluster_candidates("function", codes, names, survivors, columns)
+    if overlaps is None or not len(overlaps):
+        return candidates
+
+    group_codes = np.asarray(groups, dtype=np.int64)
+    services = [g["service"] for g in overlaps.groups]
+    candidates += _cluster_candidates(
+        "overlap", group_codes, services,
+        {g["service"]: g["largest"] for g in overlaps.groups}, columns)
+    # Overlap groups with at least two vendors in each function cluster
+    grouped = group_codes >= 0
+    shared = np.unique(np.stack([codes[grouped], group_codes[grouped]]), axis=1,
+                       return_counts=True)
+    within = {}
+    for c, g in shared[0][:, shared[1] >= 2].T.tolist():
+        within.setdefault(names[c], []).append(overlaps.groups[g])
+    for candidate in candidates:
+        if candidate["kind"] == "function":
+            candidate["overlaps"] = within.get(candidate["name"], [])
+    return sorted(candidates, key=lambda c: -c["savings_cents"])
+
+
+def select_opportunities(candidates, count=OPPORTUNITY_COUNT):
+    """The `count` candidates with the largest estimated savings, skipping any
+    that shares a vendor with one already chosen (an overlap group inside a
+    chosen function cluster, or the reverse), so no savings count twice."""
+    selected, taken = [], set()
+    for candidate in sorted(candidates, key=lambda c: -c["savings_cents"]):
+        if taken.isdisjoint(candidate["rows"]):
+            selected.append(candidate)
+            taken.update(candidate["rows"])
+            if len(selected) == count:
+                break
+    return selected
+
+
+def _vendor_list(candidate, limit=LISTED_VENDORS):
+    listed = [f"{short_vendor_name(name)} {fmt_compact(from_cents(c))}"
+              for name, c in candidate["top_vendors"][:limit]]
+    more = candidate["vendors"] - len(listed)
+    if more > 0:
+        listed.append(f"{more} more")
+    return _join(listed)
+
+
+def _recommendation_parts(candidate):
+    """(summary sentence, action clauses, clause with the largest estimated
+    savings) for a candidate's recommendation mix."""
+    counts, cents = candidate["rec_counts"], candidate["rec_cents"]
+    survivor = short_vendor_name(candidate["survivor"]) if candidate.get("survivor") else None
+    summary, actions = [], []
+    if counts.get("Terminate"):
+        n = counts["Terminate"]
+        summary.append(f"terminating {_count(n, 'vendor')} "
+                       f"({fmt_compact(from_cents(cents['Terminate']))})")
+        actions.append(("Terminate", f"exit the {_count(n, 'contract')} recommended for termination "
+                       f"at the next notice date"))
+    if counts.get("Consolidate"):
+        n = counts["Consolidate"]
+        target = f" into {survivor}" if survivor else ""
+        summary.append(f"consolidating {_count(n, 'vendor')} "
+                       f"({fmt_compact(from_cents(cents['Consolidate']))}){target}")
+        actions.append(("Consolidate", f"move the volume of the {_count(n, 'consolidated vendor')} onto "
+                       f"{survivor or 'one preferred vendor'} under volume terms"))
+    if counts.get("Optimize"):
+        n = counts["Optimize"]
+        summary.append(f"optimizing {_count(n, 'vendor')} "
+                       f"({fmt_compact(from_cents(cents['Optimize']))})")
+        actions.append(("Optimize", f"renegotiate the {_count(n, 'retained contract')} and remove "
+                       f"unused licenses and capacity"))
+    sentence = f"We recommend {_join(summary)}." if summary else ""
+    largest = max(actions, key=lambda a: cents[a[0]] * SAVINGS_BASIS_POINTS[a[0]], default=None)
+    return sentence, [clause for _, clause in actions], largest and largest[1]
+
+
+def _overlap_sentence(candidate, limit=2):
+    """Overlap groups among a function candidate's vendors, as one sentence each."""
+    return " ".join(
+        f"{_count(g['vendors'], 'vendor')} across {_join(g['departments'])} offer "
+        f"near-identical services ({g['service']}, {fmt_compact(from_cents(g['cents']))})."
+        for g in candidate.get("overlaps", ())[:limit]
+    )
+
+
+def _opportunity_context(candidate, total_cents):
+    summary, actions, largest = _recommendation_parts(candidate)
+    summary = " ".join(part for part in (_overlap_sentence(candidate), summary) if part)
+    action = _join(actions) or "review the contracts for unused capacity"
+    next_step = largest or action
+    survivor = candidate.get("survivor")
+    return {
+        "name": candidate["name"],
+        "name_upper": candidate["name"].upper(),
+        "vendor_count": candidate["vendors"],
+        "spend": fmt_compact(from_cents(candidate["cents"])),
+        "spend_pct": fmt_pct(candidate["cents"], total_cents),
+        "vendor_list": _vendor_list(candidate),
+        "lead_vendors": _join(short_vendor_name(name) for name, _ in candidate["top_vendors"][:3]),
+        "departments": _join(candidate["departments"]),
+        "survivor": short_vendor_name(survivor) if survivor else "the preferred vendor",
+        "recommendation_summary": summary,
+        "action": action[0].upper() + action[1:] + ".",
+        "next_step": next_step[0].upper() + next_step[1:] + ".",
+    }
+
+
+# =============================================================================
+# RENDERING
+# =============================================================================
+
+class _DefaultContext(dict):
+    """Template context in which departments absent from the data render as zero."""
+
+    def __missing__(self, key):
+        if key.startswith("dept_pct_"):
+            return "0.0%"
+        if key.startswith("dept_spend_"):
+            return "$0"
+        raise KeyError(key)
+
+
+def _whole_dollars(cents):
+    """Cents rounded half up to whole dollars, as the opportunity rows show them."""
+    return (cents + 50) // 100
+
+
+def report_context(agg, candidates, selected, memo_date=MEMO_DATE):
+    """Build the substitution context for all report templates from a SpendAggregate
+    and its opportunity candidates (selected: the ones reported).
+
+    The total savings is the sum of the rows' whole-dollar savings, so the
+    stated total always adds up to the rows shown above it.
+    """
+    total = agg.total_spend
+    total_savings = sum(_whole_dollars(o["savings_cents"]) for o in selected)
+    counts = agg.recommendation_counts
+    top_vendor = short_vendor_name(agg.top_vendor) if agg.top_vendor else "N/A"
+
+    context = {
+        "memo_date": memo_date,
+        "vendor_count": agg.classified,
+        "total_spend_usd": fmt_usd(total),
+        "total_spend_m": fmt_millions(total),
+        "top_vendor": top_vendor,
+        "top_vendor_spend_usd": fmt_usd(agg.top_vendor_spend),
+        "top_vendor_spend_m": fmt_millions(agg.top_vendor_spend),
+        "top_vendor_pct": fmt_pct(agg.top_vendor_spend, total),
+        "total_savings": total_savings,
+        "total_savings_usd": fmt_usd(total_savings),
+        "total_savings_m": fmt_millions(total_savings),
+        "savings_pct": fmt_pct(total_savings, total),
+        "terminate_count": counts.get("Terminate", 0),
+        "consolidate_count": counts.get("Consolidate", 0),
+        "optimize_count": counts.get("Optimize", 0),
+        "terminate_spend_k": fmt_thousands(agg.terminate_savings),
+        "consolidate_spend_k": fmt_thousands(agg.consolidate_savings),
+    }
+
+    concentration = agg.concentration.summary()["total"]
+    long_tail_threshold, long_tail = next(iter(concentration["long_tail"].items()))
+    context.update({
+        "top5_pct": f"{concentration['top5_share'] * 100:.1f}%",
+        "hhi": f"{concentration['hhi']:,.0f}",
+        "long_tail_threshold": fmt_usd(float(long_tail_threshold)),
+        "long_tail_count": long_tail["vendors"],
+        "long_tail_spend_k": fmt_thousands(long_tail["spend"]),
+    })
+    for level, count in concentration["pareto"].items():
+        context[f"pareto_{level.rstrip('%')}_count"] = count
+
+    for dept, spend in agg.dept_spend.items():
+        context[f"dept_pct_{_slug(dept)}"] = fmt_pct(spend, total)
+        context[f"dept_spend_{_slug(dept)}"] = fmt_usd(spend)
+    top_departments = sorted(agg.dept_spend.items(), key=lambda x: -x[1])[:2]
+    context["top_departments"] = _join(f"{dept} at {fmt_pct(spend, total)}"
+                                       for dept, spend in top_departments)
+
+    # Opportunities and the function clusters behind them
+    names = [o["name"] for o in selected]
+    context["opportunity_count"] = len(selected)
+    context["opportunity_names"] = _join(names) or "none found"
+    for i in range(OPPORTUNITY_COUNT):
+        context[f"opportunity_{i + 1}"] = names[i] if i < len(names) else "the remaining vendors"
+    crowded = sorted((c for c in candidates if c["kind"] == "function"
+                      and c["name"] in _TAXONOMY and c["vendors"] > 1),
+                     key=lambda c: (-c["vendors"], -c["cents"]))[:3]
+    context["fragmentation"] = (
+        _join(f"{c['vendors']} {c['name']} vendors" for c in crowded)
+        if crowded else "no function is served by more than one vendor"
+    )
+    terminated = sorted((c for c in candidates if c["kind"] == "function"
+                         and c["rec_cents"].get("Terminate")),
+                        key=lambda c: -c["rec_cents"]["Terminate"])[:3]
+    context["terminate_functions"] = _join(c["name"] for c in terminated) or "no function"
+    overlapping = [c for c in candidates if c["kind"] == "overlap"]
+    context["overlap_summary"] = (
+        f"{_count(len(overlapping), 'group')} of near-identical services across departments, "
+        f"{sum(c['vendors'] for c in overlapping)} vendors and "
+        f"{fmt_compact(from_cents(sum(c['cents'] for c in overlapping)))} combined"
+        if overlapping else "no near-identical services across departments"
+    )
+    context["savings_rates"] = ", ".join(
+        f"{rec} {basis_points / 100:g}%" for rec, basis_points in SAVINGS_BASIS_POINTS.items()
+    )
+    return context
+
+
+def render_opportunities(agg, candidates, memo_date=MEMO_DATE, count=OPPORTUNITY_COUNT):
+    """Render the Top 3 Opportunities rows and the shared template context for one
+    aggregate and its find_opportunities() candidates."""
+    selected = select_opportunities(candidates, count)
+    context = _DefaultContext(report_context(agg, candidates, selected, memo_date))
+    rows = []
+    for opp in selected:
+        templates = OPPORTUNITY_TEMPLATES[opp["kind"]]
+        opp_context = _opportunity_context(opp, agg.total_cents)
+        savings = _whole_dollars(opp["savings_cents"])
+        rows.append({
+            "title": templates["title"].substitute(opp_context),
+            "memo_title": templates["memo_title"].substitute(opp_context),
+            "explanation": templates["explanation"].substitute(opp_context),
+            "memo": templates["memo"].substitute(opp_context),
+            "savings": savings,
+            "savings_usd": fmt_usd(savings),
+        })
+    return {
+        "context": dict(context),
+        "opportunities": rows,
+        "total_savings": context["total_savings"],
+        "total_savings_usd": context["total_savings_usd"],
+    }
+
+
+def render_documents(rendered_opportunities):
+    """Render the methodology and memo text from a render_opportunities() result."""
+    context = _DefaultContext(rendered_opportunities["context"])
+    sections = []
+    for index, opp in enumerate(rendered_opportunities["opportunities"], start=1):
+        sections.append(MEMO_OPPORTUNITY_TEMPLATE.substitute(
+            index=index,
+            memo_title=opp["memo_title"],
+            savings_k=fmt_thousands(opp["savings"]),
+            body=opp["memo"],
+        ))
+    context["opportunity_sections"] = "\n\n".join(sections)
+    return {
+        "methodology": METHODOLOGY_TEMPLATE.substitute(context),
+        "memo": MEMO_TEMPLATE.substitute(context),
+    }
+
+
+def render_reports(agg, candidates, memo_date=MEMO_DATE):
+    """Render the opportunity rows, methodology text and memo text for one aggregate."""
+    rendered = render_opportunities(agg, candidates, memo_date)
+    return {**rendered, **render_documents(rendered)}
+
+
+def render_report_batch(companies, memo_date=MEMO_DATE):
+    """Render reports for many companies:
+    {company: (aggregate, opportunity candidates)} -> {company: rendered}."""
+    return {
+        company: render_reports(agg, candidates, memo_date)
+        for company, (agg, candidates) in companies.items()
+    }
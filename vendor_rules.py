@@ -0,0 +1,306 @@
+"""
+Recommendation Rules
+================================
+Derives each vendor's Terminate / Consolidate / Optimize recommendation from
+computed features instead of taking it only from VENDOR_DB:
+
+- function: what the vendor does (a keyword taxonomy over its description,
+  else its department); cluster_size is how many vendors share it and
+  cluster_rank the vendor's spend rank inside it (0 = largest)
+- region_duplicates: other vendors with the same function in the same region
+- spend_percentile: share of vendors with spend at or below this one
+- trend and months_since_billed: activity from the monthly spend series
+  (vendor_timeseries), zero when there is none
+- overlap_departments and overlap_rank: departments spanned by the vendor's
+  near-identical-description group (vendor_overlap) and its spend rank in
+  the group, zero when it is in none
+
+RULES is a declarative table evaluated first-match-wins. Conditions name a
+feature, a comparison and a literal or a threshold name, so the table is
+compiled once into NumPy comparisons over the feature arrays and rescoring
+with new thresholds does not touch the rows again:
+
+    features = build_features(rows, trends, overlaps)
+    recs, rule_index = score(features, {**DEFAULT_THRESHOLDS, "tail_percentile": 0.3})
+
+The static recommendation is kept as a prior for vendors found in VENDOR_DB
+and for vendors the fallback heuristics recommend terminating (e.g.
+catering and restaurants): for them only rules marked as overriding the
+prior (stopped billing) apply, unless use_prior=False.
+"""
+
+import operator
+import re
+from collections import namedtuple
+
+import numpy as np
+
+from vendor_money import encode
+from vendor_timeseries import STOPPED_BILLING_MONTHS
+
+RECOMMENDATIONS = ("Terminate", "Consolidate", "Optimize")
+DEFAULT_RECOMMENDATION = "Optimize"
+
+Rule = namedtuple("Rule", "name recommendation overrides_prior conditions")
+
+RULES = (
+    Rule("stopped-billing", "Terminate", True,
+         (("months_since_billed", ">=", "stopped_months"),)),
+    Rule("small-in-crowded-function", "Terminate", False,
+         (("spend_percentile", "<=", "tail_percentile"),
+          ("cluster_size", ">=", "crowded_cluster"),
+          ("trend", "<=", 0))),
+    Rule("cross-department-overlap", "Consolidate", False,
+         (("overlap_departments", ">=", "overlap_departments"), ("overlap_rank", ">=", 1))),
+    Rule("duplicate-in-region", "Consolidate", False,
+         (("region_duplicates", ">=", 1), ("cluster_rank", ">=", 1))),
+    Rule("crowded-function", "Consolidate", False,
+         (("cluster_size", ">=", "crowded_cluster"), ("cluster_rank", ">=", 1))),
+)
+
+DEFAULT_THRESHOLDS = {
+    "stopped_months": STOPPED_BILLING_MONTHS,
+    "tail_percentile": 0.2,
+    "crowded_cluster": 3,
+    "overlap_departments": 2,
+}
+
+# Function taxonomy: the first group (in this order) with a keyword in the
+# description names the vendor's function. Keywords match whole words, with
+# an optional plural "s"
+FUNCTION_KEYWORDS = (
+    ("CRM & Sales Data", ("crm", "sales intelligence", "contact data", "prospecting")),
+    ("Hotels & Venues", ("hotel", "conference venue", "accommodation")),
+    ("Catering & Dining", ("catering", "restaurant", "dining", "food", "coffee", "bakery")),
+    ("Travel", ("travel", "flight", "airline", "transportation", "shuttle", "taxi")),
+    ("Workspace", ("coworking", "office space", "workspace", "serviced office")),
+    ("Insurance", ("insurance", "insurer")),
+    ("Legal", ("legal", "law firm", "solicitor", "notary", "attorney")),
+    ("Accounting & Tax", ("accounting", "tax", "audit", "payroll")),
+    ("Recruitment & HR", ("recruiting", "recruitment", "recruiter", "staffing", "hr",
+                          "employer-of-record", "talent")),
+    ("Contractors", ("contractor", "freelance")),
+    ("Telecom", ("telecom", "mobile", "internet service", "connectivity")),
+    ("Cloud & Hosting", ("cloud", "hosting", "infrastructure", "monitoring", "log management")),
+    ("Consulting", ("consulting", "consultancy", "consultant", "advisory")),
+    ("Wellness & Benefits", ("wellness", "health", "medical", "clinic", "gym", "club membership")),
+    ("Marketing & Events", ("marketing", "advertising", "event", "sponsorship")),
+    ("Office Supplies", ("supplies", "stationery", "retail store")),
+)
+
+_OPERATORS = {"<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge,
+              "==": operator.eq, "!=": operator.ne}
+
+FEATURES = ("cluster_size", "cluster_rank", "region_duplicates", "spend_percentile", "trend",
+            "months_since_billed", "overlap_departments", "overlap_rank")
+
+
+def _function_patterns():
+    return [(name, re.compile(rf"\b(?:{'|'.join(re.escape(k) for k in keywords)})s?\b"))
+            for name, keywords in FUNCTION_KEYWORDS]
+
+
+_FUNCTIONS = _function_patterns()
+
+
+def keyword_function(description):
+    """Taxonomy function named by a description's keywords, or None."""
+    text = (description or "").lower()
+    for name, pattern in _FUNCTIONS:
+        if pattern.search(text):
+            return name
+    return None
+
+
+def vendor_function(description, department):
+    """Function name for a vendor: first keyword group found in its description, else department."""
+    return keyword_function(description) or department or "Unknown"
+
+
+# =============================================================================
+# FEATURES
+# =============================================================================
+
+def keeps_prior(row):
+    """Whether a classified row's static recommendation stands as a prior: a
+    VENDOR_DB entry, or a fallback Terminate."""
+    return row.source == "db" or (row.source == "fallback" and row.rec == "Terminate")
+
+
+def build_features(rows, trends=None, overlaps=None):
+    """Feature arrays (one entry per row, in row order) for score()."""
+    functions, regions, priors, kept, cents, activity, overlap = [], [], [], [], [], [], []
+    for row in rows:
+        functions.append(vendor_function(row.desc, row.dept))
+        regions.append(row.region)
+        priors.append(row.rec)
+        kept.append(keeps_prior(row))
+        cents.append(row.cents)
+        activity.append(trends.lookup(row) if trends is not None else None)
+        overlap.append(overlaps.lookup(row) if overlaps is not None else None)
+    n = len(cents)
+    cents = np.asarray(cents, dtype=np.int64)
+
+    function_codes, function_names = encode(functions)
+    cluster_size = np.bincount(function_codes, minlength=len(function_names))[function_codes]
+
+    # Rank within the function by spend (largest first, earlier rows first on ties)
+    order = np.lexsort((np.arange(n), -cents, function_codes))
+    group_start = np.searchsorted(function_codes[order], function_codes[order], side="left")
+    cluster_rank = np.empty(n, dtype=np.int64)
+    cluster_rank[order] = np.arange(n) - group_start
+
+    region_codes, region_names = encode(regions)
+    pair_codes = function_codes * len(region_names) + region_codes
+    pair_counts = np.bincount(pair_codes, minlength=len(function_names) * len(region_names))
+    region_duplicates = pair_counts[pair_codes] - 1
+
+    spend_percentile = (np.searchsorted(np.sort(cents), cents, side="right") / n
+                        if n else np.zeros(0))
+
+    trend = np.zeros(n)
+    months_since_billed = np.zeros(n, dtype=np.int64)
+    tracked = np.fromiter((i is not None for i in activity), dtype=bool, count=n)
+    if tracked.any():
+        index = np.fromiter((i for i in activity if i is not None), dtype=np.int64)
+        active = trends.months_active[index] > 0
+        trend[tracked] = trends.trend[index]
+        months_since_billed[tracked] = np.where(active, trends.months_since_billed[index], 0)
+
+    overlap_departments = np.zeros(n, dtype=np.int64)
+    overlap_rank = np.zeros(n, dtype=np.int64)
+    found = np.fromiter((i is not None for i in overlap), dtype=bool, count=n)
+    if found.any():
+        index = np.fromiter((i for i in overlap if i is not None), dtype=np.int64)
+        overlap_departments[found] = overlaps.departments[index]
+        overlap_rank[found] = overlaps.rank[index]
+
+    return {
+        "function": np.asarray(function_names, dtype=object)[function_codes],
+        "cluster_size": cluster_size,
+        "cluster_rank": cluster_rank,
+        "region_duplicates": region_duplicates,
+        "spend_percentile": spend_percentile,
+        "trend": trend,
+        "months_since_billed": months_since_billed,
+        "overlap_departments": overlap_departments,
+        "overlap_rank": overlap_rank,
+        "prior": np.asarray(priors, dtype=object),
+        "keeps_prior": np.asarray(kept, dtype=bool),
+    }
+
+
+class ReferenceFeatures:
+    """Features of single vendors scored as one more vendor among a fixed set of
+    reference rows, from counts taken once over the references.
+
+    features(rows) equals build_features(references + [row], overlaps=...)
+    for each row on its own (no monthly spend), for a whole batch of rows at
+    once, so a long-running classifier does not rebuild the reference set per
+    name. overlap_index is a vendor_overlap.OverlapIndex of the references.
+    """
+
+    def __init__(self, rows, overlap_index):
+        self.overlap_index = overlap_index
+        self.function_cents = {}
+        self.pairs = {}
+        cents = []
+        for row in rows:
+            function = vendor_function(row.desc, row.dept)
+            self.function_cents.setdefault(function, []).append(row.cents)
+            self.pairs[(function, row.region)] = self.pairs.get((function, row.region), 0) + 1
+            cents.append(row.cents)
+        self.function_cents = {f: np.sort(np.asarray(c, dtype=np.int64))
+                               for f, c in self.function_cents.items()}
+        self.sorted_cents = np.sort(np.asarray(cents, dtype=np.int64))
+
+    def features(self, rows):
+        """Feature arrays for score(), one entry per row, in row order."""
+        rows = list(rows)
+        n = len(rows)
+        functions = [vendor_function(row.desc, row.dept) for row in rows]
+        cents = np.fromiter((row.cents for row in rows), dtype=np.int64, count=n)
+        empty = np.zeros(0, dtype=np.int64)
+        peers = [self.function_cents.get(f, empty) for f in functions]
+        # The row ranks after every reference with at least its spend
+        cluster_rank = np.fromiter(
+            (len(p) - np.searchsorted(p, c, side="left") for p, c in zip(peers, cents.tolist())),
+            dtype=np.int64, count=n)
+        overlap_departments, overlap_rank = self.overlap_index.query(rows)
+        return {
+            "function": np.asarray(functions, dtype=object),
+            "cluster_size": np.fromiter((len(p) + 1 for p in peers), dtype=np.int64, count=n),
+            "cluster_rank": cluster_rank,
+            "region_duplicates": np.fromiter(
+                (self.pairs.get((f, row.region), 0) for f, row in zip(functions, rows)),
+                dtype=np.int64, count=n),
+            "spend_percentile": ((np.searchsorted(self.sorted_cents, cents, side="right") + 1)
+                                 / (len(self.sorted_cents) + 1)),
+            "trend": np.zeros(n),
+            "months_since_billed": np.zeros(n, dtype=np.int64),
+            "overlap_departments": overlap_departments,
+            "overlap_rank": overlap_rank,
+            "prior": np.asarray([row.rec for row in rows], dtype=object),
+            "keeps_prior": np.fromiter((keeps_prior(row) for row in rows), dtype=bool, count=n),
+        }
+
+
+# =============================================================================
+# RULES
+# =============================================================================
+
+def compile_rules(rules=RULES):
+    """Check a rule table and turn each condition into (feature, comparison, operand)."""
+    compiled = []
+    for rule in rules:
+        if rule.recommendation not in RECOMMENDATIONS:
+            raise ValueError(f"Rule {rule.name!r}: unknown recommendation {rule.recommendation!r}")
+        conditions = []
+        for feature, op, operand in rule.conditions:
+            if feature not in FEATURES:
+                raise ValueError(f"Rule {rule.name!r}: unknown feature {feature!r}")
+            if op not in _OPERATORS:
+                raise ValueError(f"Rule {rule.name!r}: unknown comparison {op!r}")
+            conditions.append((feature, _OPERATORS[op], operand))
+        compiled.append((rule, conditions))
+    return compiled
+
+
+_COMPILED = compile_rules()
+
+
+def score(features, thresholds=None, use_prior=True, compiled=None):
+    """Evaluate the rules over all vendors at once.
+
+    Returns (recommendations, rule_index): an object array of recommendations
+    and the index of the rule that decided each (-1 for the prior/default).
+    """
+    thresholds = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+    compiled = compiled if compiled is not None else _COMPILED
+    n = len(features["prior"])
+    keep_prior = features["keeps_prior"] if use_prior else np.zeros(n, dtype=bool)
+
+    masks = []
+    for rule, conditions in compiled:
+        mask = np.ones(n, dtype=bool) if rule.overrides_prior else ~keep_prior
+        for feature, compare, operand in conditions:
+            value = thresholds[operand] if isinstance(operand, str) else operand
+            mask &= compare(features[feature], value)
+        masks.append(mask)
+
+    rule_index = np.full(n, -1, dtype=np.int64)
+    recs = np.where(keep_prior, features["prior"], DEFAULT_RECOMMENDATION).astype(object)
+    # Apply in reverse so the first matching rule is written last
+    for i in range(len(masks) - 1, -1, -1):
+        recs[masks[i]] = compiled[i][0].recommendation
+        rule_index[masks[i]] = i
+    return recs, rule_index
+
+
+def rule_hits(rule_index, compiled=None):
+    """{rule name: vendors decided by it}, plus "prior/default"."""
+    compiled = compiled if compiled is not None else _COMPILED
+    counts = np.bincount(rule_index + 1, minlength=len(compiled) + 1)
+    hits = {"prior/default": int(counts[0])}
+    hits.update({rule.name: int(c) for (rule, _), c in zip(compiled, counts[1:])})
+    return hits
@@ -0,0 +1,132 @@
+"""
+Whole-Run Cache
+================================
+Content-addressed cache of complete runs. A run's key is the SHA-256 of:
+
+- the input workbook's bytes (and the --compare-to workbook's, if given)
+- the source of every vendor_*.py module, which holds VENDOR_DB, the
+  fallback rules, the savings parameters and the report templates
+- the installed openpyxl version and the run options, including the diff
+  baseline (the digest of the previous run in the history store), since
+  the Changes sheet depends on it
+
+When a run with the same key has completed before, its output files and
+metrics are copied back instead of recomputing them, and side files the
+cached run did not produce are removed so none is left over from another
+run. Entries are written to
+a temporary directory and renamed into place, so an interrupted run never
+leaves a partial entry behind.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import openpyxl
+
+CACHE_VERSION = 1
+DEFAULT_CACHE_DIR = ".vendor_run_cache"
+_CHUNK = 1 << 20
+
+
+def _hash_file(h, path):
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK), b""):
+            h.update(chunk)
+
+
+def code_files():
+    """The modules whose source determines a run's results."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    return sorted(glob.glob(os.path.join(here, "vendor_*.py")))
+
+
+def run_key(input_file, options=None, extra_files=()):
+    """Return the hex cache key for a run over input_file with the given options."""
+    h = hashlib.sha256()
+    h.update(f"vendor-run-cache/{CACHE_VERSION}/openpyxl-{openpyxl.__version__}\0".encode())
+    h.update(json.dumps(options or {}, sort_keys=True, default=str).encode() + b"\0")
+    for path in [input_file] + [p for p in extra_files if p]:
+        _hash_file(h, path)
+        h.update(b"\0")
+    for path in code_files():
+        h.update(os.path.basename(path).encode() + b"\0")
+        _hash_file(h, path)
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+# =============================================================================
+# CACHE
+# =============================================================================
+
+class RunCache:
+    """Directory of completed runs: <cache_dir>/<key>/{metrics.json, artifact files}."""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+
+    def _entry(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def get(self, key, destinations):
+        """Restore a cached run.
+
+        destinations maps an artifact name (a key of the cached metrics, such as
+        "output_file") to the path it should be copied to. Returns the cached
+        metrics with those paths substituted, or None on a miss. A destination
+        the cached run produced no file for is removed.
+        """
+        entry = self._entry(key)
+        metrics_path = os.path.join(entry, "metrics.json")
+        if not os.path.exists(metrics_path):
+            return None
+        with open(metrics_path) as f:
+            cached = json.load(f)
+        metrics = cached["metrics"]
+        for name, filename in cached["artifacts"].items():
+            dest = destinations.get(name)
+            if dest is None:
+                metrics[name] = None
+                continue
+            shutil.copyfile(os.path.join(entry, filename), dest)
+            metrics[name] = dest
+        for name, dest in destinations.items():
+            if name not in cached["artifacts"] and dest and os.path.exists(dest):
+                os.remove(dest)
+        return metrics
+
+    def discard(self, key):
+        """Remove a cached run."""
+        shutil.rmtree(self._entry(key), ignore_errors=True)
+
+    def put(self, key, metrics, artifacts):
+        """Store a completed run; artifacts maps artifact names to the files produced."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        entry = self._entry(key)
+        if os.path.exists(entry):
+            return
+        tmp = tempfile.mkdtemp(prefix=f".{key[:12]}-", dir=self.cache_dir)
+        try:
+            stored = {}
+            for name, path in artifacts.items():
+                if path and os.path.exists(path):
+                    filename = f"{name}{os.path.splitext(path)[1]}"
+                    shutil.copyfile(path, os.path.join(tmp, filename))
+                    stored[name] = filename
+            with open(os.path.join(tmp, "metrics.json"), "w") as f:
+                json.dump({"key": key, "metrics": metrics, "artifacts": stored}, f,
+                          indent=2, default=str)
+            try:
+                os.replace(tmp, entry)
+            except OSError:
+                # Another process stored the same run first
+                if not os.path.exists(entry):
+                    raise
+                shutil.rmtree(tmp, ignore_errors=True)
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
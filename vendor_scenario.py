@@ -0,0 +1,453 @@
+#!/usr/bin/env python3
+"""
+What-If Scenarios
+================================
+Flip individual vendors between Terminate, Consolidate and Optimize and see
+the recommendation counts, department totals, savings and the spend cube
+update immediately, without rerunning the analysis.
+
+A Scenario is built once from the classified rows (or the vendor export of
+a finished run). Each change is applied as a delta: the vendor's spend,
+count and estimated savings move from its old recommendation to the new one
+in the overall, per-department, per-opportunity and cube totals, so a change
+costs the same handful of dict updates however many vendors there are.
+Changes can be undone and redone.
+
+Savings are the action planner's estimate (vendor_planner
+SAVINGS_BASIS_POINTS of each vendor's spend for its recommendation), the
+same basis as the Top 3 Opportunities and the Action Plan, and the function
+clusters and overlap groups are the opportunities find_opportunities ranks.
+
+Saving writes the scenario back to the completed workbook: column E and
+Consolidate Into, the Top 3 Opportunities, Methodology and memo tabs, the
+Consolidation Map, Action Plan and Spend Pivot tabs (rebuilt by the
+analysis stages from the scenario's recommendations) and a Scenario tab
+listing every change.
+
+Usage:
+    python3 vendor_scenario.py --vendors Vendor_Analysis_Vendors.csv \\
+        --workbook Vendor_Analysis_Assessment_Completed.xlsx
+    scenario> find lusha
+    scenario> set 42 Terminate
+    scenario> undo
+    scenario> save
+"""
+
+import argparse
+import cmd
+import csv
+import time
+
+import openpyxl
+
+from vendor_analysis import CONSOLIDATE_INTO_COLUMN, apply_summary_cells, summary_tab_cells
+from vendor_consolidation import assign_targets
+from vendor_cube import SpendCube, pivot_tables
+from vendor_history import vendor_key
+from vendor_money import format_cents, from_cents, to_cents
+from vendor_overlap import find_overlaps
+from vendor_pipeline import VendorRow, aggregate_rows
+from vendor_planner import (DEFAULT_MAX_ACTIONS, DEFAULT_MAX_DEPT_RISK, action_savings,
+                            plan_actions)
+from vendor_reports import (OPPORTUNITY_COUNT, find_opportunities, render_documents,
+                            render_opportunities)
+from vendor_rules import vendor_function
+from vendor_writer import add_table_sheet
+
+RECOMMENDATIONS = ("Terminate", "Consolidate", "Optimize")
+DEFAULT_VENDORS_FILE = "Vendor_Analysis_Vendors.csv"
+DEFAULT_WORKBOOK_FILE = "Vendor_Analysis_Assessment_Completed.xlsx"
+
+
+def load_vendor_rows(path):
+    """VendorRows from a Vendor_Analysis_Vendors.csv export (see vendor_export)."""
+    with open(path, newline="", encoding="utf-8") as f:
+        for record in csv.DictReader(f):
+            def text(field):
+                return record.get(field) or None
+
+            yield VendorRow(
+                int(record["row"]), record["vendor"],
+                float(record["amount"]) if record.get("amount") else None,
+                to_cents(float(record["spend"] or 0)), text("currency"),
+                text("department"), text("description"), text("recommendation"),
+                text("source"), text("entity_type"), text("region"),
+            )
+
+
+# =============================================================================
+# SCENARIO
+# =============================================================================
+
+class Scenario:
+    """Recommendation changes over one run's vendors, with O(1) delta totals."""
+
+    def __init__(self, rows):
+        self.rows = {}
+        self.vendors = {}
+        self.clusters = {}
+        self.baseline = {}
+        self.recs = {}
+        self.total_cents = 0
+        self.dept_cents = {}
+        self.recommendation_counts = dict.fromkeys(RECOMMENDATIONS, 0)
+        self.rec_cents = dict.fromkeys(RECOMMENDATIONS, 0)
+        self.savings_cents = 0
+        self.dept_savings = {}
+        self.opportunity_savings = {}
+        self.cube = SpendCube()
+        self._by_key = {}
+        self._undo = []
+        self._redo = []
+
+        rows = list(rows)
+        # Overlap groups depend on descriptions only, so they hold for every scenario
+        self.overlaps = find_overlaps(rows)
+        self._conflicts = {}
+        depts, recs, regions, sources, cents = [], [], [], [], []
+        for row in rows:
+            self.rows[row.row_idx] = row
+            self.vendors[row.row_idx] = (row.vendor, row.dept, row.region, row.source, row.cents)
+            self.clusters[row.row_idx] = self._opportunity_keys(row)
+            self.baseline[row.row_idx] = self.recs[row.row_idx] = row.rec
+            self._by_key.setdefault(vendor_key(row.vendor), []).append(row.row_idx)
+            self.total_cents += row.cents
+            self.dept_cents[row.dept] = self.dept_cents.get(row.dept, 0) + row.cents
+            self._count(row.row_idx, row.rec, 1)
+            for column, value in ((depts, row.dept), (recs, row.rec), (regions, row.region),
+                                  (sources, row.source), (cents, row.cents)):
+                column.append(value)
+        self.cube.add_batch((depts, recs, regions, sources), cents)
+        self.baseline_counts = dict(self.recommendation_counts)
+        self.baseline_rec_cents = dict(self.rec_cents)
+        self.baseline_savings_cents = self.savings_cents
+        self.baseline_dept_savings = dict(self.dept_savings)
+        self.baseline_opportunity_savings = dict(self.opportunity_savings)
+
+    @classmethod
+    def load(cls, vendors_file=DEFAULT_VENDORS_FILE):
+        return cls(load_vendor_rows(vendors_file))
+
+    def __len__(self):
+        return len(self.vendors)
+
+    def _opportunity_keys(self, row):
+        """("function", name) and, in an overlap group, ("overlap", service): the
+        find_opportunities candidates the vendor belongs to."""
+        keys = [("function", vendor_function(row.desc, row.dept))]
+        index = self.overlaps.lookup(row)
+        if index is not None and self.overlaps.group[index] > 0:
+            keys.append(("overlap", self.overlaps.groups[self.overlaps.group[index] - 1]["service"]))
+            for key, other in ((keys[0], keys[1]), (keys[1], keys[0])):
+                self._conflicts.setdefault(key, set()).add(other)
+        return tuple(keys)
+
+    def _count(self, row_idx, rec, sign):
+        _, dept, _, _, cents = self.vendors[row_idx]
+        saved = sign * action_savings(cents, rec)
+        self.recommendation_counts[rec] = self.recommendation_counts.get(rec, 0) + sign
+        self.rec_cents[rec] = self.rec_cents.get(rec, 0) + sign * cents
+        self.savings_cents += saved
+        self.dept_savings[dept] = self.dept_savings.get(dept, 0) + saved
+        for key in self.clusters[row_idx]:
+            self.opportunity_savings[key] = self.opportunity_savings.get(key, 0) + saved
+
+    def _move(self, row_idx, old, new):
+        _, dept, region, source, cents = self.vendors[row_idx]
+        self._count(row_idx, old, -1)
+        self._count(row_idx, new, 1)
+        self.cube.move(dept, region, source, cents, old, new)
+        self.recs[row_idx] = new
+
+    # -------------------------------------------------------------------------
+    # Changes
+    # -------------------------------------------------------------------------
+
+    def set(self, row_idx, recommendation):
+        """Change one vendor's recommendation; returns False if it already had it."""
+        if row_idx not in self.vendors:
+            raise KeyError(f"No vendor on row {row_idx}")
+        if recommendation not in RECOMMENDATIONS:
+            raise ValueError(f"Unknown recommendation {recommendation!r} "
+                             f"(choose from {', '.join(RECOMMENDATIONS)})")
+        old = self.recs[row_idx]
+        if old == recommendation:
+            return False
+        self._move(row_idx, old, recommendation)
+        self._undo.append((row_idx, old, recommendation))
+        self._redo.clear()
+        return True
+
+    def undo(self):
+        """Revert the last change; returns it as (row, old, new), or None."""
+        if not self._undo:
+            return None
+        change = self._undo.pop()
+        row_idx, old, new = change
+        self._move(row_idx, new, old)
+        self._redo.append(change)
+        return change
+
+    def redo(self):
+        """Reapply the last undone change; returns it, or None."""
+        if not self._redo:
+            return None
+        change = self._redo.pop()
+        row_idx, old, new = change
+        self._move(row_idx, old, new)
+        self._undo.append(change)
+        return change
+
+    def find(self, vendor_name):
+        """Rows of the vendors with this name (case- and whitespace-insensitive)."""
+        return list(self._by_key.get(vendor_key(vendor_name), ()))
+
+    def changes(self):
+        """{row: (baseline recommendation, scenario recommendation)} for changed vendors."""
+        return {row_idx: (self.baseline[row_idx], rec) for row_idx, rec in self.recs.items()
+                if rec != self.baseline[row_idx]}
+
+    def current_rows(self):
+        """The VendorRows with their scenario recommendations, in row order."""
+        for row_idx, row in sorted(self.rows.items()):
+            yield row._replace(rec=self.recs[row_idx])
+
+    # -------------------------------------------------------------------------
+    # Totals
+    # -------------------------------------------------------------------------
+
+    def dept_savings_cents(self, dept, baseline=False):
+        totals = self.baseline_dept_savings if baseline else self.dept_savings
+        return totals.get(dept, 0)
+
+    def top_opportunities(self, count=OPPORTUNITY_COUNT, baseline=False):
+        """[((kind, name), estimated savings cents)] of the Top 3 Opportunities:
+        as select_opportunities, the function clusters and overlap groups with
+        the largest savings, skipping any that shares a vendor with one chosen."""
+        totals = self.baseline_opportunity_savings if baseline else self.opportunity_savings
+        selected, taken = [], set()
+        for key, cents in sorted(totals.items(), key=lambda x: -x[1]):
+            if len(selected) == count or cents <= 0:
+                break
+            if key not in taken:
+                selected.append((key, cents))
+                taken.update(self._conflicts.get(key, ()))
+        return selected
+
+    def summary(self):
+        """Current totals in currency units."""
+        return {
+            "vendors": len(self.vendors),
+            "changes": len(self.changes()),
+            "total_spend": from_cents(self.total_cents),
+            "recommendation_counts": dict(self.recommendation_counts),
+            "recommendation_spend": {rec: from_cents(c) for rec, c in self.rec_cents.items()},
+            "savings": from_cents(self.savings_cents),
+            "savings_change": from_cents(self.savings_cents - self.baseline_savings_cents),
+            "dept_savings": {dept: from_cents(self.dept_savings_cents(dept))
+                             for dept in self.dept_cents},
+            "opportunities": {name: from_cents(cents)
+                              for (_, name), cents in self.top_opportunities()},
+        }
+
+    # -------------------------------------------------------------------------
+    # Output
+    # -------------------------------------------------------------------------
+
+    def tables(self):
+        """Build (header, rows, number_formats) blocks for the Scenario sheet:
+        totals against the baseline, savings by department and by opportunity
+        (function cluster or overlap group), then every change."""
+        money = '"$"#,##0'
+        summary_rows = []
+        for rec in RECOMMENDATIONS:
+            before, after = self.baseline_rec_cents.get(rec, 0), self.rec_cents.get(rec, 0)
+            summary_rows.append([rec, self.baseline_counts.get(rec, 0),
+                                 self.recommendation_counts.get(rec, 0),
+                                 from_cents(before), from_cents(after),
+                                 from_cents(after - before)])
+        summary_rows.append(["Estimated Savings", sum(self.baseline_counts.values()),
+                             sum(self.recommendation_counts.values()),
+                             from_cents(self.baseline_savings_cents),
+                             from_cents(self.savings_cents),
+                             from_cents(self.savings_cents - self.baseline_savings_cents)])
+
+        dept_rows = []
+        for dept, cents in sorted(self.dept_cents.items(), key=lambda x: -x[1]):
+            before = self.dept_savings_cents(dept, baseline=True)
+            after = self.dept_savings_cents(dept)
+            dept_rows.append([dept, from_cents(cents), from_cents(before), from_cents(after),
+                              from_cents(after - before)])
+
+        opportunity_rows = []
+        for (kind, name), after in sorted(self.opportunity_savings.items(),
+                                          key=lambda x: -x[1]):
+            before = self.baseline_opportunity_savings.get((kind, name), 0)
+            if before or after:
+                opportunity_rows.append([name, kind.capitalize(), from_cents(before),
+                                         from_cents(after), from_cents(after - before)])
+
+        change_rows = []
+        for row_idx, (before, after) in sorted(self.changes().items()):
+            vendor, dept, _, _, cents = self.vendors[row_idx]
+            change_rows.append([row_idx, vendor, dept, from_cents(cents), before, after])
+
+        return [
+            (["Recommendation", "Baseline Vendors", "Scenario Vendors", "Baseline Spend",
+              "Scenario Spend", "Change"], summary_rows, {3: money, 4: money, 5: money}),
+            (["Department", "Spend", "Baseline Savings", "Scenario Savings", "Change"],
+             dept_rows, {1: money, 2: money, 3: money, 4: money}),
+            (["Opportunity", "Kind", "Baseline Savings", "Scenario Savings", "Change"],
+             opportunity_rows, {2: money, 3: money, 4: money}),
+            (["Row", "Vendor", "Department", "Spend", "Baseline", "Scenario"],
+             change_rows, {3: money}),
+        ]
+
+    def export(self, workbook_file=DEFAULT_WORKBOOK_FILE, output_file=None,
+               plan_max_actions=DEFAULT_MAX_ACTIONS, plan_dept_risk=DEFAULT_MAX_DEPT_RISK,
+               plan_overrides=None):
+        """Write the scenario into a completed workbook.
+
+        The recommendation-dependent outputs are rebuilt from the scenario's
+        rows by the same stage functions the analysis runs: column E and
+        Consolidate Into, the Top 3 Opportunities, Methodology and memo tabs,
+        the Consolidation Map, Action Plan (with the given planner limits) and
+        Spend Pivot tabs. A Scenario tab lists the changes.
+        """
+        rows = list(self.current_rows())
+        consolidation = assign_targets(rows)
+        opportunities = render_opportunities(
+            aggregate_rows(rows), find_opportunities(rows, consolidation, self.overlaps))
+        plan = plan_actions(rows, plan_max_actions, plan_dept_risk, plan_overrides)
+
+        wb = openpyxl.load_workbook(workbook_file)
+        ws = wb["Vendor Analysis Assessment"]
+        for row in rows:
+            ws.cell(row=row.row_idx, column=5).value = row.rec
+            ws.cell(row=row.row_idx, column=CONSOLIDATE_INTO_COLUMN).value = \
+                consolidation.target(row)
+        cells, styles, _ = summary_tab_cells({**opportunities,
+                                              **render_documents(opportunities)})
+        apply_summary_cells(wb, cells, styles)
+
+        _replace_sheet(wb, "Consolidation Map", consolidation.tables(),
+                       widths=[24, 40, 22, 16, 16, 16, 18])
+        _replace_sheet(wb, "Action Plan", plan.tables(), widths=[26, 40, 22, 16, 18, 18, 10])
+        _replace_sheet(wb, "Spend Pivot", pivot_tables(self.cube), widths=[26] + [16] * 13)
+        _replace_sheet(wb, "Scenario", self.tables(), widths=[22, 40, 22, 18, 16, 16])
+
+        output_file = output_file or workbook_file
+        wb.save(output_file)
+        return output_file
+
+
+def _replace_sheet(wb, title, tables, widths):
+    """Rebuild a table sheet in place (appended when the workbook lacks it)."""
+    position = len(wb.sheetnames)
+    if title in wb.sheetnames:
+        position = wb.sheetnames.index(title)
+        del wb[title]
+    sheet = add_table_sheet(wb, title, tables, widths=widths)
+    wb.move_sheet(sheet, offset=position - wb.sheetnames.index(title))
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+class ScenarioShell(cmd.Cmd):
+    """Interactive what-if session over one Scenario."""
+
+    intro = "What-if scenario. Commands: find, set, undo, redo, show, changes, save, quit."
+    prompt = "scenario> "
+
+    def __init__(self, scenario, workbook_file, plan_options=None):
+        super().__init__()
+        self.scenario = scenario
+        self.workbook_file = workbook_file
+        self.plan_options = plan_options or {}
+
+    def _totals(self, elapsed=None):
+        s = self.scenario
+        counts = ", ".join(f"{rec} {s.recommendation_counts.get(rec, 0)}"
+                           for rec in RECOMMENDATIONS)
+        change = s.savings_cents - s.baseline_savings_cents
+        timing = f"  [{elapsed * 1e6:.0f} µs]" if elapsed is not None else ""
+        print(f"  {counts}; savings {format_cents(s.savings_cents)} "
+              f"({'+' if change >= 0 else ''}{format_cents(change)}){timing}")
+
+    def do_find(self, arg):
+        """find VENDOR: list the rows of a vendor."""
+        for row_idx in self.scenario.find(arg):
+            vendor, dept, _, _, cents = self.scenario.vendors[row_idx]
+            print(f"  {row_idx}: {vendor} ({dept}, {format_cents(cents)}) "
+                  f"-> {self.scenario.recs[row_idx]}")
+
+    def do_set(self, arg):
+        """set ROW RECOMMENDATION: change one vendor's recommendation."""
+        try:
+            row, rec = arg.split()
+            start = time.perf_counter()
+            self.scenario.set(int(row), rec.capitalize())
+            self._totals(time.perf_counter() - start)
+        except (ValueError, KeyError) as e:
+            print(f"  {e}")
+
+    def do_undo(self, arg):
+        """undo: revert the last change."""
+        change = self.scenario.undo()
+        print(f"  Undid row {change[0]}: {change[2]} -> {change[1]}" if change
+              else "  Nothing to undo")
+        self._totals()
+
+    def do_redo(self, arg):
+        """redo: reapply the last undone change."""
+        change = self.scenario.redo()
+        print(f"  Redid row {change[0]}: {change[1]} -> {change[2]}" if change
+              else "  Nothing to redo")
+        self._totals()
+
+    def do_show(self, arg):
+        """show: totals and savings by department."""
+        self._totals()
+        for dept in sorted(self.scenario.dept_cents):
+            print(f"    {dept:25s}: {format_cents(self.scenario.dept_savings_cents(dept)):>13}")
+
+    def do_changes(self, arg):
+        """changes: every vendor changed from the baseline."""
+        for row_idx, (before, after) in sorted(self.scenario.changes().items()):
+            print(f"  {row_idx}: {self.scenario.vendors[row_idx][0]}: {before} -> {after}")
+
+    def do_save(self, arg):
+        """save [OUTPUT]: write the scenario into the workbook (or a copy)."""
+        path = self.scenario.export(self.workbook_file, arg.strip() or None,
+                                    **self.plan_options)
+        print(f"  Scenario saved to: {path}")
+
+    def do_quit(self, arg):
+        """quit: leave without saving."""
+        return True
+
+    do_EOF = do_quit
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Interactive what-if recommendation changes.")
+    parser.add_argument("--vendors", default=DEFAULT_VENDORS_FILE,
+                        help="Vendor table export of a completed run")
+    parser.add_argument("--workbook", default=DEFAULT_WORKBOOK_FILE,
+                        help="Completed workbook to write the scenario into")
+    parser.add_argument("--plan-max-actions", type=int, default=DEFAULT_MAX_ACTIONS,
+                        metavar="N", help="Most actions in the rebuilt Action Plan "
+                                          f"(default: {DEFAULT_MAX_ACTIONS})")
+    parser.add_argument("--plan-dept-risk", type=int, default=DEFAULT_MAX_DEPT_RISK,
+                        metavar="POINTS", help="Most risk points of actions per department "
+                                               f"(default: {DEFAULT_MAX_DEPT_RISK})")
+    parser.add_argument("--plan-overrides", default=None, metavar="CSV",
+                        help="vendor,risk,keep file of risk scores and must-keep vendors "
+                             "for the Action Plan")
+    args = parser.parse_args()
+    ScenarioShell(Scenario.load(args.vendors), args.workbook,
+                  {"plan_max_actions": args.plan_max_actions,
+                   "plan_dept_risk": args.plan_dept_risk,
+                   "plan_overrides": args.plan_overrides}).cmdloop()
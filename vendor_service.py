@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""
+Vendor Classification HTTP Service
+================================
+Local asyncio HTTP service exposing the vendor classifier to other internal
+tools without running main() on a workbook. Standard library only.
+
+Endpoints:
+    POST /classify          {"name": "Lusha"}
+    POST /classify/batch    {"names": ["Lusha", "Bdo Llp"]}
+    GET  /metrics           latency, throughput, batching and cache counters
+    GET  /health
+
+Concurrent requests are coalesced into micro-batches (up to --max-batch names
+or --max-delay-ms of waiting, whichever comes first) before being handed to
+the batch classifier, which scores all of a batch's unknown names against
+the precomputed VENDOR_DB references in one pass. Names already classified
+are answered straight from the service cache without entering a batch.
+
+Request bodies are read by Content-Length or as Transfer-Encoding: chunked;
+other transfer codings are answered 501.
+
+Usage:
+    python3 vendor_service.py --host 127.0.0.1 --port 8765
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from collections import OrderedDict, deque
+
+import vendor_analysis
+
+MAX_BODY_BYTES = 8 * 1024 * 1024
+
+
+# =============================================================================
+# METRICS
+# =============================================================================
+
+class ServiceMetrics:
+    """Request, latency, batching and cache counters for the service."""
+
+    def __init__(self, window=10000):
+        self.started = time.monotonic()
+        self.requests = {}
+        self.errors = 0
+        self.names_classified = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.batches = 0
+        self.batched_names = 0
+        self.max_batch_size = 0
+        self.latencies_ms = deque(maxlen=window)
+        self.completed = deque(maxlen=window)
+
+    def record_request(self, route, latency_ms):
+        self.requests[route] = self.requests.get(route, 0) + 1
+        self.latencies_ms.append(latency_ms)
+        self.completed.append(time.monotonic())
+
+    def record_batch(self, size):
+        self.batches += 1
+        self.batched_names += size
+        self.max_batch_size = max(self.max_batch_size, size)
+
+    def snapshot(self):
+        now = time.monotonic()
+        uptime = now - self.started
+        latencies = sorted(self.latencies_ms)
+
+        def percentile(p):
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))], 3)
+
+        recent = sum(1 for t in self.completed if now - t <= 60)
+        total_requests = sum(self.requests.values())
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            "uptime_seconds": round(uptime, 3),
+            "requests": dict(self.requests),
+            "requests_total": total_requests,
+            "errors": self.errors,
+            "names_classified": self.names_classified,
+            "throughput_rps": round(total_requests / uptime, 3) if uptime > 0 else 0.0,
+            "throughput_rps_last_60s": round(recent / min(60.0, uptime), 3) if uptime > 0 else 0.0,
+            "latency_ms": {
+                "p50": percentile(50),
+                "p95": percentile(95),
+                "p99": percentile(99),
+                "max": round(latencies[-1], 3) if latencies else None,
+            },
+            "batches": self.batches,
+            "avg_batch_size": round(self.batched_names / self.batches, 3) if self.batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "cache_hit_rate": round(self.cache_hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+# =============================================================================
+# MICRO-BATCHING CLASSIFIER
+# =============================================================================
+
+class MicroBatcher:
+    """Coalesce concurrent classification requests into batches for classify_vendors(),
+    which scores each batch's unknown names in one score() call."""
+
+    def __init__(self, metrics, max_batch=256, max_delay_ms=2.0, cache_size=100000):
+        self.metrics = metrics
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1000.0
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.queue = asyncio.Queue()
+        self._worker = None
+
+    def start(self):
+        self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._worker:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+
+    def _cache_get(self, name):
+        result = self.cache.get(name)
+        if result is not None:
+            self.cache.move_to_end(name)
+        return result
+
+    def _cache_put(self, name, result):
+        self.cache[name] = result
+        self.cache.move_to_end(name)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    async def classify(self, names):
+        """Classify names, answering cached ones immediately and batching the rest."""
+        results = [self._cache_get(name) for name in names]
+        misses = [i for i, r in enumerate(results) if r is None]
+        self.metrics.cache_hits += len(names) - len(misses)
+        self.metrics.cache_misses += len(misses)
+
+        if misses:
+            future = asyncio.get_running_loop().create_future()
+            await self.queue.put(([names[i] for i in misses], future))
+            for i, result in zip(misses, await future):
+                results[i] = result
+
+        self.metrics.names_classified += len(names)
+        return results
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = [await self.queue.get()]
+            size = len(pending[0][0])
+            deadline = loop.time() + self.max_delay
+            while size < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                pending.append(item)
+                size += len(item[0])
+
+            unique = list(dict.fromkeys(name for names, _ in pending for name in names))
+            self.metrics.record_batch(len(unique))
+            try:
+                classified = await loop.run_in_executor(
+                    None, vendor_analysis.classify_vendors, unique
+                )
+            except Exception as exc:
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+
+            by_name = dict(zip(unique, classified))
+            for name, result in by_name.items():
+                self._cache_put(name, result)
+            for names, future in pending:
+                if not future.done():
+                    future.set_result([by_name[name] for name in names])
+
+
+# =============================================================================
+# HTTP LAYER
+# =============================================================================
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               413: "Payload Too Large", 500: "Internal Server Error", 501: "Not Implemented"}
+
+
+def _content_length(headers):
+    """Body length from the Content-Length header, or None if it is not a
+    non-negative integer."""
+    value = headers.get("content-length", "").strip()
+    if not value:
+        return 0
+    if not (value.isascii() and value.isdigit()):
+        return None
+    return int(value)
+
+
+class BodyError(Exception):
+    """A request body that cannot be read; the connection is answered with
+    status and closed."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+async def _read_chunked(reader, limit=MAX_BODY_BYTES):
+    """Body of a Transfer-Encoding: chunked request (chunk extensions and
+    trailers are read and ignored)."""
+    chunks, size = [], 0
+    while True:
+        line = await reader.readline()
+        text = line.decode("latin-1").split(";", 1)[0].strip()
+        try:
+            length = int(text, 16)
+        except ValueError:
+            raise BodyError(400, "Invalid chunk size") from None
+        if length < 0:
+            raise BodyError(400, "Invalid chunk size")
+        if length == 0:
+            break
+        size += length
+        if size > limit:
+            raise BodyError(413, "Request body too large")
+        chunks.append(await reader.readexactly(length))
+        if await reader.readline() not in (b"\r\n", b"\n"):
+            raise BodyError(400, "Chunk not terminated by CRLF")
+    while await reader.readline() not in (b"\r\n", b"\n", b""):
+        pass
+    return b"".join(chunks)
+
+
+async def _read_body(reader, headers):
+    """Request body per its Content-Length or chunked Transfer-Encoding."""
+    encoding = headers.get("transfer-encoding", "").strip().lower()
+    if encoding:
+        if "content-length" in headers:
+            raise BodyError(400, "Both Content-Length and Transfer-Encoding given")
+        if encoding != "chunked":
+            raise BodyError(501, f"Unsupported Transfer-Encoding {encoding!r}")
+        return await _read_chunked(reader)
+    length = _content_length(headers)
+    if length is None:
+        raise BodyError(400, "Invalid Content-Length header")
+    if length > MAX_BODY_BYTES:
+        raise BodyError(413, "Request body too large")
+    return await reader.readexactly(length) if length else b""
+
+
+def _classification_json(name, result):
+    dept, desc, rec, source = result
+    return {"vendor": name, "department": dept, "description": desc,
+            "recommendation": rec, "source": source}
+
+
+class ClassificationService:
+    """Minimal HTTP/1.1 server (keep-alive, JSON bodies) on top of asyncio streams."""
+
+    def __init__(self, max_batch=256, max_delay_ms=2.0):
+        self.metrics = ServiceMetrics()
+        self.batcher = MicroBatcher(self.metrics, max_batch=max_batch, max_delay_ms=max_delay_ms)
+
+    async def dispatch(self, method, path, body):
+        if path == "/health":
+            return 200, {"ok": True}
+        if path == "/metrics":
+            return 200, self.metrics.snapshot()
+        if path not in ("/classify", "/classify/batch"):
+            return 404, {"error": f"Unknown path {path}"}
+        if method != "POST":
+            return 405, {"error": "Use POST"}
+
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError:
+            return 400, {"error": "Body must be JSON"}
+
+        if path == "/classify":
+            name = payload.get("name") if isinstance(payload, dict) else None
+            if not isinstance(name, str) or not name.strip():
+                return 400, {"error": "Expected {\"name\": \"<vendor name>\"}"}
+            (result,) = await self.batcher.classify([name])
+            return 200, _classification_json(name, result)
+
+        names = payload.get("names") if isinstance(payload, dict) else None
+        if not isinstance(names, list) or not all(isinstance(n, str) for n in names):
+            return 400, {"error": "Expected {\"names\": [\"<vendor name>\", ...]}"}
+        results = await self.batcher.classify(names) if names else []
+        return 200, {"results": [_classification_json(n, r) for n, r in zip(names, results)]}
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                started = time.perf_counter()
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+
+                path = target.split("?", 1)[0]
+                try:
+                    body = await _read_body(reader, headers)
+                except BodyError as exc:
+                    # The rest of the body cannot be skipped reliably: answer and close
+                    status, payload = exc.status, {"error": str(exc)}
+                    keep_alive = False
+                else:
+                    try:
+                        status, payload = await self.dispatch(method.upper(), path, body)
+                    except Exception as exc:
+                        status, payload = 500, {"error": f"{type(exc).__name__}: {exc}"}
+                    keep_alive = (headers.get("connection", "").lower() != "close"
+                                  and version.upper() == "HTTP/1.1")
+
+                if status >= 400:
+                    self.metrics.errors += 1
+                data = json.dumps(payload).encode("utf-8")
+                writer.write(
+                    f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+                    .encode("latin-1") + data
+                )
+                await writer.drain()
+                self.metrics.record_request(path, (time.perf_counter() - started) * 1000.0)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host, port):
+        self.batcher.start()
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        addresses = ", ".join(str(s.getsockname()) for s in server.sockets)
+        print(f"Vendor classification service listening on {addresses}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.batcher.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local vendor classification HTTP service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--max-batch", type=int, default=256,
+                        help="Maximum names per micro-batch")
+    parser.add_argument("--max-delay-ms", type=float, default=2.0,
+                        help="Maximum time to wait while filling a micro-batch")
+    args = parser.parse_args(argv)
+
+    service = ClassificationService(max_batch=args.max_batch, max_delay_ms=args.max_delay_ms)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print("Service stopped.")
+
+
+if __name__ == "__main__":
+    main()
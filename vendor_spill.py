@@ -0,0 +1,234 @@
+"""
+Memory-Budgeted Spilling
+================================
+Disk-backed containers for running under `--max-memory`:
+
+- SpooledRows: an append-only, re-iterable row sequence that keeps at most
+  its share of the budget in memory and spills the rest, in order, to an
+  anonymous temporary file.
+- ExternalSorter: a stable external merge sort. Items are buffered up to the
+  budget, each full buffer is sorted and written out as a run file, and
+  iteration k-way merges the runs (heapq.merge).
+
+Item sizes are estimated with a shallow walk of tuples, lists and strings;
+the estimate is what the budget is enforced against. Spill files are
+anonymous temporary files removed by the OS when closed.
+"""
+
+import heapq
+import pickle
+import re
+import sys
+import tempfile
+
+# Items written per pickle record in a spill file
+SPILL_BATCH = 1024
+
+# Fraction of the budget one spooled sequence or sorter may hold in memory;
+# a run keeps a few of them alive at once (stage outputs, sort runs)
+DEFAULT_SHARE = 0.2
+
+_UNITS = {"": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+_SIZE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([KMG]?)i?B?\s*$", re.IGNORECASE)
+
+
+def parse_memory(text):
+    """Parse a size such as "512M", "2G" or "1500000" into bytes."""
+    match = _SIZE.match(str(text))
+    if not match:
+        raise ValueError(f"Invalid memory size: {text!r} (expected e.g. 512M or 2G)")
+    return int(float(match.group(1)) * _UNITS[match.group(2).upper()])
+
+
+def estimate_size(obj):
+    """Approximate in-memory size of a row: the object plus its tuple/list/str members."""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (tuple, list)):
+        for item in obj:
+            size += estimate_size(item) if isinstance(item, (tuple, list)) else sys.getsizeof(item)
+    return size
+
+
+class MemoryBudget:
+    """A byte budget shared out to the spilling containers of one run."""
+
+    def __init__(self, max_bytes, share=DEFAULT_SHARE):
+        self.max_bytes = max_bytes
+        self.share = share
+
+    @classmethod
+    def parse(cls, text):
+        return cls(parse_memory(text)) if text else None
+
+    @property
+    def container_bytes(self):
+        return max(1, int(self.max_bytes * self.share))
+
+    def __repr__(self):
+        return f"MemoryBudget({self.max_bytes})"
+
+
+# =============================================================================
+# SPILL FILES
+# =============================================================================
+
+class _SpillFile:
+    """Anonymous temp file of pickled item batches; readers keep their own offsets."""
+
+    def __init__(self):
+        self.f = tempfile.TemporaryFile(prefix="vendor-spill-")
+
+    def write(self, items):
+        self.f.seek(0, 2)
+        for start in range(0, len(items), SPILL_BATCH):
+            pickle.dump(items[start:start + SPILL_BATCH], self.f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def __iter__(self):
+        self.f.flush()
+        offset = 0
+        end = self.f.seek(0, 2)
+        while offset < end:
+            self.f.seek(offset)
+            batch = pickle.load(self.f)
+            offset = self.f.tell()
+            yield from batch
+
+    def close(self):
+        self.f.close()
+
+
+# =============================================================================
+# SPOOLED ROWS
+# =============================================================================
+
+class SpooledRows:
+    """Append-only row sequence that spills to disk beyond its memory share."""
+
+    def __init__(self, budget):
+        self.capacity = budget.container_bytes
+        self._buffer = []
+        self._buffer_bytes = 0
+        self._spill = None
+        self._spilled = 0
+
+    def append(self, row):
+        self._buffer.append(row)
+        self._buffer_bytes += estimate_size(row)
+        if self._buffer_bytes >= self.capacity:
+            self._flush()
+
+    def extend(self, rows):
+        for row in rows:
+            self.append(row)
+
+    def _flush(self):
+        if self._spill is None:
+            self._spill = _SpillFile()
+        self._spill.write(self._buffer)
+        self._spilled += len(self._buffer)
+        self._buffer = []
+        self._buffer_bytes = 0
+
+    def __len__(self):
+        return self._spilled + len(self._buffer)
+
+    def __iter__(self):
+        if self._spill is not None:
+            yield from self._spill
+        yield from list(self._buffer)
+
+    def __getitem__(self, index):
+        # Only the last row is needed in practice (checkpoint resume)
+        if index == -1 and self:
+            if self._buffer:
+                return self._buffer[-1]
+            for row in self._spill:
+                last = row
+            return last
+        raise IndexError("SpooledRows supports only [-1]")
+
+    # Stage artifacts are streamed batch by batch rather than pickled whole
+    def write_artifact(self, f):
+        for batch in batched(self, SPILL_BATCH):
+            pickle.dump(batch, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def read_artifact(cls, f, budget):
+        rows = cls(budget)
+        while True:
+            try:
+                rows.extend(pickle.load(f))
+            except EOFError:
+                return rows
+
+    def __reduce__(self):
+        raise TypeError("SpooledRows cannot be pickled whole; use write_artifact()")
+
+
+def batched(iterable, n):
+    """Yield lists of up to n items from iterable."""
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= n:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# =============================================================================
+# EXTERNAL SORT
+# =============================================================================
+
+class ExternalSorter:
+    """Stable external merge sort of items by key under a memory budget."""
+
+    def __init__(self, key, budget):
+        self.key = key
+        self.capacity = budget.container_bytes
+        self._buffer = []
+        self._buffer_bytes = 0
+        self._runs = []
+        self._count = 0
+
+    def add(self, item):
+        self._buffer.append(item)
+        self._buffer_bytes += estimate_size(item)
+        self._count += 1
+        if self._buffer_bytes >= self.capacity:
+            self._spill_run()
+
+    def extend(self, items):
+        for item in items:
+            self.add(item)
+
+    def _spill_run(self):
+        self._buffer.sort(key=self.key)
+        run = _SpillFile()
+        run.write(self._buffer)
+        self._runs.append(run)
+        self._buffer = []
+        self._buffer_bytes = 0
+
+    @property
+    def runs(self):
+        return len(self._runs)
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        """Yield all items in key order (ties keep insertion order); may be repeated."""
+        self._buffer.sort(key=self.key)
+        if not self._runs:
+            return iter(list(self._buffer))
+        # Runs were spilled in insertion order and the buffer holds the newest
+        # items, so merging in this order keeps the sort stable
+        return heapq.merge(*self._runs, list(self._buffer), key=self.key)
+
+    def close(self):
+        for run in self._runs:
+            run.close()
+        self._runs = []
+        self._buffer = []
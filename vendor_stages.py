@@ -0,0 +1,288 @@
+"""
+Stage DAG Executor
+================================
+Runs the analysis as declared stages with on-disk artifact caching. Each
+stage names its upstream stages and the code and parameters its output
+depends on (its "fingerprint"). A stage's cache key is the hash of its
+fingerprint and its upstream keys, so keys are known before anything runs
+and a change invalidates exactly the stages downstream of it: editing the
+memo template reruns only the report and write stages, not ingest and
+classification.
+
+Functions, classes and modules of this project are fingerprinted with
+everything they refer to by name: the helpers, classes and constants they
+use are hashed in turn, transitively, so editing a formatting helper called
+from inside a stage changes that stage's key without it being listed.
+
+Execution is demand-driven from the requested stage: a stage whose artifact
+is cached is loaded from disk, and its own upstream stages are then never
+touched.
+"""
+
+import glob
+import hashlib
+import inspect
+import os
+import pickle
+import re
+import sys
+import types
+from string import Template
+
+DEFAULT_STAGE_CACHE_DIR = ".vendor_stage_cache"
+_CHUNK = 1 << 20
+_HERE = os.path.dirname(os.path.abspath(__file__))
+# Module-level values hashed when code refers to them (others are covered by
+# the source of the code that builds them)
+_CONSTANT_TYPES = (str, bytes, int, float, bool, type(None), tuple, list, dict, set, frozenset,
+                   Template, re.Pattern)
+
+
+# =============================================================================
+# FINGERPRINTS
+# =============================================================================
+
+def _is_local(obj):
+    """Whether a function, class or module is part of this project."""
+    module = obj if isinstance(obj, types.ModuleType) else sys.modules.get(obj.__module__)
+    path = getattr(module, "__file__", None)
+    return path is not None and os.path.dirname(os.path.abspath(path)) == _HERE
+
+
+def _codes(obj):
+    """Code objects of a function or of a class's methods, nested code included."""
+    if isinstance(obj, type):
+        members = []
+        for member in vars(obj).values():
+            if isinstance(member, (staticmethod, classmethod)):
+                member = member.__func__
+            elif isinstance(member, property):
+                members.extend(f for f in (member.fget, member.fset, member.fdel) if f)
+                continue
+            members.append(member)
+        funcs = [m for m in members if isinstance(m, types.FunctionType)]
+    else:
+        funcs = [obj]
+    stack = [f.__code__ for f in funcs]
+    while stack:
+        code = stack.pop()
+        yield code
+        stack.extend(c for c in code.co_consts if isinstance(c, types.CodeType))
+
+
+def _references(obj):
+    """Sorted (name, value) module-level objects a local function, class or module
+    refers to by name."""
+    if isinstance(obj, types.ModuleType):
+        namespace = vars(obj)
+        owners = [v for v in namespace.values()
+                  if isinstance(v, (types.FunctionType, type))
+                  and getattr(v, "__module__", None) == obj.__name__]
+    else:
+        namespace = vars(sys.modules[obj.__module__])
+        owners = [obj]
+    names = set()
+    for owner in owners:
+        for code in _codes(owner):
+            names.update(code.co_names)
+    return [(name, namespace[name]) for name in sorted(names) if name in namespace]
+
+
+def _source(obj):
+    try:
+        return inspect.getsource(obj)
+    except (OSError, TypeError):
+        # e.g. namedtuple classes, whose source is generated
+        return repr(getattr(obj, "_fields", obj.__qualname__))
+
+
+def _update(h, part, seen):
+    """Feed one fingerprint part into the hash, by content rather than identity."""
+    if callable(part) and hasattr(part, "__wrapped__"):
+        part = inspect.unwrap(part)  # e.g. lru_cache-wrapped functions
+    if isinstance(part, (types.ModuleType, types.FunctionType, type)):
+        name = part.__name__ if isinstance(part, types.ModuleType) else (
+            f"{part.__module__}.{part.__qualname__}")
+        h.update(f"{name}\0".encode())
+        if id(part) in seen or not _is_local(part):
+            h.update(b"\0")
+            return
+        seen.add(id(part))
+        h.update(_source(part).encode())
+        if isinstance(part, types.ModuleType):
+            # The module's own functions and classes are covered by its source
+            seen.update(id(v) for v in vars(part).values()
+                        if isinstance(v, (types.FunctionType, type))
+                        and getattr(v, "__module__", None) == part.__name__)
+        for ref_name, value in _references(part):
+            if isinstance(value, (types.ModuleType, types.FunctionType, type, _CONSTANT_TYPES)) \
+                    or hasattr(value, "__wrapped__"):
+                h.update(f"{ref_name}=".encode())
+                _update(h, value, seen)
+    elif isinstance(part, Template):
+        h.update(part.template.encode())
+    elif isinstance(part, dict):
+        for key in sorted(part, key=repr):
+            _update(h, key, seen)
+            _update(h, part[key], seen)
+    elif isinstance(part, (list, tuple)):
+        h.update(f"[{len(part)}\0".encode())
+        for item in part:
+            _update(h, item, seen)
+    elif isinstance(part, (set, frozenset)):
+        h.update(repr(sorted(map(repr, part))).encode())
+    else:
+        h.update(repr(part).encode())
+    h.update(b"\0")
+
+
+class FileContent:
+    """Fingerprint part standing for a file's bytes (e.g. the input workbook)."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def __repr__(self):
+        h = hashlib.sha256()
+        with open(self.path, "rb") as f:
+            for chunk in iter(lambda: f.read(_CHUNK), b""):
+                h.update(chunk)
+        return f"FileContent({h.hexdigest()})"
+
+
+def fingerprint(*parts):
+    """Hex digest of functions, classes, modules, templates, files and plain values."""
+    h = hashlib.sha256()
+    seen = set()
+    for part in parts:
+        _update(h, part, seen)
+    return h.hexdigest()
+
+
+# =============================================================================
+# STAGES
+# =============================================================================
+
+class _StreamedArtifact:
+    """Header of an artifact written by the value's own write_artifact() (e.g. SpooledRows)."""
+
+    def __init__(self, cls):
+        self.cls = cls
+
+
+class Stage:
+    """One node of the DAG.
+
+    func is called with the outputs of `inputs`, in order, followed by
+    **params. `depends_on` lists everything else the output is a function of
+    that func does not refer to by name (data tables, templates, modules whose
+    functions it reaches through its inputs' methods). `context` holds extra keyword
+    arguments that do not affect the output (checkpoints, progress hooks) and
+    are left out of the key. Stages with cache=False (side effects such as
+    writing the workbook) always run when requested.
+    """
+
+    def __init__(self, name, func, inputs=(), params=None, depends_on=(), cache=True,
+                 context=None):
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.params = dict(params or {})
+        self.depends_on = tuple(depends_on)
+        self.cache = cache
+        self.context = dict(context or {})
+
+
+class StageRunner:
+    """Demand-driven executor over a set of stages with an on-disk artifact cache."""
+
+    def __init__(self, stages, cache_dir=DEFAULT_STAGE_CACHE_DIR, force=False, budget=None):
+        self.stages = {stage.name: stage for stage in stages}
+        self.cache_dir = cache_dir
+        self.force = force
+        self.budget = budget
+        self.keys = {}
+        self.ran = []
+        self.reused = []
+        self._values = {}
+        for name in self._topological_order():
+            stage = self.stages[name]
+            self.keys[name] = fingerprint(
+                name, stage.func, stage.params, stage.depends_on,
+                [self.keys[i] for i in stage.inputs],
+            )
+
+    def _topological_order(self):
+        order = []
+        state = {}
+
+        def visit(name, path):
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise ValueError(f"Stage cycle: {' -> '.join(path + [name])}")
+            if name not in self.stages:
+                raise KeyError(f"Unknown stage {name!r} (required by {path[-1]!r})")
+            state[name] = "visiting"
+            for upstream in self.stages[name].inputs:
+                visit(upstream, path + [name])
+            state[name] = "done"
+            order.append(name)
+
+        for name in self.stages:
+            visit(name, [])
+        return order
+
+    def _artifact_path(self, name):
+        return os.path.join(self.cache_dir, f"{name}-{self.keys[name][:16]}.pkl")
+
+    def _load(self, name):
+        path = self._artifact_path(name)
+        if self.force or not os.path.exists(path):
+            return False, None
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+                if isinstance(value, _StreamedArtifact):
+                    value = value.cls.read_artifact(f, self.budget)
+                return True, value
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return False, None
+
+    def _store(self, name, value):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._artifact_path(name)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            if hasattr(value, "write_artifact"):
+                pickle.dump(_StreamedArtifact(type(value)), f, protocol=pickle.HIGHEST_PROTOCOL)
+                value.write_artifact(f)
+            else:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        # Only the latest artifact per stage is kept
+        for stale in glob.glob(os.path.join(self.cache_dir, f"{name}-*.pkl")):
+            if stale != path:
+                try:
+                    os.remove(stale)
+                except FileNotFoundError:
+                    pass
+
+    def run(self, name):
+        """Return the output of stage `name`, running or loading upstream stages as needed."""
+        if name in self._values:
+            return self._values[name]
+        stage = self.stages[name]
+        if stage.cache:
+            hit, value = self._load(name)
+            if hit:
+                self.reused.append(name)
+                self._values[name] = value
+                return value
+        inputs = [self.run(upstream) for upstream in stage.inputs]
+        value = stage.func(*inputs, **stage.params, **stage.context)
+        self.ran.append(name)
+        if stage.cache:
+            self._store(name, value)
+        self._values[name] = value
+        return value
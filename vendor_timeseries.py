@@ -0,0 +1,363 @@
+"""
+Monthly Spend Time Series
+================================
+Builds a vendors x months matrix of spend (integer cents) from either
+
+- monthly spend columns in the input sheet (any header cell that reads as
+  a month: an Excel date, "2025-01", "Jan 2025", "Jan-25"), or
+- a transaction ledger CSV with vendor, date (or month) and amount columns,
+
+and computes per-vendor metrics with whole-matrix NumPy operations:
+
+- months active, last billed month and months since then
+- run-rate (last 3 months annualized) and trailing-12-month spend
+- trend: least-squares slope of the last 12 months, as a share of the
+  average month, per year, with its t-statistic
+- seasonality: spread of the calendar-month profile (median of each
+  calendar month across years) relative to its mean, with at least 24
+  months of data, and seasonal strength: the mean correlation between the
+  years' month-by-month patterns
+- spikes: months above both SPIKE_RATIO x the vendor's median month and the
+  median plus SPIKE_MADS median absolute deviations
+
+Growing and Declining need a trend beyond TREND_THRESHOLD whose slope is
+significant (|t| of at least TREND_MIN_T_STAT), and Seasonal needs a
+profile spread beyond SEASONALITY_THRESHOLD that repeats from year to year
+(strength of at least SEASONAL_MIN_STRENGTH), so month-to-month noise is
+not flagged. Seasonal vendors are not flagged Growing or Declining: a
+12-month window of a seasonal series has a slope from its season alone.
+
+Vendors whose billing stopped at least STOPPED_BILLING_MONTHS before the
+last month of data are recommended for termination (see vendor_rules).
+Months are counted relative to the last month in the data, not today.
+"""
+
+import csv
+import re
+from datetime import date, datetime
+
+import numpy as np
+import openpyxl
+
+from vendor_history import vendor_key
+from vendor_money import cents_array, from_cents
+
+STOPPED_BILLING_MONTHS = 3
+RUN_RATE_MONTHS = 3
+TREND_MONTHS = 12
+SEASONAL_MIN_MONTHS = 24
+SEASONALITY_THRESHOLD = 0.5
+# Mean correlation between years' monthly patterns (~2% of pure-noise pairs of years reach it)
+SEASONAL_MIN_STRENGTH = 0.6
+TREND_THRESHOLD = 0.5
+# |t| of the trend slope (about a 1% two-sided significance level over 12 months)
+TREND_MIN_T_STAT = 3.0
+SPIKE_RATIO = 3
+SPIKE_MADS = 5
+SPIKE_MIN_ACTIVE = 6
+
+FLAG_STOPPED = 1
+FLAG_NEW = 2
+FLAG_SPIKE = 4
+FLAG_GROWING = 8
+FLAG_DECLINING = 16
+FLAG_SEASONAL = 32
+FLAG_NAMES = {
+    FLAG_STOPPED: "Stopped billing",
+    FLAG_NEW: "New",
+    FLAG_SPIKE: "Spike",
+    FLAG_GROWING: "Growing",
+    FLAG_DECLINING: "Declining",
+    FLAG_SEASONAL: "Seasonal",
+}
+
+_MONTH_FORMATS = ("%Y-%m", "%Y-%m-%d", "%b %Y", "%B %Y", "%b-%y", "%b-%Y", "%m/%Y")
+_MONTH_TEXT = re.compile(r"^[\w /-]+$")
+# Ledger dates with a day; US month-first for slashes, as in "03/15/2025"
+_LEDGER_DATE_FORMATS = ("%m/%d/%Y", "%m/%d/%y", "%Y/%m/%d", "%d.%m.%Y", "%d %b %Y", "%d %B %Y",
+                        "%b %d, %Y", "%B %d, %Y")
+
+
+def parse_month(value):
+    """datetime64[M] for a header value that names a month, else None."""
+    if isinstance(value, (datetime, date)):
+        return np.datetime64(value.strftime("%Y-%m"), "M")
+    if not isinstance(value, str) or not _MONTH_TEXT.match(value.strip()):
+        return None
+    for fmt in _MONTH_FORMATS:
+        try:
+            return np.datetime64(datetime.strptime(value.strip(), fmt).strftime("%Y-%m"), "M")
+        except ValueError:
+            continue
+    return None
+
+
+def _median(values):
+    """Median along the last axis (sorting short rows beats np.median's partition)."""
+    ordered = np.sort(values, axis=-1)
+    k = ordered.shape[-1]
+    return (ordered[..., (k - 1) // 2] + ordered[..., k // 2]) / 2
+
+
+# =============================================================================
+# MATRIX
+# =============================================================================
+
+def _matrix(keys, months, cents):
+    """Sum (key, month, cents) triples into (distinct keys, month range, cents matrix)."""
+    index = {}
+    rows = np.fromiter((index.setdefault(k, len(index)) for k in keys), dtype=np.int64,
+                       count=len(keys))
+    months = np.asarray(months, dtype="datetime64[M]")
+    first = months.min()
+    span = np.arange(first, months.max() + 1)
+    matrix = np.zeros((len(index), len(span)), dtype=np.int64)
+    np.add.at(matrix, (rows, (months - first).astype(np.int64)), cents)
+    return list(index), span, matrix
+
+
+def read_monthly_columns(input_file, sheet_name="Vendor Analysis Assessment"):
+    """(row indexes, months, cents matrix) from monthly spend columns, or None if there are none."""
+    wb = openpyxl.load_workbook(input_file, read_only=True)
+    try:
+        ws = wb[sheet_name]
+        header = next(ws.iter_rows(min_row=1, max_row=1, values_only=True), ())
+        columns = [(i, m) for i, m in enumerate(map(parse_month, header)) if m is not None]
+        if not columns:
+            return None
+        width = columns[-1][0] + 1
+        keys, values = [], []
+        for row_idx, row in enumerate(ws.iter_rows(min_row=2, max_col=width, values_only=True),
+                                      start=2):
+            if not row or not row[0]:
+                continue
+            row = tuple(row) + (None,) * (width - len(row))
+            keys.append(row_idx)
+            values.append([v if isinstance(v, (int, float)) else 0
+                           for v in (row[i] for i, _ in columns)])
+    finally:
+        wb.close()
+    if not keys:
+        return None
+    months = np.array([m for _, m in columns], dtype="datetime64[M]")
+    span = np.arange(months.min(), months.max() + 1)
+    matrix = np.zeros((len(keys), len(span)), dtype=np.int64)
+    # Columns for the same month (if any) are summed
+    np.add.at(matrix, (slice(None), (months - span[0]).astype(np.int64)), cents_array(values))
+    return keys, span, matrix
+
+
+class LedgerError(ValueError):
+    """A ledger file that is missing a column or has an unreadable value."""
+
+
+def parse_ledger_date(value):
+    """datetime64[M] of a ledger date ("2025-03-15", "03/15/2025", "15.03.2025",
+    an ISO timestamp or any parse_month() form), else None."""
+    text = value.strip()
+    try:
+        return np.datetime64(datetime.fromisoformat(text).strftime("%Y-%m"), "M")
+    except ValueError:
+        pass
+    for fmt in _LEDGER_DATE_FORMATS:
+        try:
+            return np.datetime64(datetime.strptime(text, fmt).strftime("%Y-%m"), "M")
+        except ValueError:
+            continue
+    return parse_month(text)
+
+
+def parse_amount(value):
+    """Float of a ledger amount such as "1000", "$1,000.50" or "(250.00)", else None."""
+    text = value.strip().replace("$", "").replace(",", "").replace(" ", "")
+    negative = text.startswith("(") and text.endswith(")")
+    try:
+        amount = float(text[1:-1] if negative else text)
+    except ValueError:
+        return None
+    if not np.isfinite(amount):
+        return None
+    return -amount if negative else amount
+
+
+def read_ledger(path):
+    """(vendor keys, months, cents matrix) from a vendor,date,amount transaction CSV.
+
+    Raises LedgerError naming the file for missing columns, and the file and
+    line for a date or amount that does not parse.
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        fields = [name.strip() for name in reader.fieldnames or ()]
+        reader.fieldnames = fields
+        date_field = "month" if "month" in fields else "date"
+        missing = [name for name in ("vendor", date_field, "amount") if name not in fields]
+        if missing:
+            raise LedgerError(f"{path}: ledger has no {', '.join(missing)} column "
+                             f"(expected vendor, date or month, amount)")
+        months, keys, amounts = [], [], []
+        for row in reader:
+            if not (row["vendor"] or "").strip() or not (row["amount"] or "").strip():
+                continue
+            month = parse_ledger_date(row[date_field] or "")
+            if month is None:
+                raise LedgerError(f"{path}, line {reader.line_num}: unreadable {date_field} "
+                                 f"{row[date_field]!r}")
+            amount = parse_amount(row["amount"])
+            if amount is None:
+                raise LedgerError(f"{path}, line {reader.line_num}: unreadable amount "
+                                 f"{row['amount']!r}")
+            keys.append(vendor_key(row["vendor"]))
+            months.append(month)
+            amounts.append(amount)
+    if not keys:
+        return None
+    return _matrix(keys, months, cents_array(amounts))
+
+
+# =============================================================================
+# METRICS
+# =============================================================================
+
+class SpendTrends:
+    """Per-vendor time-series metrics as parallel arrays, keyed by row index or vendor key."""
+
+    def __init__(self, keys, months, matrix, by_row):
+        self.keys = keys
+        self.months = months
+        self.by_row = by_row
+        self._index = {k: i for i, k in enumerate(keys)}
+        n, m = matrix.shape
+        spend = matrix.astype(np.float64)
+
+        active = matrix > 0
+        self.months_active = active.sum(axis=1)
+        any_active = self.months_active > 0
+        last = m - 1 - np.argmax(active[:, ::-1], axis=1)
+        first = np.argmax(active, axis=1)
+        self.months_since_billed = np.where(any_active, m - 1 - last, m)
+        self.last_billed = np.where(any_active, last, -1)
+
+        self.trailing_12_cents = matrix[:, -12:].sum(axis=1)
+        self.run_rate_cents = matrix[:, -RUN_RATE_MONTHS:].sum(axis=1) * (12 // RUN_RATE_MONTHS)
+
+        # Least-squares slope over the trend window, per year, relative to the mean month
+        window = spend[:, -TREND_MONTHS:]
+        x = np.arange(window.shape[1], dtype=np.float64)
+        x -= x.mean()
+        mean = window.mean(axis=1)
+        slope = (window @ x) / (x @ x) if window.shape[1] > 1 else np.zeros(n)
+        self.trend = np.divide(slope * 12, mean, out=np.zeros(n), where=mean > 0)
+        # t-statistic of the slope; an exact line has an infinite one
+        self.trend_t = np.zeros(n)
+        if window.shape[1] > 2:
+            residuals = window - mean[:, None] - slope[:, None] * x
+            stderr = np.sqrt((residuals ** 2).sum(axis=1) / (window.shape[1] - 2) / (x @ x))
+            exact = (stderr <= 1e-9 * np.maximum(mean, 1)) & (slope != 0)
+            np.divide(slope, stderr, out=self.trend_t, where=~exact & (stderr > 0))
+            self.trend_t[exact] = np.copysign(np.inf, slope[exact])
+
+        # Spread of the calendar-month profile: the median of each calendar
+        # month over the last whole years, so a one-off spike does not count
+        self.seasonality = np.zeros(n)
+        self.seasonal_strength = np.zeros(n)
+        if m >= SEASONAL_MIN_MONTHS:
+            years = m // 12
+            by_year = spend[:, -12 * years:].reshape(n, years, 12)
+            profile = _median(by_year.transpose(0, 2, 1))
+            overall = profile.mean(axis=1)
+            np.divide(profile.std(axis=1), overall, out=self.seasonality, where=overall > 0)
+            # Mean pairwise correlation of the years (a year without variation counts as 0)
+            centered = by_year - by_year.mean(axis=2, keepdims=True)
+            norms = np.linalg.norm(centered, axis=2, keepdims=True)
+            unit = np.divide(centered, norms, out=np.zeros_like(centered), where=norms > 0)
+            corr = np.einsum("nyk,nzk->nyz", unit, unit)
+            pairs = years * (years - 1)
+            self.seasonal_strength = (corr.sum(axis=(1, 2))
+                                      - np.trace(corr, axis1=1, axis2=2)) / pairs
+
+        median = _median(spend)[:, None]
+        mad = _median(np.abs(spend - median))[:, None]
+        spikes = ((spend > SPIKE_RATIO * median) & (spend > median + SPIKE_MADS * mad)
+                  & (self.months_active >= SPIKE_MIN_ACTIVE)[:, None])
+        self.spikes = spikes.sum(axis=1)
+
+        flags = np.zeros(n, dtype=np.int64)
+        flags[any_active & (self.months_since_billed >= STOPPED_BILLING_MONTHS)] |= FLAG_STOPPED
+        flags[any_active & (first >= m - RUN_RATE_MONTHS) & (m > RUN_RATE_MONTHS)] |= FLAG_NEW
+        flags[self.spikes > 0] |= FLAG_SPIKE
+        seasonal = ((self.seasonality > SEASONALITY_THRESHOLD)
+                    & (self.seasonal_strength >= SEASONAL_MIN_STRENGTH))
+        trending = ~seasonal & (np.abs(self.trend_t) >= TREND_MIN_T_STAT)
+        flags[trending & (self.trend > TREND_THRESHOLD)] |= FLAG_GROWING
+        flags[trending & (self.trend < -TREND_THRESHOLD)] |= FLAG_DECLINING
+        flags[seasonal] |= FLAG_SEASONAL
+        self.flags = flags
+
+    def __len__(self):
+        return len(self.keys)
+
+    def lookup(self, row):
+        """Index of a VendorRow's series, or None."""
+        return self._index.get(row.row_idx if self.by_row else vendor_key(row.vendor))
+
+    def stopped(self, i):
+        return bool(self.flags[i] & FLAG_STOPPED)
+
+    def flag_names(self, i):
+        names = []
+        for bit, name in FLAG_NAMES.items():
+            if self.flags[i] & bit:
+                if bit == FLAG_STOPPED:
+                    name = f"{name} {int(self.months_since_billed[i])} months ago"
+                names.append(name)
+        return names
+
+    def flag_counts(self):
+        return {name: int(np.count_nonzero(self.flags & bit)) for bit, name in FLAG_NAMES.items()}
+
+
+def build_trends(input_file, ledger_file=None):
+    """Stage: SpendTrends from the ledger if given, else from monthly columns (None if neither)."""
+    if ledger_file:
+        data, by_row = read_ledger(ledger_file), False
+    else:
+        data, by_row = read_monthly_columns(input_file), True
+    if data is None:
+        return None
+    keys, months, matrix = data
+    return SpendTrends(keys, months, matrix, by_row)
+
+
+# =============================================================================
+# OUTPUT
+# =============================================================================
+
+def trend_tables(trends, rows):
+    """Build (header, rows, number_formats) blocks for the Spend Trends sheet:
+    flag counts, then one line per flagged vendor in row order."""
+    month_range = f"{trends.months[0]} to {trends.months[-1]}"
+    summary_header = ["Flag", "Vendors", "Months Covered"]
+    summary_rows = [[name, count, month_range] for name, count in trends.flag_counts().items()]
+
+    header = ["Vendor", "Recommendation", "Months Active", "Last Billed", "Trailing 12M (USD)",
+              "Run-Rate (USD/yr)", "Trend (per yr)", "Seasonality", "Spike Months", "Flags"]
+
+    def flagged():
+        for row in rows:
+            i = trends.lookup(row)
+            if i is None or not trends.flags[i]:
+                continue
+            last = trends.last_billed[i]
+            yield [row.vendor, row.rec, int(trends.months_active[i]),
+                   str(trends.months[last]) if last >= 0 else None,
+                   from_cents(int(trends.trailing_12_cents[i])),
+                   from_cents(int(trends.run_rate_cents[i])),
+                   float(trends.trend[i]), round(float(trends.seasonality[i]), 2),
+                   int(trends.spikes[i]), ", ".join(trends.flag_names(i))]
+
+    money = '"$"#,##0'
+    return [
+        (summary_header, summary_rows, {}),
+        (header, flagged(), {4: money, 5: money, 6: "0%"}),
+    ]
@@ -0,0 +1,238 @@
+"""
+Vendor Assessment Validation
+================================
+Automated quality checks for the completed vendor assessment workbook.
+Implements the checks described in the Methodology tab: completeness of
+columns B, D and E, department validation against the Config tab,
+recommendation validation, generic-description detection and validation
+of the Top 3 opportunity totals.
+
+Checks operate on whole columns at once (values are pulled from the sheet
+in a single pass and tested with set membership and compiled patterns), so
+the report is cheap enough to build inline on every run.
+"""
+
+import json
+import re
+
+VALID_RECOMMENDATIONS = ("Terminate", "Consolidate", "Optimize")
+
+# Descriptions matching any of these are too generic to be useful to leadership
+GENERIC_DESCRIPTION_PATTERNS = [
+    re.compile(r"^business and operational services provider \(.*\)$", re.IGNORECASE),
+    re.compile(r"^(general )?business (services|operations) provider$", re.IGNORECASE),
+    re.compile(r"^(technology and software|insurance|telecommunications) services provider$", re.IGNORECASE),
+    re.compile(r"^(services|vendor|supplier|provider)$", re.IGNORECASE),
+]
+
+ASSESSMENT_SHEET = "Vendor Analysis Assessment"
+OPPORTUNITIES_SHEET = "Top 3 Opportunities"
+CONFIG_SHEET = "Config"
+TOTAL_LABEL = "TOTAL ESTIMATED ANNUAL SAVINGS"
+
+
+# =============================================================================
+# CONFIG
+# =============================================================================
+
+def load_valid_departments(wb):
+    """Read the list of valid departments from column A of the Config tab."""
+    ws = wb[CONFIG_SHEET]
+    departments = []
+    for (value,) in ws.iter_rows(min_row=2, max_col=1, values_only=True):
+        if value is not None and str(value).strip():
+            departments.append(str(value).strip())
+    return departments
+
+
+def parse_usd(value):
+    """Parse a USD amount such as '$1,830,000' or 850000 into a float (None if blank)."""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip().replace("$", "").replace(",", "")
+    if not text:
+        return None
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+# =============================================================================
+# CHECKS
+# =============================================================================
+
+def _is_blank(value):
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def _issue(check, severity, row, vendor, column, value, message):
+    return {
+        "check": check,
+        "severity": severity,
+        "row": row,
+        "vendor": vendor,
+        "column": column,
+        "value": value,
+        "message": message,
+    }
+
+
+def check_assessment(ws, valid_departments):
+    """Run completeness, department, recommendation and description checks on the assessment tab."""
+    rows = [
+        (row_idx, values)
+        for row_idx, values in enumerate(
+            ws.iter_rows(min_row=2, max_col=5, values_only=True), start=2
+        )
+        if not _is_blank(values[0])
+    ]
+    if not rows:
+        return 0, []
+
+    row_ids = [r for r, _ in rows]
+    names, depts, _costs, descs, recs = (list(col) for col in zip(*(v for _, v in rows)))
+    valid_depts = set(valid_departments)
+    valid_recs = set(VALID_RECOMMENDATIONS)
+
+    issues = []
+
+    # (a) Completeness: columns B, D, E must be populated
+    for column, values in (("B", depts), ("D", descs), ("E", recs)):
+        for idx in [i for i, v in enumerate(values) if _is_blank(v)]:
+            issues.append(_issue(
+                "completeness", "error", row_ids[idx], names[idx], column, None,
+                f"Column {column} is blank",
+            ))
+
+    # (b) Department validation against the Config tab
+    for idx in [i for i, v in enumerate(depts) if not _is_blank(v) and v not in valid_depts]:
+        issues.append(_issue(
+            "department", "error", row_ids[idx], names[idx], "B", depts[idx],
+            f"Department '{depts[idx]}' is not listed in the Config tab",
+        ))
+
+    # (c) Recommendation validation
+    for idx in [i for i, v in enumerate(recs) if not _is_blank(v) and v not in valid_recs]:
+        issues.append(_issue(
+            "recommendation", "error", row_ids[idx], names[idx], "E", recs[idx],
+            f"Recommendation '{recs[idx]}' is not one of {', '.join(VALID_RECOMMENDATIONS)}",
+        ))
+
+    # (d) Generic description detection
+    stripped = [d.strip() if isinstance(d, str) else "" for d in descs]
+    generic = [
+        i for i, d in enumerate(stripped)
+        if d and any(p.match(d) for p in GENERIC_DESCRIPTION_PATTERNS)
+    ]
+    for idx in generic:
+        issues.append(_issue(
+            "generic_description", "warning", row_ids[idx], names[idx], "D", descs[idx],
+            "Description is generic and does not say what the vendor provides",
+        ))
+
+    return len(rows), issues
+
+
+def find_total_row(ws, label=TOTAL_LABEL):
+    """Return the row whose column B starts with the total label (None if absent)."""
+    for (cell,) in ws.iter_rows(min_row=2, min_col=2, max_col=2):
+        if isinstance(cell.value, str) and cell.value.strip().upper().startswith(label):
+            return cell.row
+    return None
+
+
+def check_opportunity_totals(ws, tolerance=0.5):
+    """Verify that the Top 3 opportunity savings add up to the stated total.
+
+    The total row is found by its label in column B; every row above it (below
+    the header) with an opportunity title or amount counts as an opportunity,
+    so sheets listing fewer than three opportunities validate too.
+    """
+    issues = []
+    total_row = find_total_row(ws)
+    if total_row is None:
+        issues.append(_issue(
+            "opportunity_totals", "error", None, None, "B", None,
+            "Total estimated annual savings row is missing",
+        ))
+        return {"opportunities": [], "stated_total": None, "computed_total": 0}, issues
+
+    amounts = []
+    for row_idx in range(2, total_row):
+        title = ws.cell(row=row_idx, column=2).value
+        raw = ws.cell(row=row_idx, column=4).value
+        if title is None and raw is None:
+            continue
+        amount = parse_usd(raw)
+        amounts.append(amount)
+        if amount is None:
+            issues.append(_issue(
+                "opportunity_totals", "error", row_idx, title, "D", raw,
+                "Opportunity savings estimate is missing or not a USD amount",
+            ))
+
+    stated = ws.cell(row=total_row, column=4).value
+    stated_total = parse_usd(stated)
+    computed_total = sum(a for a in amounts if a is not None)
+    if stated_total is None:
+        issues.append(_issue(
+            "opportunity_totals", "error", total_row, None, "D", stated,
+            "Total estimated annual savings is missing or not a USD amount",
+        ))
+    elif abs(stated_total - computed_total) > tolerance:
+        issues.append(_issue(
+            "opportunity_totals", "error", total_row, None, "D", stated,
+            f"Stated total ${stated_total:,.0f} does not equal the sum of opportunities "
+            f"${computed_total:,.0f}",
+        ))
+
+    return {"opportunities": amounts, "stated_total": stated_total,
+            "computed_total": computed_total}, issues
+
+
+# =============================================================================
+# REPORT
+# =============================================================================
+
+def validate_workbook(wb, valid_departments=None):
+    """Run every quality check against a populated workbook and return a report dict."""
+    if valid_departments is None:
+        valid_departments = load_valid_departments(wb)
+
+    vendor_count, issues = check_assessment(wb[ASSESSMENT_SHEET], valid_departments)
+    totals, total_issues = check_opportunity_totals(wb[OPPORTUNITIES_SHEET])
+    issues.extend(total_issues)
+
+    by_check = {}
+    for issue in issues:
+        by_check[issue["check"]] = by_check.get(issue["check"], 0) + 1
+    errors = sum(1 for i in issues if i["severity"] == "error")
+
+    return {
+        "passed": errors == 0,
+        "vendors_checked": vendor_count,
+        "valid_departments": list(valid_departments),
+        "errors": errors,
+        "warnings": len(issues) - errors,
+        "issues_by_check": by_check,
+        "opportunity_totals": totals,
+        "issues": issues,
+    }
+
+
+def write_validation_report(report, path):
+    """Write the validation report as JSON."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+
+def print_validation_summary(report, file=None):
+    """Print a short console summary of a validation report (to file, default stdout)."""
+    status = "PASSED" if report["passed"] else "FAILED"
+    print(f"  Validation {status}: {report['vendors_checked']} vendors checked, "
+          f"{report['errors']} errors, {report['warnings']} warnings", file=file)
+    for check, count in sorted(report["issues_by_check"].items()):
+        print(f"    {check}: {count}", file=file)
@@ -0,0 +1,350 @@
+"""
+Streaming Workbook Writer
+================================
+Write-only output mode for large inputs. Instead of loading the template into
+a full openpyxl model and filling it in, the template is read in read-only
+mode one row at a time and re-emitted into a write-only workbook with the
+classified values overlaid. Memory use is proportional to one row.
+
+Cell styles are converted once into NamedStyles (one per distinct template
+style) and reused for every cell that shares them. The added table sheets
+use two more, built from the template's default cell format (see
+register_table_styles), in this mode and the fully loaded one alike. Sheet layout that the
+read-only reader does not expose (column widths, row heights, frozen panes,
+auto-filter, data validation and hyperlinks) is recovered with a single
+iterparse pass over each sheet's XML so the output looks the same as the
+fully loaded path.
+"""
+
+import zipfile
+import posixpath
+import xml.etree.ElementTree as ET
+from copy import copy
+
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, NamedStyle, PatternFill
+from openpyxl.utils import get_column_letter
+from openpyxl.worksheet.datavalidation import DataValidation
+
+ASSESSMENT_SHEET = "Vendor Analysis Assessment"
+
+# Matches the template's header cells (bold white on dark blue)
+HEADER_FONT = Font(bold=True, color="FFFFFFFF")
+HEADER_FILL = PatternFill(fill_type="solid", fgColor="FF073763")
+ADDED_COLUMN_WIDTH = 40
+
+# NamedStyles of the added table sheets' body and header cells
+TABLE_BODY_STYLE = "Table Body"
+TABLE_HEADER_STYLE = "Table Header"
+
+_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_PKG_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+
+# =============================================================================
+# TEMPLATE LAYOUT
+# =============================================================================
+
+def _sheet_rels(archive, sheet_path):
+    rels_path = posixpath.join(
+        posixpath.dirname(sheet_path), "_rels", posixpath.basename(sheet_path) + ".rels"
+    )
+    if rels_path not in archive.namelist():
+        return {}
+    root = ET.fromstring(archive.read(rels_path))
+    return {rel.get("Id"): rel.get("Target") for rel in root.iter(f"{_PKG_REL_NS}Relationship")}
+
+
+def read_sheet_layout(template_file, sheet_path):
+    """Scan one worksheet's XML for layout settings without materializing its cells."""
+    layout = {
+        "cols": [], "default_row_height": None, "default_col_width": None,
+        "freeze_panes": None, "auto_filter": None, "data_validations": [],
+        "row_heights": {}, "hyperlinks": {},
+    }
+    with zipfile.ZipFile(template_file) as archive:
+        rels = _sheet_rels(archive, sheet_path)
+        with archive.open(sheet_path) as f:
+            for _event, el in ET.iterparse(f, events=("end",)):
+                tag = el.tag
+                if tag == f"{_NS}c":
+                    el.clear()
+                elif tag == f"{_NS}row":
+                    if el.get("customHeight") in ("1", "true") and el.get("ht"):
+                        layout["row_heights"][int(el.get("r"))] = float(el.get("ht"))
+                    el.clear()
+                elif tag == f"{_NS}col":
+                    layout["cols"].append({
+                        "min": int(el.get("min")), "max": int(el.get("max")),
+                        "width": float(el.get("width")) if el.get("width") else None,
+                        "hidden": el.get("hidden") in ("1", "true"),
+                    })
+                elif tag == f"{_NS}sheetFormatPr":
+                    if el.get("defaultRowHeight"):
+                        layout["default_row_height"] = float(el.get("defaultRowHeight"))
+                    if el.get("defaultColWidth"):
+                        layout["default_col_width"] = float(el.get("defaultColWidth"))
+                elif tag == f"{_NS}pane":
+                    if el.get("state") in ("frozen", "frozenSplit"):
+                        layout["freeze_panes"] = el.get("topLeftCell")
+                elif tag == f"{_NS}autoFilter":
+                    layout["auto_filter"] = el.get("ref")
+                elif tag == f"{_NS}dataValidation":
+                    layout["data_validations"].append(DataValidation.from_tree(el))
+                elif tag == f"{_NS}hyperlink":
+                    target = rels.get(el.get(f"{_REL_NS}id")) or el.get("location")
+                    if target:
+                        layout["hyperlinks"][el.get("ref")] = target
+    return layout
+
+
+def apply_sheet_layout(ws, layout):
+    """Apply layout settings to a write-only worksheet (must happen before any rows are written)."""
+    for col in layout["cols"]:
+        dim = ws.column_dimensions[get_column_letter(col["min"])]
+        dim.min, dim.max = col["min"], col["max"]
+        if col["width"] is not None:
+            dim.width = col["width"]
+        dim.hidden = col["hidden"]
+    if layout["default_row_height"] is not None:
+        ws.sheet_format.defaultRowHeight = layout["default_row_height"]
+        ws.sheet_format.customHeight = True
+    if layout["default_col_width"] is not None:
+        ws.sheet_format.defaultColWidth = layout["default_col_width"]
+    for row_idx, height in layout["row_heights"].items():
+        ws.row_dimensions[row_idx].height = height
+    if layout["freeze_panes"]:
+        ws.freeze_panes = layout["freeze_panes"]
+    if layout["auto_filter"]:
+        ws.auto_filter.ref = layout["auto_filter"]
+    for dv in layout["data_validations"]:
+        ws.data_validations.append(dv)
+
+
+# =============================================================================
+# STREAMING WRITER
+# =============================================================================
+
+class StreamingWorkbookWriter:
+    """Re-emit the template through a write-only workbook, overlaying computed values.
+
+    Usage: create, call write_assessment_row() for each classified row in row
+    order, then write_summary_sheets() and save(). assessment_columns maps
+    {column: header} for columns added to the assessment sheet after the
+    template's own; their values are passed to write_assessment_row().
+    assessment_formats optionally maps {added column: template column} to give
+    an added column's cells the number format of a template column.
+    """
+
+    def __init__(self, template_file, assessment_columns=None, assessment_formats=None):
+        self.template_file = template_file
+        self.assessment_columns = dict(assessment_columns or {})
+        self.assessment_formats = dict(assessment_formats or {})
+        self.template = openpyxl.load_workbook(template_file, read_only=True)
+        self.wb = openpyxl.Workbook(write_only=True)
+        self._styles = {}
+        self._sheets = {}
+        self._layouts = {}
+
+        for src in self.template.worksheets:
+            layout = read_sheet_layout(template_file, src._worksheet_path)
+            dst = self.wb.create_sheet(src.title)
+            apply_sheet_layout(dst, layout)
+            self._sheets[src.title] = dst
+            self._layouts[src.title] = layout
+        for col in self.assessment_columns:
+            self._sheets[ASSESSMENT_SHEET].column_dimensions[get_column_letter(col)].width = \
+                ADDED_COLUMN_WIDTH
+
+        register_table_styles(self.wb, self.template)
+        self._assessment_rows = self._template_rows(ASSESSMENT_SHEET)
+        self._assessment_next = 1
+
+    # -------------------------------------------------------------------------
+    # Styles
+    # -------------------------------------------------------------------------
+
+    def _named_style(self, cell, overrides=None):
+        """Return the cached NamedStyle name for a template cell's style plus overrides."""
+        attrs = {
+            "font": cell.font, "fill": cell.fill, "border": cell.border,
+            "alignment": cell.alignment, "number_format": cell.number_format,
+            "protection": cell.protection,
+        }
+        if overrides:
+            attrs.update(overrides)
+        key = tuple(attrs[k] for k in
+                    ("font", "fill", "border", "alignment", "number_format", "protection"))
+        name = self._styles.get(key)
+        if name is None:
+            name = f"Template {len(self._styles) + 1}"
+            style = NamedStyle(
+                name=name,
+                font=copy(attrs["font"]),
+                fill=copy(attrs["fill"]),
+                border=copy(attrs["border"]),
+                alignment=copy(attrs["alignment"]),
+                number_format=attrs["number_format"],
+                protection=copy(attrs["protection"]),
+            )
+            self.wb.add_named_style(style)
+            self._styles[key] = name
+        return name
+
+    def _cell(self, ws, src, value, overrides=None, hyperlink=None):
+        cell = WriteOnlyCell(ws, value=value)
+        if getattr(src, "has_style", False):
+            cell.style = self._named_style(src, overrides)
+        elif overrides:
+            for attr, style_value in overrides.items():
+                setattr(cell, attr, style_value)
+        if hyperlink:
+            cell.hyperlink = hyperlink
+        return cell
+
+    # -------------------------------------------------------------------------
+    # Rows
+    # -------------------------------------------------------------------------
+
+    def _template_rows(self, title):
+        """Yield (row_idx, cells) for every row of a template sheet, one row at a time."""
+        src = self.template[title]
+        for row_idx, cells in enumerate(src.iter_rows(min_row=1), start=1):
+            yield row_idx, cells
+
+    def _emit_row(self, title, row_idx, cells, values=None, styles=None):
+        ws = self._sheets[title]
+        hyperlinks = self._layouts[title]["hyperlinks"]
+        values = values or {}
+        styles = styles or {}
+        width = max([len(cells)] + list(values) + list(styles))
+        out = []
+        for col in range(1, width + 1):
+            src = cells[col - 1] if col <= len(cells) else None
+            value = values[col] if col in values else getattr(src, "value", None)
+            link = hyperlinks.get(f"{get_column_letter(col)}{row_idx}") if hyperlinks else None
+            out.append(self._cell(ws, src, value, styles.get(col), link))
+        ws.append(out)
+
+    def write_assessment_row(self, row, extra=None):
+        """Write one classified VendorRow (rows must arrive in ascending row order),
+        with {column: value} for any added assessment columns."""
+        row_idx = row.row_idx
+        while self._assessment_next <= row_idx:
+            try:
+                tpl_idx, cells = next(self._assessment_rows)
+            except StopIteration:
+                tpl_idx, cells = self._assessment_next, ()
+            self._assessment_next = tpl_idx + 1
+            if tpl_idx == row_idx:
+                formats = {col: {"number_format": cells[src - 1].number_format}
+                           for col, src in self.assessment_formats.items()
+                           if col in self.assessment_columns and src <= len(cells)}
+                self._emit_row(ASSESSMENT_SHEET, tpl_idx, cells,
+                               {2: row.dept, 4: row.desc, 5: row.rec, **(extra or {})}, formats)
+            elif tpl_idx == 1 and self.assessment_columns and len(cells) >= 5:
+                # Added headers take the style of the last template header
+                header = cells[4]
+                style = {"font": header.font, "fill": header.fill, "border": header.border,
+                         "alignment": header.alignment, "number_format": header.number_format,
+                         "protection": header.protection}
+                self._emit_row(ASSESSMENT_SHEET, tpl_idx, cells, self.assessment_columns,
+                               {col: style for col in self.assessment_columns})
+            else:
+                self._emit_row(ASSESSMENT_SHEET, tpl_idx, cells)
+
+    def _finish_assessment(self):
+        for tpl_idx, cells in self._assessment_rows:
+            self._emit_row(ASSESSMENT_SHEET, tpl_idx, cells)
+
+    def write_summary_sheets(self, sheet_cells, sheet_styles=None):
+        """Copy every other template sheet, overlaying {title: {(row, col): value}}.
+
+        sheet_styles optionally maps {title: {(row, col): {attr: style}}} to
+        style attributes that replace the template cell's (e.g. a bold font).
+        """
+        self._finish_assessment()
+        sheet_styles = sheet_styles or {}
+        for title in self._sheets:
+            if title == ASSESSMENT_SHEET:
+                continue
+            values_by_row = {}
+            for (row_idx, col), value in sheet_cells.get(title, {}).items():
+                values_by_row.setdefault(row_idx, {})[col] = value
+            styles_by_row = {}
+            for (row_idx, col), overrides in sheet_styles.get(title, {}).items():
+                styles_by_row.setdefault(row_idx, {})[col] = overrides
+
+            last_row = 0
+            for row_idx, cells in self._template_rows(title):
+                self._emit_row(title, row_idx, cells,
+                               values_by_row.get(row_idx), styles_by_row.get(row_idx))
+                last_row = row_idx
+            extra_rows = max(list(values_by_row) + list(styles_by_row), default=last_row)
+            for row_idx in range(last_row + 1, extra_rows + 1):
+                self._emit_row(title, row_idx, (),
+                               values_by_row.get(row_idx), styles_by_row.get(row_idx))
+
+    def save(self, output_file):
+        self.wb.save(output_file)
+        self.template.close()
+
+
+# =============================================================================
+# ADDITIONAL TABLE SHEETS
+# =============================================================================
+
+def register_table_styles(wb, template):
+    """Add the table sheets' NamedStyles to wb, built from the template workbook's
+    default cell format: body cells in that format, headers bold white on the
+    template's header fill. Does nothing if wb already has them."""
+    if TABLE_BODY_STYLE in wb.named_styles:
+        return
+    default = template._cell_styles[0]
+    font = copy(template._fonts[default.fontId])
+    alignment = copy(template._alignments[default.alignmentId])
+    wb.add_named_style(NamedStyle(name=TABLE_BODY_STYLE, font=font, alignment=alignment))
+    header_font = copy(font)
+    header_font.b = True
+    header_font.color = copy(HEADER_FONT.color)
+    wb.add_named_style(NamedStyle(name=TABLE_HEADER_STYLE, font=header_font,
+                                  fill=copy(HEADER_FILL), alignment=copy(alignment)))
+
+
+def add_table_sheet(wb, title, tables, widths=None):
+    """Append a sheet of one or more tables to a regular or write-only workbook.
+
+    tables: list of (header, rows, number_formats) where number_formats maps a
+    0-based column index to an Excel number format. Rows may be any iterable
+    (including a generator) and are written as they are consumed. Tables are
+    separated by a blank row. Cells use the table NamedStyles (registered from
+    a regular workbook's own template styles; a StreamingWorkbookWriter
+    registers its template's).
+    """
+    if not getattr(wb, "write_only", False):
+        register_table_styles(wb, wb)
+    ws = wb.create_sheet(title)
+    if widths:
+        for col, width in enumerate(widths, start=1):
+            ws.column_dimensions[get_column_letter(col)].width = width
+    if tables:
+        ws.freeze_panes = "A2"
+
+    def styled(value, style, number_format=None):
+        # Write-only cells append to regular worksheets too
+        cell = WriteOnlyCell(ws, value=value)
+        cell.style = style
+        if number_format is not None:
+            cell.number_format = number_format
+        return cell
+
+    for index, (header, rows, number_formats) in enumerate(tables):
+        if index:
+            ws.append([])
+        ws.append([styled(v, TABLE_HEADER_STYLE) for v in header])
+        for row in rows:
+            ws.append([styled(v, TABLE_BODY_STYLE, (number_formats or {}).get(i))
+                       for i, v in enumerate(row)])
+    return ws